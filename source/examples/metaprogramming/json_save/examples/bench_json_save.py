@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""
+How much faster are the generated (compiled) methods?
+
+Saves and loads a big list of small objects -- like a donor database --
+with classes made with compiled=False (the general methods, that loop
+through the attributes for each object) and with the generated ones.
+
+    python bench_json_save.py [num_objects]
+"""
+
+import sys
+import time
+
+import json_save.json_save_meta as js
+
+
+def make_classes(compiled):
+    """
+    make the same classes, compiled or not
+    """
+    class Record(js.JsonSaveable, compiled=compiled):
+        name = js.String()
+        amount = js.Float()
+        count = js.Int()
+        active = js.Bool()
+
+    class Donations(js.JsonSaveable, compiled=compiled):
+        name = js.String()
+        donations = js.List()
+
+    class Collection(js.JsonSaveable, compiled=compiled):
+        records = js.List()
+
+    return Record, Donations, Collection
+
+
+def make_data(classes, num):
+    Record, Donations, Collection = classes
+    records = []
+    for i in range(num):
+        rec = Record()
+        rec.name = f"record {i}"
+        rec.amount = i * 1.5
+        rec.count = i
+        rec.active = bool(i % 2)
+        records.append(rec)
+        don = Donations()
+        don.name = f"donor {i}"
+        don.donations = [float(i), i * 2.5, 100.0]
+        records.append(don)
+    coll = Collection()
+    coll.records = records
+    return coll
+
+
+def best_time(func, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def bench(num):
+    print(f"{num} objects of each kind:")
+    print(f"{'':14s} {'to_json_compat':>15s} {'from_json_dict':>15s}")
+    results = {}
+    for compiled in (False, True):
+        classes = make_classes(compiled)
+        data = make_data(classes, num)
+        save_time, compat = best_time(data.to_json_compat)
+        load_time, data2 = best_time(classes[2].from_json_dict, compat)
+        assert data2 == data
+        label = "compiled" if compiled else "not compiled"
+        print(f"{label:14s} {save_time:14.3f}s {load_time:14.3f}s")
+        results[compiled] = (save_time, load_time)
+    print(f"{'speedup':14s} "
+          f"{results[False][0] / results[True][0]:14.1f}x "
+          f"{results[False][1] / results[True][1]:14.1f}x")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
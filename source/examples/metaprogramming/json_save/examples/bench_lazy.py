@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""
+Time to open a big saved donor DB and look up one donor: loading all of
+it, or lazily, with the index written by lazy.dump()
+
+    python bench_lazy.py [num_donors]
+
+Each donor has 20 donations -- 2,000,000 donors make a file of about
+1.3 GB. The file is made in the temp dir, and deleted after.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import json_save.json_save_meta as js
+from json_save import lazy
+
+
+class Donor(js.JsonSaveable):
+    name = js.String()
+    donations = js.List()
+
+
+class DonorDB(js.JsonSaveable):
+    donor_data = js.Dict()
+
+
+def make_db(num):
+    db = DonorDB()
+    db.donor_data = {}
+    for i in range(num):
+        donor = Donor()
+        donor.name = f"Donor Number {i}"
+        donor.donations = [i * 0.01 + j for j in range(20)]
+        db.donor_data[donor.name.lower()] = donor
+    return db
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def look_up_all_at_once(filename, name):
+    with open(filename) as infile:
+        return js.from_json(infile).donor_data[name]
+
+
+def look_up_lazily(filename, name):
+    return lazy.load(filename).donor_data[name]
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    name = f"donor number {num // 2}"
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "donors.json")
+        save_time, _ = timed(lazy.dump, make_db(num), filename)
+        print(f"{num} donors: {os.path.getsize(filename) / 2**20:.0f} MB "
+              f"(index: {os.path.getsize(lazy.index_filename(filename)) / 2**20:.0f} MB)"
+              f" -- saved in {save_time:.1f} s")
+
+        lazy_time, lazy_donor = timed(look_up_lazily, filename, name)
+        print(f"look up one donor lazily:          {lazy_time * 1000:10.2f} ms")
+        full_time, donor = timed(look_up_all_at_once, filename, name)
+        print(f"look up one donor, loading it all: {full_time * 1000:10.2f} ms")
+        assert donor == lazy_donor
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""
+Memory use and time of lots of little saveable objects, with and without
+__slots__
+
+    python bench_slots.py [num_objects]
+
+The memory is the total allocated for num_objects objects (and the list
+holding them), as measured by tracemalloc.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import binary
+
+
+class Point(js.JsonSaveable):
+    x = js.Float()
+    y = js.Float()
+    label = js.String()
+
+
+class SlotPoint(js.JsonSaveable, slots=True):
+    x = js.Float()
+    y = js.Float()
+    label = js.String()
+
+
+@jsd.json_save
+class DecPoint:
+    x = js.Float()
+    y = js.Float()
+    label = js.String()
+
+
+@jsd.json_save(slots=True)
+class DecSlotPoint:
+    x = js.Float()
+    y = js.Float()
+    label = js.String()
+
+
+class Points(js.JsonSaveable):
+    points = js.List()
+
+
+def make_points(cls, num):
+    points = []
+    for i in range(num):
+        point = cls()
+        point.x = float(i)
+        point.y = i * 0.5
+        points.append(point)
+    return points
+
+
+def measure(cls, num):
+    start = time.perf_counter()
+    points = make_points(cls, num)
+    create_time = time.perf_counter() - start
+
+    tracemalloc.start()
+    kept = make_points(cls, num)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+
+    container = Points()
+    container.points = points
+    data = binary.dumps(container)
+    start = time.perf_counter()
+    binary.loads(data)
+    load_time = time.perf_counter() - start
+    return memory, create_time, load_time
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{num} objects with three attributes:")
+    print(f"{'':16s} {'memory':>9s} {'bytes each':>11s} "
+          f"{'create':>9s} {'load':>9s}")
+    for cls in (Point, SlotPoint, DecPoint, DecSlotPoint):
+        memory, create_time, load_time = measure(cls, num)
+        print(f"{cls.__name__:16s} {memory / 2**20:6.1f} MB {memory / num:11.0f} "
+              f"{create_time:7.2f} s {load_time:7.2f} s")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""
+Memory use and time of saving and loading a big object, all at once
+(json.dump of to_json_compat, json.load) or with the streaming writer
+and reader.
+
+    python bench_streaming.py [num_objects]
+
+The memory is the peak allocated on top of the object itself, as
+measured by tracemalloc.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import json_save.json_save_meta as js
+from json_save import streaming
+
+
+class Donor(js.JsonSaveable):
+    name = js.String()
+    donations = js.List()
+
+
+class DonorDB(js.JsonSaveable):
+    donor_data = js.Dict()
+
+
+def make_db(num):
+    db = DonorDB()
+    db.donor_data = {}
+    for i in range(num):
+        donor = Donor()
+        donor.name = f"Donor Number {i}"
+        donor.donations = [float(i), i * 2.5, 100.0]
+        db.donor_data[donor.name.lower()] = donor
+    return db
+
+
+def save_all_at_once(db, filename):
+    with open(filename, 'w') as outfile:
+        json.dump(db.to_json_compat(), outfile, indent=4)
+
+
+def save_streaming(db, filename):
+    with open(filename, 'w') as outfile:
+        streaming.dump(db, outfile, indent=4)
+
+
+def load_all_at_once(filename):
+    with open(filename) as infile:
+        return js.from_json_dict(json.load(infile))
+
+
+def load_streaming(filename):
+    with open(filename) as infile:
+        return streaming.load(infile)
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    db = make_db(num)
+    tracemalloc.start()
+    make_db(num)
+    print(f"{num} donors: the object itself is "
+          f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f} MB")
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "db.json")
+        for label, func, args in [
+                ("save all at once", save_all_at_once, (db, filename)),
+                ("save streaming", save_streaming, (db, filename)),
+                ("load all at once", load_all_at_once, (filename,)),
+                ("load streaming", load_streaming, (filename,)),
+                ]:
+            elapsed, peak = measure(func, *args)
+            print(f"{label:20s} {elapsed:6.2f} s {peak / 2**20:8.1f} MB")
+        print(f"(the file is {os.path.getsize(filename) / 2**20:.1f} MB)")
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+
+"""
+A compact binary format for saveable objects
+
+JSON is text: every number is written out in decimal, and parsed back
+again, and every object repeats all its attribute names. That's slow and
+big for objects with lots of numbers in them.
+
+This saves the same objects (anything that can be saved as JSON) in a
+binary format, a bit like MessagePack: each value is a one-byte tag,
+followed by the data:
+
+    N, T, F           None, True, False
+    i                 8-byte integer
+    I                 a bigger integer, as a string of digits
+    d                 8-byte float
+    s                 string: 4-byte length, then utf-8 bytes
+    l                 list: 4-byte count, then the items
+    a                 packed array -- a list of all floats or all ints:
+                      typecode ('d' or 'q'), 4-byte count, then the
+                      numbers, as they are stored in an array.array
+    m                 dict: 4-byte count, then the keys and values
+                      (each key is a string -- without the tag)
+    c                 a class: its name, and the names of its attributes
+                      -- written the first time an object of the class
+                      is saved, and numbered in order
+    o                 object: 4-byte class number, then the value of each
+                      attribute -- no need for the names again
+
+Everything is little-endian.
+"""
+
+import struct
+import sys
+from array import array
+
+from .saveables import List, Dict
+from .streaming import is_walkable, object_hook
+
+MAGIC = b"JSAVEB1\n"
+
+INT = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+LENGTH = struct.Struct("<I")
+
+MIN_INT = -2 ** 63
+MAX_INT = 2 ** 63 - 1
+
+# arrays are written in little-endian order
+SWAP_BYTES = sys.byteorder == "big"
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.out = bytearray(MAGIC)
+        self.class_ids = {}
+
+    def value(self, value):
+        out = self.out
+        typ = type(value)
+        if typ is str:
+            out += b"s"
+            self.string(value)
+        elif typ is float:
+            out += b"d"
+            out += FLOAT.pack(value)
+        elif typ is int:
+            if MIN_INT <= value <= MAX_INT:
+                out += b"i"
+                out += INT.pack(value)
+            else:
+                out += b"I"
+                self.string(str(value))
+        elif value is None:
+            out += b"N"
+        elif typ is bool:
+            out += b"T" if value else b"F"
+        elif typ is list or typ is tuple:
+            self.sequence(value)
+        elif typ is dict:
+            self.mapping(value.items(), len(value))
+        elif is_walkable(value):
+            self.object(value)
+        elif hasattr(value, "to_json_compat"):
+            self.value(value.to_json_compat())
+        else:
+            raise TypeError(f"Object of type {typ.__name__} can't be saved")
+
+    def string(self, value):
+        data = value.encode("utf-8")
+        self.out += LENGTH.pack(len(data))
+        self.out += data
+
+    def sequence(self, value):
+        """
+        a list -- packed into an array, if it's all floats or all ints
+        """
+        packed = None
+        if value:
+            types = set(map(type, value))
+            if types == {float}:
+                packed = array('d', value)
+            elif (types == {int}
+                  and min(value) >= MIN_INT and max(value) <= MAX_INT):
+                packed = array('q', value)
+        if packed is not None:
+            if SWAP_BYTES:
+                packed.byteswap()
+            self.out += b"a" + packed.typecode.encode("ascii")
+            self.out += LENGTH.pack(len(packed))
+            self.out += packed.tobytes()
+        else:
+            self.out += b"l"
+            self.out += LENGTH.pack(len(value))
+            for item in value:
+                self.value(item)
+
+    def mapping(self, items, length):
+        self.out += b"m"
+        self.out += LENGTH.pack(length)
+        for key, item in items:
+            if type(key) is not str:
+                raise TypeError(f"dict keys must be strings, not {key!r}")
+            self.string(key)
+            self.value(item)
+
+    def object(self, obj):
+        """
+        a saveable object -- the values of its attributes, in order
+        """
+        cls = type(obj)
+        attrs = cls._attrs_to_save
+        class_id = self.class_ids.get(cls)
+        if class_id is None:
+            class_id = self.class_ids[cls] = len(self.class_ids)
+            self.out += b"c"
+            self.string(cls.__qualname__)
+            self.out += LENGTH.pack(len(attrs))
+            for attr in attrs:
+                self.string(attr)
+        self.out += b"o"
+        self.out += LENGTH.pack(class_id)
+        for attr, typ in attrs.items():
+            value = getattr(obj, attr)
+            if isinstance(typ, List):
+                self.sequence(value)
+            elif isinstance(typ, Dict):
+                items = list(Dict.json_items(value))
+                self.mapping(items, len(items))
+            else:
+                self.value(typ.to_json_compat(value))
+
+
+class _Decoder:
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError("not a json_save binary file")
+        self.pos = len(MAGIC)
+        self.classes = []  # (name, [attribute names])
+        self.readers = {ord(tag): reader for tag, reader in [
+            ("N", lambda: None),
+            ("T", lambda: True),
+            ("F", lambda: False),
+            ("i", self.read_int),
+            ("I", self.read_big_int),
+            ("d", self.read_float),
+            ("s", self.read_string),
+            ("l", self.read_list),
+            ("a", self.read_array),
+            ("m", self.read_dict),
+            ("c", self.read_class),
+            ("o", self.read_object),
+        ]}
+
+    def value(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        try:
+            reader = self.readers[tag]
+        except KeyError:
+            raise ValueError(f"bad tag {chr(tag)!r} at {self.pos - 1}")
+        return reader()
+
+    def read_length(self):
+        (length,) = LENGTH.unpack_from(self.data, self.pos)
+        self.pos += LENGTH.size
+        return length
+
+    def read_int(self):
+        (value,) = INT.unpack_from(self.data, self.pos)
+        self.pos += INT.size
+        return value
+
+    def read_big_int(self):
+        return int(self.read_string())
+
+    def read_float(self):
+        (value,) = FLOAT.unpack_from(self.data, self.pos)
+        self.pos += FLOAT.size
+        return value
+
+    def read_string(self):
+        length = self.read_length()
+        start = self.pos
+        self.pos += length
+        return str(self.data[start:self.pos], "utf-8")
+
+    def read_list(self):
+        return [self.value() for _ in range(self.read_length())]
+
+    def read_array(self):
+        typecode = chr(self.data[self.pos])
+        self.pos += 1
+        packed = array(typecode)
+        size = self.read_length() * packed.itemsize
+        packed.frombytes(self.data[self.pos:self.pos + size])
+        self.pos += size
+        if SWAP_BYTES:
+            packed.byteswap()
+        return packed.tolist()
+
+    def read_dict(self):
+        dic = {}
+        for _ in range(self.read_length()):
+            key = self.read_string()
+            dic[key] = self.value()
+        # it may be an object with its own to_json_compat
+        return object_hook(dic)
+
+    def read_class(self):
+        name = self.read_string()
+        attrs = [self.read_string() for _ in range(self.read_length())]
+        self.classes.append((name, attrs))
+        # the class is always followed by an object of that class
+        return self.value()
+
+    def read_object(self):
+        name, attrs = self.classes[self.read_length()]
+        dic = {attr: self.value() for attr in attrs}
+        dic["__obj_type"] = name
+        return object_hook(dic)
+
+
+def dumps(obj):
+    """
+    save a saveable object in the binary format
+
+    :returns: bytes
+    """
+    encoder = _Encoder()
+    encoder.value(obj)
+    return bytes(encoder.out)
+
+
+def loads(data):
+    """
+    load an object from bytes written by dumps()
+    """
+    decoder = _Decoder(data)
+    obj = decoder.value()
+    if decoder.pos != len(decoder.data):
+        raise ValueError("extra data after the object")
+    return obj
+
+
+def dump(obj, fp):
+    """
+    save a saveable object to an open binary file
+    """
+    fp.write(dumps(obj))
+
+
+def load(fp):
+    """
+    load an object from an open binary file written by dump()
+    """
+    return loads(fp.read())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""
+Choosing the format to save in
+
+A codec is anything with these functions (a module will do):
+
+    dump(obj, fp)  save obj to an open file
+    load(fp)       load it back
+    dumps(obj)     save obj to a str or bytes
+    loads(data)    load it back
+
+Two come with json_save:
+
+    "json": indented JSON text (see streaming.py) -- the default
+    "binary": a compact binary format (see binary.py) -- use files
+              opened in binary mode with this one
+
+Others can be added with register_codec().
+
+    from json_save import codec
+
+    with open("data.bin", 'wb') as outfile:
+        codec.dump(obj, outfile, codec="binary")
+"""
+
+from . import binary
+from . import streaming
+
+CODECS = {"json": streaming,
+          "binary": binary,
+          }
+
+
+def register_codec(name, codec):
+    """
+    add a new codec, so it can be used by name
+    """
+    for func in ("dump", "load", "dumps", "loads"):
+        if not callable(getattr(codec, func, None)):
+            raise TypeError(f"a codec needs a {func}() function")
+    CODECS[name] = codec
+
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"unknown codec: {name!r} -- "
+                         f"the codecs are: {', '.join(CODECS)}")
+
+
+def dump(obj, fp, codec="json"):
+    """
+    save a saveable object to an open file with the named codec
+    """
+    get_codec(codec).dump(obj, fp)
+
+
+def load(fp, codec="json"):
+    """
+    load a saved object from an open file with the named codec
+    """
+    return get_codec(codec).load(fp)
+
+
+def dumps(obj, codec="json"):
+    """
+    save a saveable object to a str (or bytes) with the named codec
+    """
+    return get_codec(codec).dumps(obj)
+
+
+def loads(data, codec="json"):
+    """
+    load a saved object from a str (or bytes) with the named codec
+    """
+    return get_codec(codec).loads(data)
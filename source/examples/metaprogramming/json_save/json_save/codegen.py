@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+"""
+Writing fast to_json_compat and from_json_dict methods for a class
+
+The general versions of these methods loop through _attrs_to_save for
+every object, calling getattr() or setattr(), and the Saveable's methods,
+for every attribute. That's a lot of overhead when saving or loading
+lots and lots of small objects.
+
+But all the attributes are known when the class is created, so the code
+for that particular class can be written out then, like so:
+
+    def to_json_compat(self):
+        return {"__obj_type": "SimpleClass",
+                "a": self.a,
+                "b": self.b,
+                }
+
+    def from_json_dict(cls, dic):
+        obj = _new(cls)
+        obj.a = _to_python_a(dic["a"])
+        obj.b = _to_python_b(dic["b"])
+        return obj
+
+and compiled with exec() -- the same trick that namedtuple and dataclasses
+use. Saveables that don't need any converting (like String) are put in
+directly, the rest call the Saveable's method, which is looked up once,
+when the class is created.
+"""
+
+import keyword
+
+from .saveables import Saveable, Int, Float
+
+# these to_python methods are just the builtin type -- so call it directly
+BUILTIN_CONVERTERS = {Int.to_python: int,
+                      Float.to_python: float,
+                      }
+
+
+def can_compile(attrs):
+    """
+    can the methods be written out for these attribute names?
+
+    They need to be valid python names to be used as self.name
+    """
+    return all(name.isidentifier() and not keyword.iskeyword(name)
+               for name in attrs)
+
+
+def _compile(source, namespace, name):
+    """
+    compile the source for a function, and return the function
+    """
+    exec(compile(source, f"<json_save generated {name}>", "exec"), namespace)
+    func = namespace[name]
+    # so it can be told apart from one written by hand
+    func._json_save_generated = True
+    return standard(func)
+
+
+def is_generated(func):
+    """
+    was func made by this module?
+    """
+    func = getattr(func, "__func__", func)  # for a classmethod
+    return getattr(func, "_json_save_generated", False)
+
+
+def standard(func):
+    """
+    mark a method as one that just saves the _attrs_to_save -- either
+    generated here, or the general one, that works for any class.
+
+    (the streaming writer can then save the attributes one by one,
+    rather than calling the method -- and the lazy loader can set them
+    one by one)
+    """
+    func._json_save_standard = True
+    return func
+
+
+def is_standard(func):
+    """
+    is func one of the standard methods -- not written by hand?
+    """
+    func = getattr(func, "__func__", func)  # for a classmethod
+    return getattr(func, "_json_save_standard", False)
+
+
+def make_to_json_compat(cls):
+    """
+    write a to_json_compat method for a class with _attrs_to_save
+    """
+    namespace = {}
+    lines = ["def to_json_compat(self):",
+             f"    return {{'__obj_type': {cls.__qualname__!r},"]
+    for attr, typ in cls._attrs_to_save.items():
+        if typ.to_json_compat is Saveable.to_json_compat:
+            # nothing to convert
+            lines.append(f"            {attr!r}: self.{attr},")
+        else:
+            namespace[f"_to_json_compat_{attr}"] = typ.to_json_compat
+            lines.append(f"            {attr!r}: "
+                         f"_to_json_compat_{attr}(self.{attr}),")
+    lines.append("            }")
+    return _compile("\n".join(lines), namespace, "to_json_compat")
+
+
+def make_from_json_dict(cls, new):
+    """
+    write a from_json_dict classmethod for a class with _attrs_to_save
+
+    :param new: the function to create the (empty) object with, called as
+                new(cls). No need for the defaults to be set, as all the
+                attributes are about to be set anyway.
+    """
+    namespace = {"_new": new}
+    lines = ["def from_json_dict(cls, dic):",
+             "    obj = _new(cls)"]
+    for attr, typ in cls._attrs_to_save.items():
+        to_python = BUILTIN_CONVERTERS.get(typ.to_python, typ.to_python)
+        if to_python is Saveable.to_python:
+            # nothing to convert
+            lines.append(f"    obj.{attr} = dic[{attr!r}]")
+        else:
+            namespace[f"_to_python_{attr}"] = to_python
+            lines.append(f"    obj.{attr} = _to_python_{attr}(dic[{attr!r}])")
+    lines.append("    return obj")
+    return classmethod(_compile("\n".join(lines), namespace,
+                                "from_json_dict"))
+
+
+def make_new(cls, new):
+    """
+    write a __new__ for a class with _attrs_to_save, that sets each
+    attribute to its default
+
+    :param new: the function to create the (empty) object with, called as
+                new(cls)
+    """
+    namespace = {"_new": new}
+    lines = ["def __new__(cls, *args, **kwargs):",
+             "    obj = _new(cls)"]
+    for attr, typ in cls._attrs_to_save.items():
+        namespace[f"_default_{attr}"] = typ.default
+        lines.append(f"    obj.{attr} = _default_{attr}")
+    lines.append("    return obj")
+    return _compile("\n".join(lines), namespace, "__new__")
+
+
+def slots_class_dict(class_dict, attrs):
+    """
+    the class dict for a class with __slots__ for the saveable attributes
+
+    The Saveables themselves have to be taken out -- a slot can't have
+    the same name as a class attribute. (they are kept in _attrs_to_save)
+
+    :param class_dict: the class dict (namespace) of the class
+
+    :param attrs: the names of the saveable attributes
+    """
+    class_dict = dict(class_dict)
+    for attr in attrs:
+        del class_dict[attr]
+    # these come from the class not having __slots__
+    class_dict.pop("__dict__", None)
+    class_dict.pop("__weakref__", None)
+    slots = list(attrs)
+    for slot in class_dict.get("__slots__", ()):
+        if slot not in slots:
+            slots.append(slot)
+    class_dict["__slots__"] = tuple(slots)
+    return class_dict
+
+
+def update_class_cells(cls, old_cls):
+    """
+    point the __class__ cells of the methods of cls at cls, not old_cls
+
+    A method that uses super() (or __class__) gets a closure cell with the
+    class it was defined in. Making a new class from the same class dict
+    (as the slots option does) doesn't change them -- so super() would
+    look in the old class.
+    """
+    for value in vars(cls).values():
+        # unwrap classmethod, staticmethod and property
+        funcs = [getattr(value, "__func__", value)]
+        if isinstance(value, property):
+            funcs = [value.fget, value.fset, value.fdel]
+        for func in funcs:
+            for cell in getattr(func, "__closure__", None) or ():
+                try:
+                    if cell.cell_contents is old_cls:
+                        cell.cell_contents = cls
+                except ValueError:  # an empty cell
+                    pass
@@ -8,9 +8,13 @@ import json
 from pathlib import Path
 
 from .json_save_meta import *
+from . import codegen
+from . import streaming
+from .lazy import load as lazy_load
 
 
 # assorted methods that will need to be added to the decorated class:
+@codegen.standard
 def _to_json_compat(self):
     """
     converts this object to a json-compatible dict.
@@ -38,6 +42,7 @@ def __eq__(self, other):
     return True
 
 @classmethod
+@codegen.standard
 def _from_json_dict(cls, dic):
     """
     creates an instance of this class populated by the contents of
@@ -72,7 +77,7 @@ def __new__(cls, *args, **kwargs):
     return obj
 
 
-def _to_json(self, fp=None, indent=4):
+def _to_json(self, fp=None, indent=4, stream=False):
     """
     Converts the object to JSON
 
@@ -81,28 +86,67 @@ def _to_json(self, fp=None, indent=4):
                     will be returned as a string
 
     :param indent=4: The indentation level desired in the JSON
+
+    :param stream=False: write the JSON to fp as it goes, without
+                         making a json-compatible copy of the whole
+                         object first (see streaming.py) -- it uses
+                         a lot less memory, but is slower
     """
     if fp is None:
         return json.dumps(self.to_json_compat(), indent=indent)
+    elif stream:
+        streaming.dump(self, fp, indent=indent)
     else:
         json.dump(self.to_json_compat(), fp, indent=indent)
 
 
 # now the actual decorator
-def json_save(cls):
+def json_save(cls=None, *, compiled=True, slots=False):
     """
     json_save decorator
 
     makes decorated classes Saveable to json
+
+    It can be used with options, too:
+
+    @json_save(compiled=False)
+    class MyClass:
+        ...
+
+    :param compiled=True: write out fast to_json_compat, from_json_dict
+                          and __new__ methods for the class (see codegen.py)
+
+    :param slots=False: give the class __slots__ for the saveable
+                        attributes, so the instances don't need a __dict__.
+                        A class can't get __slots__ after it is made, so
+                        this makes a new class -- with the same name and
+                        methods.
     """
+    if cls is None:  # called with options
+        return lambda cls: json_save(cls, compiled=compiled, slots=slots)
+
     # make sure this is decorating a class object
     if type(cls) is not type:
         raise TypeError("json_save can only be used on classes")
 
+    if slots:
+        attrs = [key for key, attr in vars(cls).items()
+                 if isinstance(attr, Saveable)]
+        class_dict = codegen.slots_class_dict(vars(cls), attrs)
+        class_dict["__qualname__"] = cls.__qualname__
+        saveables = {attr: vars(cls)[attr] for attr in attrs}
+        old_cls = cls
+        cls = type(cls.__name__, cls.__bases__, class_dict)
+        # so super() works in the methods
+        codegen.update_class_cells(cls, old_cls)
+        # the saveables are kept in _attrs_to_save, below
+        attr_dict = saveables
+    else:
+        attr_dict = vars(cls)
+
     # find the saveable attributes
     # these will the attributes that get saved and reconstructed from json.
     # each class object gets its own dict
-    attr_dict = vars(cls)
     cls._attrs_to_save = {}
     for key, attr in attr_dict.items():
         if isinstance(attr, Saveable):
@@ -120,6 +164,14 @@ def json_save(cls):
     cls.from_json_dict = _from_json_dict
     cls.to_json = _to_json
 
+    if compiled and codegen.can_compile(cls._attrs_to_save):
+        cls.__new__ = codegen.make_new(cls, cls.__base__.__new__)
+        cls.to_json_compat = codegen.make_to_json_compat(cls)
+        # the attributes are all set by from_json_dict, so no need for
+        # __new__ to set the defaults first
+        cls.from_json_dict = codegen.make_from_json_dict(cls,
+                                                         cls.__base__.__new__)
+
     return cls
 
 
@@ -135,12 +187,27 @@ def from_json_dict(j_dict):
     return obj
 
 
-def from_json(_json):
+def from_json(_json, lazy=False, stream=False):
     """
     Factory function that re-creates a JsonSaveable object
     from a json string or file
+
+    :param lazy=False: load a file saved by lazy.dump() lazily -- the
+                       items in big Lists and Dicts are only decoded when
+                       they are used. _json is the file name.
+
+    :param stream=False: read the file a chunk at a time, re-creating the
+                         objects as they are read (see streaming.py) --
+                         it uses less memory, but is slower
     """
+    if lazy:
+        return lazy_load(_json)
     if isinstance(_json, (str, Path)):
         return from_json_dict(json.loads(_json))
+    elif stream:
+        obj = streaming.load(_json)
+        if isinstance(obj, dict):  # not a saved object
+            obj = from_json_dict(obj)
+        return obj
     else:  # assume a file-like object
         return from_json_dict(json.load(_json))
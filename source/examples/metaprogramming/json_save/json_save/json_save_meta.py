@@ -16,6 +16,9 @@ import json
 # import * is a bad idea in general, but helpful for a modules that's part
 # of a package, where you control the names.
 from .saveables import *
+from . import codegen
+from . import streaming
+from .lazy import load as lazy_load
 
 
 class MetaJsonSaveable(type):
@@ -26,8 +29,30 @@ class MetaJsonSaveable(type):
 
     Note: the __init__ gets run at compile time, not run time.
           (module import time)
+
+    Options can be passed in the class statement:
+
+    class MyClass(JsonSaveable, compiled=False):
+        ...
+
+    compiled=True: write out fast to_json_compat, from_json_dict and
+                   __new__ methods for the class (see codegen.py)
+
+    slots=False: give the class __slots__ for the saveable attributes, so
+                 the instances don't need a __dict__ -- which saves a lot
+                 of memory when there are lots of little objects. Any
+                 other instance attributes need to be in __slots__ too.
     """
-    def __init__(cls, name, bases, attr_dict):
+    def __new__(mcs, name, bases, attr_dict, compiled=True, slots=False):
+        if slots:
+            attrs = [key for key, attr in attr_dict.items()
+                     if isinstance(attr, Saveable)]
+            attr_dict = codegen.slots_class_dict(attr_dict, attrs)
+        # the other options are only used in __init__ -- type.__new__
+        # doesn't want them
+        return super().__new__(mcs, name, bases, attr_dict)
+
+    def __init__(cls, name, bases, attr_dict, compiled=True, slots=False):
         # it gets the class object as the first param.
         # and then the same parameters as the type() factory function
 
@@ -37,6 +62,8 @@ class MetaJsonSaveable(type):
         # here's where we work with the class attributes:
         # these will the attributes that get saved and reconstructed from json.
         # each class object gets its own dict
+        # (this is the original attr_dict -- so the Saveables are still
+        #  here, even if they were taken out of the class for __slots__)
         cls._attrs_to_save = {}
         for key, attr in attr_dict.items():
             if isinstance(attr, Saveable):
@@ -49,11 +76,47 @@ class MetaJsonSaveable(type):
         # register this class so we can re-construct instances.
         Saveable.ALL_SAVEABLES[attr_dict["__qualname__"]] = cls
 
+        if (compiled and cls._attrs_to_save
+                and codegen.can_compile(cls._attrs_to_save)):
+            cls._add_compiled_methods()
+
+    def _add_compiled_methods(cls):
+        """
+        replace the general to_json_compat, from_json_dict and __new__
+        with ones written for this class -- unless they've been overridden
+        """
+        if not cls._overridden("to_json_compat"):
+            cls.to_json_compat = codegen.make_to_json_compat(cls)
+        if cls._overridden("__new__"):
+            new = cls.__new__
+        else:
+            # what JsonSaveable.__new__ would use to create the object
+            new = super(JsonSaveable, cls).__new__
+            cls.__new__ = codegen.make_new(cls, new)
+        if not cls._overridden("from_json_dict"):
+            # the attributes are all set by from_json_dict, so no
+            # need for __new__ to set the defaults first
+            cls.from_json_dict = codegen.make_from_json_dict(cls, new)
+
+    def _overridden(cls, name):
+        """
+        has the method been written by hand, in this class or a parent?
+        """
+        for klass in cls.__mro__:
+            if name in vars(klass):
+                method = vars(klass)[name]
+                return not (klass is JsonSaveable
+                            or codegen.is_generated(method))
+        return False
+
 
 class JsonSaveable(metaclass=MetaJsonSaveable):
     """
     mixin for JsonSavable objects
     """
+    # so subclasses can have __slots__, and no __dict__
+    __slots__ = ()
+
     def __new__(cls, *args, **kwargs):
         """
         This adds instance attributes to assure they are all there, even if
@@ -79,6 +142,7 @@ class JsonSaveable(metaclass=MetaJsonSaveable):
                 return False
         return True
 
+    @codegen.standard
     def to_json_compat(self):
         """
         converts this object to a json-compatible dict.
@@ -92,6 +156,7 @@ class JsonSaveable(metaclass=MetaJsonSaveable):
         return dic
 
     @classmethod
+    @codegen.standard
     def from_json_dict(cls, dic):
         """
         creates an instance of this class populated by the contents of
@@ -110,7 +175,7 @@ class JsonSaveable(metaclass=MetaJsonSaveable):
         # obj.__init__()
         return obj
 
-    def to_json(self, fp=None, indent=4):
+    def to_json(self, fp=None, indent=4, stream=False):
         """
         Converts the object to JSON
 
@@ -119,9 +184,16 @@ class JsonSaveable(metaclass=MetaJsonSaveable):
                         will be returned as a string
 
         :param indent=4: The indentation level desired in the JSON
+
+        :param stream=False: write the JSON to fp as it goes, without
+                             making a json-compatible copy of the whole
+                             object first (see streaming.py) -- it uses
+                             a lot less memory, but is slower
         """
         if fp is None:
             return json.dumps(self.to_json_compat(), indent=indent)
+        elif stream:
+            streaming.dump(self, fp, indent=indent)
         else:
             json.dump(self.to_json_compat(), fp, indent=indent)
 
@@ -143,13 +215,28 @@ def from_json_dict(j_dict):
     return obj
 
 
-def from_json(_json):
+def from_json(_json, lazy=False, stream=False):
     """
     factory function that re-creates a JsonSavable object
     from a json string or file
+
+    :param lazy=False: load a file saved by lazy.dump() lazily -- the
+                       items in big Lists and Dicts are only decoded when
+                       they are used. _json is the file name.
+
+    :param stream=False: read the file a chunk at a time, re-creating the
+                         objects as they are read (see streaming.py) --
+                         it uses less memory, but is slower
     """
+    if lazy:
+        return lazy_load(_json)
     if isinstance(_json, str):
         return from_json_dict(json.loads(_json))
+    elif stream:
+        obj = streaming.load(_json)
+        if isinstance(obj, dict):  # not a saved object
+            obj = from_json_dict(obj)
+        return obj
     else:  # assume a file-like object
         return from_json_dict(json.load(_json))
 
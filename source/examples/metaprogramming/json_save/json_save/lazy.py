@@ -0,0 +1,542 @@
+#!/usr/bin/env python
+
+"""
+Loading just the parts of a big saved object that are needed
+
+from_json() re-creates the whole object, even if all that's wanted is
+one item out of a big Dict. With a file saved by dump() here, load()
+only reads what it has to: each big List or Dict attribute is a proxy,
+that decodes an item from the file the first time it's asked for.
+
+    lazy.dump(db, "donors.json")
+
+    db = lazy.load("donors.json")
+    donor = db.donor_data["some name"]  # only this donor is decoded
+
+The JSON file is the same as any other -- from_json() can read it. Next
+to it (in "donors.json.index") is an index of where things are in it:
+where each item of each big List or Dict starts and ends, and a hash
+table of the keys of the Dicts, so an item can be found without reading
+the rest of the file. Both files are memory-mapped, so only the parts
+used are read from disk.
+
+The maps are closed when the object (and its Lists and Dicts) are
+garbage collected -- or use a LazyFile to close them when you're done:
+
+    with lazy.LazyFile("donors.json") as lazy_file:
+        db = lazy_file.load()
+        ...
+
+(once it's closed, items that haven't been used can't be decoded)
+
+Lists and Dicts with more than min_items items are indexed -- smaller
+ones are decoded all at once with the object they are in.
+
+The index file is binary (little-endian):
+
+    MAGIC
+
+    tables -- one for each indexed List or Dict:
+
+        kind ('l' or 'm'), key_not_string flag, count, number of slots
+        entries -- for a List: start, end, node
+                   for a Dict: key hash, key start, start, end, node
+        slots (Dicts only) -- entry number + 1 for each slot, 0 if empty
+
+    nodes -- one for each saved object with an indexed attribute:
+
+        start, end, number of attributes, class name
+        for each attribute: name, start, end, table (-1 if not indexed)
+
+    footer: the root node, and the size of the JSON file
+
+The "node" of an item is -1 if it's decoded all at once.
+"""
+
+import ast
+import abc
+import json
+import mmap
+import struct
+import zlib
+from array import array
+from collections.abc import MutableMapping, MutableSequence
+from operator import index as as_index
+from pathlib import Path
+
+from .saveables import Saveable, List, Dict
+from .streaming import _JsonWriter, is_walkable, object_hook
+from . import streaming
+from . import codegen
+
+MAGIC = b"JSAVEX1\n"
+INDEX_SUFFIX = ".index"
+
+NO_NODE = -1
+NO_TABLE = -1
+
+TABLE_HEADER = struct.Struct("<ccqq")
+LIST_ENTRY = struct.Struct("<qqq")
+DICT_ENTRY = struct.Struct("<qqqqq")
+SLOT = struct.Struct("<q")
+NODE_HEADER = struct.Struct("<qqI")
+ATTRIBUTE = struct.Struct("<qqq")
+LENGTH = struct.Struct("<I")
+FOOTER = struct.Struct("<qq")
+
+
+def index_filename(filename):
+    """
+    the name of the index file for a JSON file
+    """
+    filename = Path(filename)
+    return filename.with_name(filename.name + INDEX_SUFFIX)
+
+
+def key_hash(key_json):
+    """
+    the hash of a key, as it is in the JSON -- python's hash() of a
+    string isn't the same from one run to the next
+    """
+    return zlib.crc32(key_json)
+
+
+def _string(value):
+    data = value.encode("utf-8")
+    return LENGTH.pack(len(data)) + data
+
+
+class _IndexWriter(_JsonWriter):
+    """
+    writes the JSON for an object, and the index of where things are
+    in it
+
+    The pieces of JSON are written out as soon as they are generated,
+    so self.pos is always where the next piece will go.
+    """
+
+    def __init__(self, outfile, index_file, indent, min_items):
+        # objects with a List or Dict bigger than min_items are walked
+        # attribute by attribute -- and those are the ones to index
+        super().__init__(indent, max_items=min_items)
+        self.outfile = outfile
+        self.index_file = index_file
+        self.pos = 0
+        self.index_pos = 0
+        # the node of the last object written -- NO_NODE if it wasn't
+        # walked
+        self.node = NO_NODE
+        self.write_index(MAGIC)
+
+    def write(self, obj, buffer_size=1000):
+        if is_walkable(obj):
+            pieces = self.object(obj, 0)
+        else:
+            pieces = self.plain(obj.to_json_compat(), 0)
+        buffer = []
+        for piece in pieces:
+            data = piece.encode("utf-8")
+            self.pos += len(data)
+            buffer.append(data)
+            if len(buffer) >= buffer_size:
+                self.outfile.write(b"".join(buffer))
+                buffer.clear()
+        self.outfile.write(b"".join(buffer))
+        self.write_index(FOOTER.pack(self.node, self.pos))
+
+    def write_index(self, data):
+        """
+        add to the index file -- returns where it was put
+        """
+        offset = self.index_pos
+        self.index_file.write(data)
+        self.index_pos += len(data)
+        return offset
+
+    def object(self, obj, level):
+        start = self.pos
+        attrs = []
+        entries = [self.entry("__obj_type",
+                              self.plain(type(obj).__qualname__, level + 1))]
+        for attr, typ in obj._attrs_to_save.items():
+            entries.append(self.entry(attr, self.indexed_attribute(
+                attrs, attr, typ, getattr(obj, attr), level + 1)))
+        yield from self.container("{}", entries, level)
+
+        # the attributes have all been written now
+        node = [NODE_HEADER.pack(start, self.pos, len(attrs)),
+                _string(type(obj).__qualname__)]
+        for attr, attr_start, attr_end, table in attrs:
+            node.append(_string(attr))
+            node.append(ATTRIBUTE.pack(attr_start, attr_end, table))
+        self.node = self.write_index(b"".join(node))
+
+    def indexed_attribute(self, attrs, attr, typ, value, level):
+        """
+        an attribute of a walked object -- with an index of its items
+        if it's a big List or Dict
+
+        appends (attr, start, end, table) to attrs
+        """
+        start = self.pos
+        table = NO_TABLE
+        if isinstance(typ, List) and len(value) > self.max_items:
+            entries = array('q')
+            items = (self.indexed_item(entries, item, level + 1)
+                     for item in value)
+            yield from self.container("[]", items, level)
+            table = self.write_table(b"l", False, entries)
+        elif isinstance(typ, Dict) and len(value) > self.max_items:
+            entries = array('q')
+            key_not_string = []
+            items = (self.indexed_entry(entries, key_not_string,
+                                        key, item, level + 1)
+                     for key, item in Dict.json_items(value))
+            yield from self.container("{}", items, level)
+            table = self.write_table(b"m", bool(key_not_string), entries)
+        else:
+            yield from self.attribute(typ, value, level)
+        attrs.append((attr, start, self.pos, table))
+
+    def indexed_item(self, entries, item, level):
+        self.node = NO_NODE
+        start = self.pos
+        yield from self.item(item, level)
+        entries.extend((start, self.pos, self.node))
+
+    def indexed_entry(self, entries, key_not_string, key, item, level):
+        key_json = self.encode(key)
+        if key == "__key_not_string":
+            # the flag for the keys -- not an item
+            key_not_string.append(True)
+            yield key_json + ": " + self.encode(item)
+            return
+        key_start = self.pos
+        yield key_json + ": "
+        self.node = NO_NODE
+        start = self.pos
+        yield from self.item(item, level)
+        entries.extend((key_hash(key_json.encode("utf-8")), key_start,
+                        start, self.pos, self.node))
+
+    def write_table(self, kind, key_not_string, entries):
+        if kind == b"l":
+            count = len(entries) // 3
+            slots = array('q')
+        else:
+            count = len(entries) // 5
+            # a hash table, half empty, so a key is found quickly
+            slots = array('q', bytes(SLOT.size * 2 * count))
+            num_slots = len(slots)
+            for i in range(count):
+                slot = entries[i * 5] % num_slots
+                while slots[slot]:
+                    slot = (slot + 1) % num_slots
+                slots[slot] = i + 1
+        header = TABLE_HEADER.pack(kind, b"\1" if key_not_string else b"\0",
+                                   count, len(slots))
+        offset = self.write_index(header)
+        self.write_index(self._little_endian(entries))
+        self.write_index(self._little_endian(slots))
+        return offset
+
+    @staticmethod
+    def _little_endian(numbers):
+        if struct.pack("=q", 1) != struct.pack("<q", 1):
+            numbers.byteswap()
+        return numbers.tobytes()
+
+
+def dump(obj, filename, indent=4, min_items=100):
+    """
+    save a saveable object as JSON, with an index next to it, so it can
+    be loaded lazily by load()
+
+    :param filename: the file to write the JSON to -- the index goes in
+                     filename + ".index"
+
+    :param indent=4: the indentation, as for json.dump
+
+    :param min_items=100: Lists and Dicts with more items than this are
+                          indexed
+    """
+    with open(filename, 'wb') as outfile, \
+            open(index_filename(filename), 'wb') as index_file:
+        _IndexWriter(outfile, index_file, indent, min_items).write(obj)
+
+
+class LazyFile:
+    """
+    a JSON file written by dump(), and its index -- both memory mapped
+
+    It can be used as a context manager, to close them at the end.
+    """
+
+    def __init__(self, filename):
+        self.doc = self._map(filename)
+        self.index = self._map(index_filename(filename))
+        if self.index[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{filename} doesn't have a json_save index")
+        self.root, size = FOOTER.unpack_from(self.index,
+                                             len(self.index) - FOOTER.size)
+        if size != len(self.doc):
+            raise ValueError(f"the index for {filename} is out of date")
+
+    @staticmethod
+    def _map(filename):
+        with open(filename, 'rb') as infile:
+            return mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def load(self):
+        """
+        the saved object, with proxies for its big Lists and Dicts
+        """
+        if self.root == NO_NODE:
+            # there was nothing big enough to index
+            return self.decode(0, len(self.doc))
+        return self.object(self.root)
+
+    @property
+    def closed(self):
+        return self.doc.closed
+
+    def close(self):
+        """
+        close the memory maps -- any items not used yet can't be loaded
+        """
+        self.doc.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read_string(self, offset):
+        (length,) = LENGTH.unpack_from(self.index, offset)
+        offset += LENGTH.size
+        return str(self.index[offset:offset + length], "utf-8"), offset + length
+
+    def decode(self, start, end):
+        return json.loads(self.doc[start:end], object_hook=object_hook)
+
+    def value(self, start, end, node):
+        """
+        an item in a List or Dict
+        """
+        if node == NO_NODE:
+            return self.decode(start, end)
+        return self.object(node)
+
+    def object(self, node):
+        """
+        re-create a saved object, with proxies for its big Lists and Dicts
+        """
+        start, end, num_attrs = NODE_HEADER.unpack_from(self.index, node)
+        name, offset = self.read_string(node + NODE_HEADER.size)
+        cls = Saveable.ALL_SAVEABLES[name]
+        if not codegen.is_standard(cls.from_json_dict):
+            # it was written by hand, so it has to be given the whole dict
+            return self.decode(start, end)
+        obj = cls.__new__(cls)
+        for _ in range(num_attrs):
+            attr, offset = self.read_string(offset)
+            attr_start, attr_end, table = ATTRIBUTE.unpack_from(self.index,
+                                                                offset)
+            offset += ATTRIBUTE.size
+            if table == NO_TABLE:
+                value = cls._attrs_to_save[attr].to_python(
+                    self.decode(attr_start, attr_end))
+            elif self.index[table:table + 1] == b"l":
+                value = LazyList(self, table)
+            else:
+                value = LazyDict(self, table)
+            setattr(obj, attr, value)
+        return obj
+
+
+class _LazyContainer(abc.ABC):
+    """
+    what LazyList and LazyDict have in common
+
+    The items are decoded the first time they are asked for, and kept,
+    so the same object is returned every time. When it is changed, all
+    the items are decoded into a regular list or dict, which is used
+    from then on.
+    """
+
+    def __init__(self, lazy_file, table):
+        self._file = lazy_file
+        kind, key_not_string, self._count, self._num_slots = \
+            TABLE_HEADER.unpack_from(lazy_file.index, table)
+        self._key_not_string = key_not_string == b"\1"
+        self._entries = table + TABLE_HEADER.size
+        self._loaded = {}
+        self._items = None
+
+    def __len__(self):
+        if self._items is not None:
+            return len(self._items)
+        return self._count
+
+    def __repr__(self):
+        if self._items is not None:
+            return repr(self._items)
+        return (f"<{type(self).__name__}: {self._count} items, "
+                f"{len(self._loaded)} loaded>")
+
+    def _load(self, key, entry):
+        try:
+            return self._loaded[key]
+        except KeyError:
+            item = self._loaded[key] = self._file.value(*entry)
+            return item
+
+    @abc.abstractmethod
+    def _all_items(self):
+        """
+        switch to a regular container, with all the items in it
+        """
+
+
+class LazyList(_LazyContainer, MutableSequence):
+    """
+    a List attribute loaded by load() -- each item is decoded the first
+    time it's used
+    """
+
+    def _entry(self, i):
+        return LIST_ENTRY.unpack_from(self._file.index,
+                                      self._entries + i * LIST_ENTRY.size)
+
+    def __getitem__(self, i):
+        if self._items is not None:
+            return self._items[i]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        i = as_index(i)
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("list index out of range")
+        return self._load(i, self._entry(i))
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        return (self[i] for i in range(self._count))
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyList)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def _all_items(self):
+        if self._items is None:
+            self._items = list(self)
+            # the file isn't needed any more
+            self._loaded = self._file = None
+        return self._items
+
+    def __setitem__(self, i, value):
+        self._all_items()[i] = value
+
+    def __delitem__(self, i):
+        del self._all_items()[i]
+
+    def insert(self, i, value):
+        self._all_items().insert(i, value)
+
+
+class LazyDict(_LazyContainer, MutableMapping):
+    """
+    a Dict attribute loaded by load() -- each item is decoded the first
+    time it's used, and found with the hash table in the index
+    """
+
+    def _entry(self, i):
+        return DICT_ENTRY.unpack_from(self._file.index,
+                                      self._entries + i * DICT_ENTRY.size)
+
+    def _find(self, key):
+        """
+        the (start, end, node) of the item for key -- None if it's not there
+        """
+        if self._key_not_string:
+            if type(key) is str:
+                return None
+            key = repr(key)
+        elif type(key) is not str:
+            return None
+        key_json = json.dumps(key).encode("utf-8")
+        hsh = key_hash(key_json)
+        index, doc = self._file.index, self._file.doc
+        slots = self._entries + self._count * DICT_ENTRY.size
+        slot = hsh % self._num_slots
+        while True:
+            (i,) = SLOT.unpack_from(index, slots + slot * SLOT.size)
+            if not i:
+                return None
+            entry_hash, key_start, start, end, node = self._entry(i - 1)
+            if (entry_hash == hsh
+                    and doc[key_start:start - 2] == key_json):
+                return start, end, node
+            slot = (slot + 1) % self._num_slots
+
+    def __getitem__(self, key):
+        if self._items is not None:
+            return self._items[key]
+        try:
+            return self._loaded[key]
+        except (KeyError, TypeError):
+            pass
+        entry = self._find(key)
+        if entry is None:
+            raise KeyError(key)
+        return self._load(key, entry)
+
+    def __contains__(self, key):
+        if self._items is not None:
+            return key in self._items
+        return key in self._loaded or self._find(key) is not None
+
+    def __iter__(self):
+        if self._items is not None:
+            yield from self._items
+            return
+        doc = self._file.doc
+        for i in range(self._count):
+            _, key_start, start, _, _ = self._entry(i)
+            key = json.loads(doc[key_start:start - 2])
+            if self._key_not_string:
+                key = ast.literal_eval(key)
+            yield key
+
+    def _all_items(self):
+        if self._items is None:
+            self._items = dict(self.items())
+            self._loaded = self._file = None
+        return self._items
+
+    def __setitem__(self, key, value):
+        self._all_items()[key] = value
+
+    def __delitem__(self, key):
+        del self._all_items()[key]
+
+
+def load(filename):
+    """
+    load an object saved by dump(), without decoding the items in its
+    big Lists and Dicts until they are used
+
+    If there's no index (it wasn't saved by dump()), the whole object
+    is loaded.
+
+    :param filename: the JSON file -- the index is filename + ".index"
+    """
+    if not index_filename(filename).exists():
+        with open(filename, encoding="utf-8") as infile:
+            return streaming.load(infile)
+    return LazyFile(filename).load()
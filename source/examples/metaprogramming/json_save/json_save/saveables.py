@@ -104,6 +104,37 @@ class Float(Saveable):
 
 # Container types: these need to hold  Saveable objects.
 
+# the types that are the same in JSON and Python
+JSON_TYPES = {str, int, float, bool, type(None)}
+
+
+def item_to_json_compat(item):
+    """
+    returns a json-compatible version of an item in a container
+
+    Saveable objects have a to_json_compat method, anything else is
+    assumed to be json-compatible already.
+    """
+    to_json_compat = getattr(item, "to_json_compat", None)
+    if to_json_compat is None:
+        return item
+    return to_json_compat()
+
+
+def item_to_python(item):
+    """
+    converts an item in a container back to python
+
+    A dict with a "__obj_type" key is a saved object -- anything else is
+    left as it is.
+    """
+    if isinstance(item, dict) and "__obj_type" in item:
+        cls = Saveable.ALL_SAVEABLES.get(item["__obj_type"])
+        if cls is not None:
+            return cls.from_json_dict(item)
+    return item
+
+
 
 class Tuple(Saveable):
     """
@@ -131,13 +162,11 @@ class List(Saveable):
 
     @staticmethod
     def to_json_compat(val):
-        lst = []
-        for item in val:
-            try:
-                lst.append(item.to_json_compat())
-            except AttributeError:
-                lst.append(item)
-        return lst
+        # most items are usually all one type, so checking the type is a
+        # lot faster than trying item.to_json_compat() and catching the
+        # AttributeError for every plain number or string
+        return [item if type(item) in JSON_TYPES else item_to_json_compat(item)
+                for item in val]
 
     @staticmethod
     def to_python(val):
@@ -147,15 +176,8 @@ class List(Saveable):
         Complicated because list may contain non-json-compatible objects
         """
         # try to reconstitute using the obj method
-        new_list = []
-        for item in val:
-            try:
-                obj_type = item["__obj_type"]
-                obj = Saveable.ALL_SAVEABLES[obj_type].from_json_dict(item)
-                new_list.append(obj)
-            except (TypeError, KeyError):
-                new_list.append(item)
-        return new_list
+        return [item if type(item) in JSON_TYPES else item_to_python(item)
+                for item in val]
 
 
 class Dict(Saveable):
@@ -168,12 +190,24 @@ class Dict(Saveable):
 
     @staticmethod
     def to_json_compat(val):
-        d = {}
+        return {key: item_to_json_compat(item)
+                for key, item in Dict.json_items(val)}
+
+    @staticmethod
+    def json_items(val):
+        """
+        yields the (key, item) pairs to save for a dict
+
+        The keys are converted to strings if need be -- the items are not
+        converted, so they can be saved one by one.
+        """
+        if not val:
+            return
         # first key, arbitrarily
         key_type = type(next(iter(val.keys())))
         if key_type is not str:
             # need to add key_type to json
-            d['__key_not_string'] = True
+            yield '__key_not_string', True
             key_not_string = True
         else:
             key_not_string = False
@@ -189,11 +223,7 @@ class Dict(Saveable):
                     raise ValueError(f"json save cannot save dicts with key:{key}")
             else:
                 s_key = key
-            try:
-                d[s_key] = item.to_json_compat()
-            except AttributeError:
-                d[s_key] = item
-        return d
+            yield s_key, item
 
     @staticmethod
     def to_python(val):
@@ -209,10 +239,5 @@ class Dict(Saveable):
         for key, item in val.items():
             if key_not_string:
                 key = ast.literal_eval(key)
-            try:
-                obj_type = item["__obj_type"]
-                obj = Saveable.ALL_SAVEABLES[obj_type].from_json_dict(item)
-                new_dict[key] = obj
-            except (KeyError, TypeError):
-                new_dict[key] = item
+            new_dict[key] = item_to_python(item)
         return new_dict
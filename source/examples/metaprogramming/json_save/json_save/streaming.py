@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+
+"""
+Saving and loading big objects without a whole extra copy in memory
+
+to_json_compat() builds a json-compatible copy of the whole object,
+which json.dump() then writes out -- so saving a big object needs memory
+for the object, plus the copy, plus the JSON. And json.load() reads
+the whole file, and builds all the dicts, before any of the objects are
+re-created.
+
+dump() here walks the object, writing the JSON a piece at a time as it
+goes -- the output is exactly the same as json.dump(obj.to_json_compat()).
+Small objects (with no more than max_items in each List or Dict) are
+converted and written all in one go, as that's faster.
+
+load() reads the file a chunk at a time, and re-creates each saved
+object as soon as its JSON is complete -- so the dicts for the objects
+don't pile up. Small values (up to max_value_size characters of JSON)
+are decoded in one go by the json module, which is fast; only the big
+ones are taken apart here, a piece at a time.
+
+Both are slower than the json module doing it all at once, so they are
+only used by to_json() and from_json() when asked, with stream=True.
+"""
+
+import json
+import re
+
+from .saveables import Saveable, List, Dict, JSON_TYPES, item_to_json_compat
+from . import codegen
+
+
+def is_walkable(obj):
+    """
+    can the object be saved attribute by attribute?
+
+    It has to be a saveable object, with a standard to_json_compat
+    -- if it was written by hand, it has to be called.
+    """
+    return (hasattr(type(obj), "_attrs_to_save")
+            and codegen.is_standard(type(obj).to_json_compat))
+
+
+class _JsonWriter:
+    """
+    generates the JSON for an object a piece at a time
+    """
+
+    def __init__(self, indent, max_items):
+        if isinstance(indent, int):
+            indent = " " * indent
+        self.indent = indent
+        # the same separators json uses
+        self.item_separator = ", " if indent is None else ","
+        self.max_items = max_items
+        # json.dumps() makes a new encoder every time it's given an indent
+        self.encode = json.JSONEncoder(indent=indent).encode
+        self.containers = {}  # class: its List and Dict attributes
+
+    def is_big(self, obj):
+        """
+        does the object have a List or Dict with more than max_items in it?
+
+        If not, it's faster to do it all at once, and doesn't take much
+        memory.
+        """
+        cls = type(obj)
+        try:
+            containers = self.containers[cls]
+        except KeyError:
+            containers = self.containers[cls] = [
+                attr for attr, typ in cls._attrs_to_save.items()
+                if isinstance(typ, (List, Dict))]
+        return any(len(getattr(obj, attr)) > self.max_items
+                   for attr in containers)
+
+    def newline(self, level):
+        if self.indent is None:
+            return ""
+        return "\n" + self.indent * level
+
+    def plain(self, value, level):
+        """
+        a value with no saveable objects in it -- so json can do it
+        """
+        text = self.encode(value)
+        if self.indent is not None and level:
+            text = text.replace("\n", self.newline(level))
+        yield text
+
+    def item(self, item, level):
+        """
+        an item in a List or Dict -- that may be a saveable object
+        """
+        if type(item) in JSON_TYPES:
+            yield self.encode(item)
+        elif is_walkable(item) and self.is_big(item):
+            yield from self.object(item, level)
+        else:
+            yield from self.plain(item_to_json_compat(item), level)
+
+    def container(self, brackets, entries, level):
+        """
+        a JSON array or object
+
+        :param brackets: "[]" or "{}"
+
+        :param entries: iterable of generators, one for each entry
+        """
+        separator = self.newline(level + 1)
+        empty = True
+        yield brackets[0]
+        for entry in entries:
+            yield separator
+            yield from entry
+            if empty:
+                separator = self.item_separator + separator
+                empty = False
+        if not empty:
+            yield self.newline(level)
+        yield brackets[1]
+
+    def entry(self, key, pieces):
+        yield self.encode(key) + ": "
+        yield from pieces
+
+    def object(self, obj, level):
+        """
+        a saveable object -- an attribute at a time
+        """
+        entries = [self.entry("__obj_type",
+                              self.plain(type(obj).__qualname__, level + 1))]
+        for attr, typ in obj._attrs_to_save.items():
+            entries.append(self.entry(attr, self.attribute(
+                typ, getattr(obj, attr), level + 1)))
+        yield from self.container("{}", entries, level)
+
+    def attribute(self, typ, value, level):
+        if isinstance(typ, List):
+            items = (self.item(item, level + 1) for item in value)
+            yield from self.container("[]", items, level)
+        elif isinstance(typ, Dict):
+            items = (self.entry(key, self.item(item, level + 1))
+                     for key, item in Dict.json_items(value))
+            yield from self.container("{}", items, level)
+        else:
+            yield from self.plain(typ.to_json_compat(value), level)
+
+
+def iter_json(obj, indent=None, max_items=100):
+    """
+    yields the JSON for a saveable object, a piece at a time
+
+    Joined together, the pieces are the same as:
+
+        json.dumps(obj.to_json_compat(), indent=indent)
+
+    :param indent=None: the indentation, as for json.dumps
+
+    :param max_items=100: objects with no more than this many items in
+                          each List or Dict are saved all at once
+    """
+    writer = _JsonWriter(indent, max_items)
+    if is_walkable(obj):
+        return writer.object(obj, 0)
+    return writer.plain(obj.to_json_compat(), 0)
+
+
+def dump(obj, fp, indent=4, buffer_size=1000, max_items=100):
+    """
+    write a saveable object to an open file as JSON, without making a
+    json-compatible copy of it first
+
+    :param indent=4: the indentation, as for json.dump
+
+    :param max_items=100: objects with no more than this many items in
+                          each List or Dict are saved all at once
+
+    :param buffer_size=1000: the number of pieces to join up before
+                             writing them
+    """
+    pieces = []
+    for piece in iter_json(obj, indent, max_items):
+        pieces.append(piece)
+        if len(pieces) >= buffer_size:
+            fp.write("".join(pieces))
+            pieces.clear()
+    fp.write("".join(pieces))
+
+
+def dumps(obj, indent=4, max_items=100):
+    """
+    the JSON for a saveable object, as a string
+
+    the same as obj.to_json(), but without the json-compatible copy
+    """
+    return "".join(iter_json(obj, indent, max_items))
+
+
+def object_hook(dic):
+    """
+    re-create a saved object from its dict -- anything else is left as is
+    """
+    cls = Saveable.ALL_SAVEABLES.get(dic.get("__obj_type"))
+    if cls is None:
+        return dic
+    return cls.from_json_dict(dic)
+
+
+WHITESPACE = re.compile(r"\s*")
+# the characters a number can have in it, after the first digit
+NUMBER_CHARS = "0123456789.eE+-"
+
+# returned by _JsonReader.value() when the value is too big to decode all
+# at once
+_DESCEND = object()
+
+
+class _JsonReader:
+    """
+    reads JSON from a file a chunk at a time
+    """
+
+    def __init__(self, fp, chunk_size, max_value_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder(object_hook=object_hook)
+
+    def error(self, msg):
+        return json.JSONDecodeError(msg, self.buffer, self.pos)
+
+    def read_more(self):
+        """
+        add another chunk to the buffer -- dropping what's been used
+        """
+        # read at least as much as is there, so a big value that takes
+        # a few tries to decode doesn't get decoded too many times.
+        unused = self.buffer[self.pos:]
+        data = self.fp.read(max(self.chunk_size, len(unused)))
+        if not data:
+            self.eof = True
+        self.buffer = unused + data
+        self.pos = 0
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return
+            self.read_more()
+
+    def peek(self):
+        self.skip_whitespace()
+        return self.buffer[self.pos:self.pos + 1]
+
+    def take(self):
+        char = self.peek()
+        if not char:
+            raise self.error("Unexpected end of JSON")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        decode the next value, if it's not too big
+
+        returns _DESCEND if it is -- the caller then needs to take it
+        apart a piece at a time
+        """
+        while True:
+            self.skip_whitespace()
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                if (len(self.buffer) - self.pos >= self.max_value_size
+                        and self.buffer[self.pos] in "{["):
+                    return _DESCEND
+                self.read_more()
+                continue
+            if (not self.eof and (end == len(self.buffer)
+                                  or self.buffer[end] in NUMBER_CHARS)):
+                # a number might carry on in the next chunk -- like
+                # "1." being read as 1, when it's really 1.5
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+    def key(self):
+        """
+        read a key in an object, and the colon after it
+        """
+        while True:
+            if self.take() != '"':
+                raise self.error("Expecting property name enclosed in "
+                                 "double quotes")
+            try:
+                key, self.pos = json.decoder.scanstring(self.buffer, self.pos)
+                break
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.pos -= 1  # back to the quote
+                self.read_more()
+        if self.take() != ":":
+            raise self.error("Expecting ':' delimiter")
+        return key
+
+    def load(self):
+        """
+        read the whole document
+        """
+        # the arrays and objects that are being read: [container, key]
+        # the key is None for an array
+        stack = []
+        while True:
+            value = self.value()
+            if value is _DESCEND:
+                opener = self.take()
+                frame = [{} if opener == "{" else [], None]
+                stack.append(frame)
+                if self.peek() not in "}]":
+                    if opener == "{":
+                        frame[1] = self.key()
+                    continue
+                # it's empty
+                if self.take() != ("}" if opener == "{" else "]"):
+                    raise self.error("Mismatched brackets")
+                value = self.close(stack.pop())
+            # the value is complete -- put it in its container
+            while stack:
+                frame = stack[-1]
+                container, key = frame
+                if key is None:
+                    container.append(value)
+                else:
+                    container[key] = value
+                char = self.take()
+                if char == ",":
+                    if key is not None:
+                        frame[1] = self.key()
+                    break
+                elif char == ("]" if key is None else "}"):
+                    value = self.close(stack.pop())
+                else:
+                    raise self.error("Expecting ',' delimiter")
+            else:
+                return value
+
+    def close(self, frame):
+        container = frame[0]
+        if isinstance(container, dict):
+            return object_hook(container)
+        return container
+
+
+def load(fp, chunk_size=65536, max_value_size=1 << 20):
+    """
+    load a saved object (or objects) from an open JSON file, re-creating
+    each object as soon as it has been read
+
+    :param fp: an open (text) file
+
+    :param chunk_size=65536: how much of the file to read at a time
+
+    :param max_value_size=1 << 20: values with more JSON than this are
+                                   read a piece at a time -- smaller ones
+                                   are decoded all at once
+    """
+    return _JsonReader(fp, chunk_size, max_value_size).load()
+
+
+def loads(text):
+    """
+    load a saved object (or objects) from a JSON string
+    """
+    return json.loads(text, object_hook=object_hook)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+"""
+tests for the binary format, and choosing a codec
+"""
+
+import io
+import json
+
+import pytest
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import binary, codec
+
+
+class BinSimple(js.JsonSaveable):
+    a = js.Int()
+    b = js.Float()
+    name = js.String()
+    flag = js.Bool()
+
+
+class BinContainer(js.JsonSaveable):
+    x = js.Int()
+    lst = js.List()
+    d = js.Dict()
+    t = js.Tuple()
+
+
+class BinHandWritten(js.JsonSaveable):
+    x = js.Int()
+
+    def to_json_compat(self):
+        return {"__obj_type": "BinHandWritten", "x": self.x}
+
+
+@jsd.json_save
+class BinDecSimple:
+    a = js.Int()
+    lst = js.List()
+
+
+def simple(a, b, name, flag=False):
+    obj = BinSimple()
+    obj.a, obj.b, obj.name, obj.flag = a, b, name, flag
+    return obj
+
+
+def container(x, lst, d, t=()):
+    obj = BinContainer()
+    obj.x, obj.lst, obj.d, obj.t = x, lst, d, t
+    return obj
+
+
+@pytest.fixture
+def nested():
+    hand = BinHandWritten()
+    hand.x = 5
+    lst = [1, 2.5, "a string é", None, True, False, 2 ** 70, -3,
+           [1, 2, 3], [1.5, 2.5], [1, 2.5], [True, False], [],
+           {"plain": [4]}, simple(1, 2.0, "one", True), hand]
+    d = {"this": simple(3, 4.5, "this"), "that": 12}
+    inner = container(2, [simple(5, 1.5, "five")], {3: simple(3, 0.5, "")})
+    return container(34, lst + [inner], d, (1, 2))
+
+
+def test_round_trip(nested):
+    data = binary.dumps(nested)
+
+    assert isinstance(data, bytes)
+    assert binary.loads(data) == nested
+
+
+def test_same_as_json(nested):
+    from_binary = binary.loads(binary.dumps(nested))
+    from_json = js.from_json(nested.to_json())
+
+    assert from_binary == from_json
+    assert from_binary.to_json() == nested.to_json()
+
+
+def test_types_kept(nested):
+    obj = binary.loads(binary.dumps(nested))
+
+    assert [type(item) for item in obj.lst[:8]] == [type(item) for item
+                                                    in nested.lst[:8]]
+    assert obj.lst[7] == -3
+    assert obj.lst[6] == 2 ** 70
+    assert type(obj.t) is tuple
+    assert type(obj.lst[-1].d[3]) is BinSimple
+
+
+@pytest.mark.parametrize("values", [[1.5, 2.25, -3.0],
+                                    list(range(-5, 5)),
+                                    [2 ** 63 - 1, -2 ** 63]])
+def test_packed_array(values):
+    obj = container(1, values, {})
+
+    data = binary.dumps(obj)
+    empty = binary.dumps(container(1, [], {}))
+
+    # packed: 8 bytes a number, plus the typecode
+    assert len(data) == len(empty) + 8 * len(values) + 1
+    obj2 = binary.loads(data)
+    assert obj2.lst == values
+    assert [type(v) for v in obj2.lst] == [type(v) for v in values]
+
+
+def test_class_names_once():
+    obj = container(1, [simple(i, 1.0, "") for i in range(10)], {})
+
+    data = binary.dumps(obj)
+
+    assert data.count(b"BinSimple") == 1
+
+
+def test_smaller_than_json():
+    obj = container(1, [i * 0.1 for i in range(1000)], {})
+
+    assert len(binary.dumps(obj)) < len(obj.to_json(indent=None))
+
+
+def test_decorator():
+    obj = BinDecSimple()
+    obj.a = 4
+    obj.lst = [BinDecSimple(), 3]
+
+    assert binary.loads(binary.dumps(obj)) == obj
+
+
+def test_bad_data():
+    with pytest.raises(ValueError):
+        binary.loads(b"not binary json_save data")
+    with pytest.raises(ValueError):
+        binary.loads(binary.MAGIC + b"X")
+
+
+def test_not_saveable():
+    with pytest.raises(TypeError):
+        binary.dumps(container(1, [{1, 2}], {}))
+
+
+@pytest.mark.parametrize("name, file_type", [("json", io.StringIO),
+                                             ("binary", io.BytesIO)])
+def test_codec(nested, name, file_type):
+    outfile = file_type()
+    codec.dump(nested, outfile, codec=name)
+    outfile.seek(0)
+
+    assert codec.load(outfile, codec=name) == nested
+    assert codec.loads(codec.dumps(nested, codec=name), codec=name) == nested
+
+
+def test_json_codec_is_json(nested):
+    assert json.loads(codec.dumps(nested)) == json.loads(nested.to_json())
+
+
+def test_unknown_codec(nested):
+    with pytest.raises(ValueError):
+        codec.dumps(nested, codec="yaml")
+
+
+def test_register_codec(nested):
+    class MemoryCodec:
+        saved = []
+
+        def dumps(self, obj):
+            self.saved.append(obj)
+            return str(len(self.saved) - 1)
+
+        def loads(self, data):
+            return self.saved[int(data)]
+
+        def dump(self, obj, fp):
+            fp.write(self.dumps(obj))
+
+        def load(self, fp):
+            return self.loads(fp.read())
+
+    codec.register_codec("memory", MemoryCodec())
+    try:
+        assert codec.loads(codec.dumps(nested, "memory"), "memory") is nested
+    finally:
+        del codec.CODECS["memory"]
+
+    with pytest.raises(TypeError):
+        codec.register_codec("bad", object())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""
+tests for the generated to_json_compat and from_json_dict methods
+"""
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import codegen
+
+
+class Inner(js.JsonSaveable):
+    x = js.Int()
+
+
+class Compiled(js.JsonSaveable):
+    a = js.Int()
+    b = js.Float()
+    name = js.String()
+    lst = js.List()
+    d = js.Dict()
+
+
+class NotCompiled(js.JsonSaveable, compiled=False):
+    a = js.Int()
+    b = js.Float()
+    name = js.String()
+    lst = js.List()
+    d = js.Dict()
+
+
+class HandWritten(js.JsonSaveable):
+    x = js.Int()
+
+    def to_json_compat(self):
+        return {"__obj_type": "HandWritten", "x": self.x * 2}
+
+
+class SubHandWritten(HandWritten):
+    y = js.Int()
+
+
+@jsd.json_save
+class DecCompiled:
+    a = js.Int()
+    lst = js.List()
+
+
+@jsd.json_save(compiled=False)
+class DecNotCompiled:
+    a = js.Int()
+    lst = js.List()
+
+
+def fill(obj):
+    obj.a = 3
+    obj.b = 4.5
+    obj.name = "fred"
+    obj.lst = [1, 2.5, "this", None, [3, 4], Inner()]
+    obj.d = {"this": 1, "that": Inner()}
+    return obj
+
+
+def test_can_compile():
+    assert codegen.can_compile(["a", "b_c", "_d"])
+    assert not codegen.can_compile(["a", "b-c"])
+    assert not codegen.can_compile(["a", "class"])
+
+
+def test_generated():
+    assert codegen.is_generated(Compiled.to_json_compat)
+    assert codegen.is_generated(Compiled.from_json_dict)
+    assert not codegen.is_generated(NotCompiled.to_json_compat)
+    assert not codegen.is_generated(NotCompiled.from_json_dict)
+
+
+def test_same_as_not_compiled():
+    compat = fill(Compiled()).to_json_compat()
+    not_compat = fill(NotCompiled()).to_json_compat()
+    not_compat["__obj_type"] = "Compiled"
+
+    assert compat == not_compat
+
+
+def test_round_trip():
+    obj = fill(Compiled())
+
+    obj2 = Compiled.from_json_dict(obj.to_json_compat())
+
+    assert obj2 == obj
+    assert type(obj2.a) is int
+    assert type(obj2.lst[-1]) is Inner
+
+
+def test_converts_numbers():
+    obj = Compiled.from_json_dict({"a": 3.0, "b": 4, "name": "",
+                                   "lst": [], "d": {}})
+
+    assert type(obj.a) is int
+    assert type(obj.b) is float
+
+
+def test_hand_written_kept():
+    assert not codegen.is_generated(HandWritten.to_json_compat)
+    obj = HandWritten()
+    obj.x = 3
+    assert obj.to_json_compat()["x"] == 6
+    # inherited
+    obj = SubHandWritten()
+    obj.x = 3
+    assert obj.to_json_compat()["x"] == 6
+    # but from_json_dict can still be generated
+    assert codegen.is_generated(HandWritten.from_json_dict)
+
+
+def test_decorator():
+    obj = DecCompiled()
+    obj.a = 5
+    obj.lst = [DecCompiled(), 3]
+
+    assert codegen.is_generated(DecCompiled.to_json_compat)
+    assert not codegen.is_generated(DecNotCompiled.to_json_compat)
+    assert DecCompiled.from_json_dict(obj.to_json_compat()) == obj
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+
+"""
+tests for lazy loading, with an index next to the JSON
+"""
+
+import json
+
+import pytest
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import lazy, streaming
+
+
+class LazyDonor(js.JsonSaveable):
+    name = js.String()
+    donations = js.List()
+
+
+class LazyDB(js.JsonSaveable):
+    title = js.String()
+    donor_data = js.Dict()
+    history = js.List()
+
+
+class LazyNested(js.JsonSaveable):
+    x = js.Int()
+    dbs = js.List()
+
+
+class LazyHandWritten(js.JsonSaveable):
+    items = js.List()
+
+    @classmethod
+    def from_json_dict(cls, dic):
+        obj = cls()
+        obj.items = [item * 2 for item in dic["items"]]
+        return obj
+
+
+@jsd.json_save
+class LazyDecDB:
+    data = js.Dict()
+
+
+def donor(name, donations):
+    obj = LazyDonor()
+    obj.name = name
+    obj.donations = donations
+    return obj
+
+
+def make_db(num):
+    db = LazyDB()
+    db.title = "The Donors"
+    db.donor_data = {}
+    for i in range(num):
+        name = f"Donor {i} é"
+        db.donor_data[name.lower()] = donor(name, [float(i), 2.5])
+    db.history = list(range(num)) + ["a string", {"a": 1}, None]
+    return db
+
+
+@pytest.fixture
+def saved(tmp_path):
+    db = make_db(50)
+    filename = tmp_path / "db.json"
+    lazy.dump(db, filename, min_items=10)
+    return db, filename
+
+
+def test_same_json(saved):
+    db, filename = saved
+
+    with open(filename) as infile:
+        assert json.load(infile) == db.to_json_compat()
+    assert filename.read_text() == streaming.dumps(db)
+    assert lazy.index_filename(filename).exists()
+
+
+def test_load(saved):
+    db, filename = saved
+
+    db2 = lazy.load(filename)
+
+    assert isinstance(db2.donor_data, lazy.LazyDict)
+    assert isinstance(db2.history, lazy.LazyList)
+    assert db2.title == "The Donors"
+    assert db2 == db
+
+
+def test_from_json_lazy(saved):
+    db, filename = saved
+
+    db2 = js.from_json(filename, lazy=True)
+
+    assert isinstance(db2.donor_data, lazy.LazyDict)
+    assert db2 == db
+
+
+def test_only_what_is_used(saved):
+    db, filename = saved
+    db2 = lazy.load(filename)
+
+    donor = db2.donor_data["donor 7 é"]
+
+    assert donor == db.donor_data["donor 7 é"]
+    assert len(db2.donor_data._loaded) == 1
+    # the same object every time
+    assert db2.donor_data["donor 7 é"] is donor
+
+
+def test_dict(saved):
+    db, filename = saved
+    donor_data = lazy.load(filename).donor_data
+
+    assert len(donor_data) == 50
+    assert list(donor_data) == list(db.donor_data)
+    assert "donor 3 é" in donor_data
+    assert "not a donor" not in donor_data
+    assert 3 not in donor_data
+    assert donor_data.get("not a donor") is None
+    with pytest.raises(KeyError):
+        donor_data["not a donor"]
+    assert dict(donor_data.items()) == db.donor_data
+
+
+def test_list(saved):
+    db, filename = saved
+    history = lazy.load(filename).history
+
+    assert len(history) == 53
+    assert history[5] == 5
+    assert history[-1] is None
+    assert history[-2] == {"a": 1}
+    assert history[48:51] == [48, 49, "a string"]
+    assert list(history) == db.history
+    assert history == db.history
+    assert db.history == history
+    with pytest.raises(IndexError):
+        history[53]
+
+
+def test_change(saved):
+    db, filename = saved
+    db2 = lazy.load(filename)
+
+    db2.donor_data["new"] = donor("New", [1.0])
+    db2.history.append(7)
+    del db2.history[0]
+
+    assert type(db2.donor_data._items) is dict
+    assert db2.donor_data["new"].name == "New"
+    assert len(db2.donor_data) == 51
+    assert db2.history == db.history[1:] + [7]
+
+
+def test_save_again(saved, tmp_path):
+    db, filename = saved
+    db2 = lazy.load(filename)
+
+    assert js.from_json(db2.to_json()) == db
+    filename2 = tmp_path / "db2.json"
+    lazy.dump(db2, filename2, min_items=10)
+    assert lazy.load(filename2) == db
+
+
+def test_nested(tmp_path):
+    obj = LazyNested()
+    obj.x = 3
+    obj.dbs = [make_db(20), make_db(5)] + list(range(20))
+    filename = tmp_path / "nested.json"
+
+    lazy.dump(obj, filename, min_items=10)
+    obj2 = lazy.load(filename)
+
+    assert isinstance(obj2.dbs, lazy.LazyList)
+    # big enough to be indexed itself
+    assert isinstance(obj2.dbs[0].donor_data, lazy.LazyDict)
+    assert type(obj2.dbs[1].donor_data) is dict
+    assert obj2 == obj
+
+
+def test_not_string_keys(tmp_path):
+    db = LazyDecDB()
+    db.data = {(i, "a"): i * 2 for i in range(20)}
+    filename = tmp_path / "keys.json"
+
+    lazy.dump(db, filename, min_items=10)
+    data = lazy.load(filename).data
+
+    assert data[(3, "a")] == 6
+    assert "(3, 'a')" not in data
+    assert list(data) == list(db.data)
+
+
+def test_hand_written(tmp_path):
+    obj = LazyHandWritten()
+    obj.items = list(range(20))
+    filename = tmp_path / "hand.json"
+
+    lazy.dump(obj, filename, min_items=10)
+
+    assert lazy.load(filename).items == [i * 2 for i in range(20)]
+
+
+def test_small(tmp_path):
+    db = make_db(5)
+    filename = tmp_path / "small.json"
+
+    lazy.dump(db, filename)
+    db2 = lazy.load(filename)
+
+    assert type(db2.donor_data) is dict
+    assert db2 == db
+
+
+def test_no_index(saved):
+    db, filename = saved
+    lazy.index_filename(filename).unlink()
+
+    assert type(lazy.load(filename).donor_data) is dict
+    assert lazy.load(filename) == db
+
+
+def test_out_of_date(saved):
+    db, filename = saved
+    with open(filename, 'a') as outfile:
+        outfile.write("\n")
+
+    with pytest.raises(ValueError):
+        lazy.load(filename)
+
+
+def test_lazy_file(saved):
+    db, filename = saved
+
+    with lazy.LazyFile(filename) as lazy_file:
+        db2 = lazy_file.load()
+        donor = db2.donor_data["donor 7 é"]
+        assert not lazy_file.closed
+    assert lazy_file.closed
+
+    # what was used is still there
+    assert db2.donor_data["donor 7 é"] is donor
+    assert db2.title == "The Donors"
+    with pytest.raises(ValueError):
+        db2.donor_data["donor 8 é"]
+
+
+def test_changed_lets_go(saved):
+    db, filename = saved
+    db2 = lazy.load(filename)
+
+    db2.history.append(7)
+
+    assert db2.history._file is None
+    assert db2.donor_data._file is not None
+
+
+def test_container_is_abstract():
+    with pytest.raises(TypeError):
+        lazy._LazyContainer(None, 0)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+"""
+tests for the __slots__ option
+"""
+
+import io
+import sys
+
+import pytest
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import binary
+
+
+class SlotSimple(js.JsonSaveable, slots=True):
+    a = js.Int()
+    b = js.Float()
+    lst = js.List()
+
+    def __init__(self, a=0, b=0.0, lst=None):
+        self.a = a
+        self.b = b
+        self.lst = [] if lst is None else lst
+
+
+class SlotDefaults(js.JsonSaveable, slots=True):
+    x = js.Int()
+    name = js.String()
+    d = js.Dict()
+
+
+class SlotExtra(js.JsonSaveable, slots=True):
+    __slots__ = ("cache",)
+    x = js.Int()
+
+    def __init__(self, x):
+        self.x = x
+        self.cache = x * 2
+
+
+class SlotNotCompiled(js.JsonSaveable, slots=True, compiled=False):
+    x = js.Int()
+    t = js.Tuple()
+
+
+class SlotSub(SlotSimple, slots=True):
+    c = js.String()
+
+
+class NoSlots(js.JsonSaveable):
+    a = js.Int()
+    b = js.Float()
+    lst = js.List()
+
+
+@jsd.json_save(slots=True)
+class SlotDec:
+    x = js.Int()
+    lst = js.List()
+
+    def __init__(self, x=0, lst=()):
+        self.x = x
+        self.lst = list(lst)
+
+    def double(self):
+        return self.x * 2
+
+
+class DecBase:
+    def __init__(self, x):
+        self.x = x
+
+    def describe(self):
+        return "base"
+
+
+@jsd.json_save(slots=True)
+class SlotDecSuper(DecBase):
+    x = js.Int()
+
+    def __init__(self, x):
+        super().__init__(x)
+
+    def describe(self):
+        return "sub of " + super().describe()
+
+    @property
+    def base_description(self):
+        return super().describe()
+
+    @classmethod
+    def make(cls):
+        return super(__class__, cls).__new__(cls)
+
+
+@jsd.json_save(slots=True, compiled=False)
+class SlotDecNotCompiled:
+    x = js.Int()
+
+
+@pytest.mark.parametrize("cls", [SlotSimple, SlotDefaults, SlotNotCompiled,
+                                 SlotSub, SlotDec, SlotDecNotCompiled])
+def test_no_dict(cls):
+    obj = cls()
+
+    assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        obj.not_an_attribute = 5
+
+
+def test_slots_are_the_attributes():
+    assert SlotSimple.__slots__ == ("a", "b", "lst")
+    assert SlotSub.__slots__ == ("c",)
+    assert SlotExtra.__slots__ == ("x", "cache")
+
+
+def test_defaults():
+    obj = SlotDefaults()
+
+    assert obj.x == 0
+    assert obj.name == ""
+    assert obj.d == {}
+
+
+def test_defaults_not_compiled():
+    obj = SlotNotCompiled()
+
+    assert obj.x == 0
+    assert obj.t == ()
+
+
+def test_eq():
+    assert SlotSimple(1, 2.0, [3]) == SlotSimple(1, 2.0, [3])
+    assert SlotSimple(1, 2.0, [3]) != SlotSimple(1, 2.0, [4])
+    # the same attributes -- with or without slots
+    assert SlotSimple(1, 2.0, [3]) == NoSlots.from_json_dict(
+        SlotSimple(1, 2.0, [3]).to_json_compat())
+
+
+def test_round_trip():
+    obj = SlotSimple(3, 4.5, [SlotSimple(1, 2.0), 7])
+
+    dic = obj.to_json_compat()
+    assert dic["__obj_type"] == "SlotSimple"
+    obj2 = SlotSimple.from_json_dict(dic)
+
+    assert obj2 == obj
+    assert js.from_json(obj.to_json()) == obj
+
+
+def test_round_trip_streaming():
+    obj = SlotSimple(3, 4.5, [SlotSimple(1, 2.0), SlotDefaults()])
+    outfile = io.StringIO()
+
+    obj.to_json(outfile)
+    outfile.seek(0)
+
+    assert js.from_json(outfile) == obj
+
+
+def test_round_trip_binary():
+    obj = SlotSimple(3, 4.5, [SlotDec(2, [1, 2]), SlotNotCompiled()])
+
+    assert binary.loads(binary.dumps(obj)) == obj
+
+
+def test_extra_slot():
+    obj = SlotExtra(3)
+
+    assert obj.cache == 6
+    obj2 = SlotExtra.from_json_dict(obj.to_json_compat())
+    assert obj2 == obj
+    assert "cache" not in obj.to_json_compat()
+
+
+def test_decorator():
+    obj = SlotDec(4, [SlotDec(2)])
+
+    assert obj.double() == 8
+    assert SlotDec.__qualname__ == "SlotDec"
+    assert jsd.from_json(obj.to_json()) == obj
+    assert SlotDecNotCompiled.from_json_dict(
+        SlotDecNotCompiled().to_json_compat()).x == 0
+
+
+def test_decorator_super():
+    obj = SlotDecSuper(3)
+
+    assert obj.x == 3
+    assert obj.describe() == "sub of base"
+    assert obj.base_description == "base"
+    assert type(SlotDecSuper.make()) is SlotDecSuper
+    assert jsd.from_json(obj.to_json()) == obj
+
+
+def test_smaller():
+    with_slots = SlotSimple(1, 2.0, [])
+    without = NoSlots.from_json_dict(with_slots.to_json_compat())
+
+    assert (sys.getsizeof(with_slots)
+            < sys.getsizeof(without) + sys.getsizeof(vars(without)))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""
+tests for the streaming writer and reader
+"""
+
+import io
+import json
+
+import pytest
+
+import json_save.json_save_meta as js
+import json_save.json_save_dec as jsd
+from json_save import streaming
+
+
+class Simple(js.JsonSaveable):
+    a = js.Int()
+    b = js.Float()
+    name = js.String()
+
+
+class Container(js.JsonSaveable):
+    x = js.Int()
+    lst = js.List()
+    d = js.Dict()
+    t = js.Tuple()
+
+
+class HandWritten(js.JsonSaveable):
+    x = js.Int()
+
+    def to_json_compat(self):
+        return {"__obj_type": "HandWritten", "x": self.x, "extra": [1, 2]}
+
+
+@jsd.json_save
+class DecSimple:
+    a = js.Int()
+    lst = js.List()
+
+
+def simple(a, b, name):
+    obj = Simple()
+    obj.a, obj.b, obj.name = a, b, name
+    return obj
+
+
+def container(x, lst, d, t=()):
+    obj = Container()
+    obj.x, obj.lst, obj.d, obj.t = x, lst, d, t
+    return obj
+
+
+def hand_written(x):
+    obj = HandWritten()
+    obj.x = x
+    return obj
+
+
+@pytest.fixture
+def nested():
+    inner = container(2, [simple(5, 1.5, "five")], {3: simple(3, 0.5, "")})
+    lst = [1, 2.5, "a string", None, True, [1, [2, 3]], {"plain": [4]},
+           simple(1, 2.0, 'with "quotes"\nand newline'), inner,
+           hand_written(7), [], {}]
+    d = {"this": simple(3, 4.5, "this"), "that": 12, "empty": []}
+    return container(34, lst, d, (1, 2))
+
+
+@pytest.mark.parametrize("indent", [None, 0, 2, 4, "\t"])
+def test_iter_json_same_as_json(nested, indent):
+    streamed = "".join(streaming.iter_json(nested, indent, max_items=0))
+
+    assert streamed == json.dumps(nested.to_json_compat(), indent=indent)
+
+
+@pytest.mark.parametrize("max_items", [0, 1, 2, 100])
+def test_iter_json_max_items(nested, max_items):
+    streamed = "".join(streaming.iter_json(nested, 4, max_items))
+
+    assert streamed == json.dumps(nested.to_json_compat(), indent=4)
+
+
+def test_iter_json_empty():
+    obj = container(0, [], {})
+
+    assert ("".join(streaming.iter_json(obj, 4))
+            == json.dumps(obj.to_json_compat(), indent=4))
+
+
+def test_iter_json_hand_written():
+    obj = hand_written(3)
+
+    assert "".join(streaming.iter_json(obj)) == json.dumps(obj.to_json_compat())
+
+
+def test_dump(nested):
+    outfile = io.StringIO()
+
+    streaming.dump(nested, outfile, buffer_size=3, max_items=0)
+
+    assert outfile.getvalue() == json.dumps(nested.to_json_compat(), indent=4)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_to_json_file(nested, stream):
+    outfile = io.StringIO()
+
+    nested.to_json(outfile, stream=stream)
+
+    assert outfile.getvalue() == nested.to_json()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_from_json_file(nested, stream):
+    infile = io.StringIO(nested.to_json())
+
+    assert js.from_json(infile, stream=stream) == nested
+
+
+@pytest.mark.parametrize("chunk_size, max_value_size",
+                         [(65536, 1 << 20),  # all at once
+                          (7, 1 << 20),  # lots of little reads
+                          (7, 10),  # a piece at a time
+                          (1, 1),
+                          ])
+def test_load(nested, chunk_size, max_value_size):
+    infile = io.StringIO(nested.to_json())
+
+    obj = streaming.load(infile, chunk_size, max_value_size)
+
+    assert obj == nested
+    assert type(obj.lst[8]) is Container
+    assert obj.lst[8].d[3].name == ""
+
+
+@pytest.mark.parametrize("max_value_size", [1, 1 << 20])
+def test_load_numbers(max_value_size):
+    # numbers can be split across chunks
+    data = [123456789, 1.5e-300, -0.25, 10, True, None, "x"]
+    infile = io.StringIO(json.dumps(data))
+
+    assert streaming.load(infile, 3, max_value_size) == data
+
+
+@pytest.mark.parametrize("max_value_size", [1, 1 << 20])
+def test_load_plain(max_value_size):
+    data = {"a": [1, {"b": [], "c": {}}], "": "empty key", "d": [[], [[]]]}
+    infile = io.StringIO(json.dumps(data, indent=2))
+
+    assert streaming.load(infile, 5, max_value_size) == data
+
+
+@pytest.mark.parametrize("text", ['{"a": [1, 2', '[1, 2 3]', '{"a" 1}', '',
+                                  '[1, 2}', '[}'])
+@pytest.mark.parametrize("max_value_size", [1, 1 << 20])
+def test_load_bad(text, max_value_size):
+    with pytest.raises(json.JSONDecodeError):
+        streaming.load(io.StringIO(text), 4, max_value_size)
+
+
+def test_from_json_file(nested):
+    infile = io.StringIO(nested.to_json())
+
+    assert js.from_json(infile) == nested
+
+
+def test_decorator():
+    obj = DecSimple()
+    obj.a = 4
+    obj.lst = [DecSimple(), 3]
+    outfile = io.StringIO()
+
+    obj.to_json(outfile)
+
+    assert outfile.getvalue() == json.dumps(obj.to_json_compat(), indent=4)
+    assert jsd.from_json(io.StringIO(outfile.getvalue())) == obj
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+"""
+integrating lots of functions, or over lots of intervals, at once
+
+Calling trapz() once for each of thousands of curves (quadratic() with
+different A, B and C, say) evaluates them one point at a time. If the
+function works with numpy arrays, trapz_batch() evaluates all of them at
+once: the points are a 2-d array, a row for each integral, on the same
+grid of n intervals -- and the parameters are columns, so numpy
+"broadcasts" them across the rows.
+
+Otherwise, the integrals are shared out to a pool of processes.
+"""
+
+import os
+import pickle
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from trapz import trapz
+import vectorized
+from vectorized import np
+
+
+def _is_sequence(value):
+    if isinstance(value, (str, bytes)):
+        return False
+    try:
+        len(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _num_integrals(*values):
+    """
+    the number of integrals -- the length of the sequences in values,
+    which must all be the same. 1 if they are all single values.
+    """
+    lengths = {len(value) for value in values if _is_sequence(value)}
+    if len(lengths) > 1:
+        raise ValueError("the sequences of values must all be the same "
+                         "length, not {}".format(sorted(lengths)))
+    return lengths.pop() if lengths else 1
+
+
+def _one(value, i):
+    """ the value for integral i """
+    return value[i] if _is_sequence(value) else value
+
+
+def _jobs(fun, a, b, args, kwargs, start, stop):
+    """
+    the (fun, a, b, args, kwargs) for each integral from start to stop
+    """
+    return [(_one(fun, i), _one(a, i), _one(b, i),
+             tuple(_one(arg, i) for arg in args),
+             {key: _one(value, i) for key, value in kwargs.items()})
+            for i in range(start, stop)]
+
+
+def _trapz_jobs(jobs, n, vectorized=None):
+    return [trapz(fun, a, b, *args, n=n, vectorized=vectorized, **kwargs)
+            for fun, a, b, args, kwargs in jobs]
+
+
+def _column(value, rows):
+    """ a sequence as a column for those rows -- to broadcast across them """
+    if _is_sequence(value):
+        return np.asarray(value, dtype=float)[rows.start:rows.stop,
+                                              np.newaxis]
+    return value
+
+
+def _as_array(value):
+    if _is_sequence(value):
+        return np.asarray(value, dtype=float)
+    return value
+
+
+def _evaluate(fun, a, b, args, kwargs, rows, j, n):
+    """
+    fun at points j (of the n intervals) for the integrals in rows (a
+    range)
+
+    :returns: the 2-d array of the points, and of fun at them
+    """
+    a, b = _column(a, rows), _column(b, rows)
+    xs = np.empty((len(rows), len(j)))
+    xs[:] = a + (b - a) / n * j
+    if j[-1] == n:
+        # exactly b at the end -- like trapz()
+        xs[:, -1:] = b
+    ys = fun(xs, *(_column(arg, rows) for arg in args),
+             **{key: _column(value, rows) for key, value in kwargs.items()})
+    return xs, ys
+
+
+def accepts_batch(fun, a, b, *args, **kwargs):
+    """
+    check if fun can be evaluated for lots of integrals at once -- with a
+    2-d array of x values, and a column of each parameter
+
+    It's tried on the first two integrals, and checked against calling it
+    with each value.
+    """
+    if np is None or not callable(fun):
+        return False
+    count = min(_num_integrals(a, b, *args, *kwargs.values()), 2)
+    try:
+        xs, ys = _evaluate(fun, a, b, args, kwargs, range(count),
+                           np.arange(3.0), 2)
+        if not isinstance(ys, np.ndarray) or ys.shape != xs.shape:
+            # a constant function gives back a single value, for instance
+            return False
+        for i, (f, _, _, fargs, fkwargs) in enumerate(
+                _jobs(fun, a, b, args, kwargs, 0, count)):
+            expected = [f(x, *fargs, **fkwargs) for x in xs[i].tolist()]
+            if not np.allclose(ys[i], expected, equal_nan=True):
+                return False
+    except Exception:
+        # it'll be done one at a time -- which works if anything does
+        return False
+    return True
+
+
+def _trapz_arrays(fun, a, b, args, kwargs, count, n):
+    """
+    all the integrals at once -- in chunks of up to vectorized.CHUNK_SIZE
+    points
+    """
+    # only convert the sequences to arrays once
+    a, b = _as_array(a), _as_array(b)
+    args = [_as_array(arg) for arg in args]
+    kwargs = {key: _as_array(value) for key, value in kwargs.items()}
+    sums = np.zeros(count)
+    num_rows = max(1, vectorized.CHUNK_SIZE // (n + 1))
+    num_columns = min(n + 1, vectorized.CHUNK_SIZE)
+    for first_row in range(0, count, num_rows):
+        rows = range(first_row, min(first_row + num_rows, count))
+        for first in range(0, n + 1, num_columns):
+            j = np.arange(first, min(first + num_columns, n + 1),
+                          dtype=float)
+            xs, ys = _evaluate(fun, a, b, args, kwargs, rows, j, n)
+            # the end points only count half
+            weights = np.where((j == 0) | (j == n), 0.5, 1.0)
+            ys = np.broadcast_to(ys, xs.shape)
+            sums[first_row:rows.stop] += ys @ weights
+    return sums * ((b - a) / n)
+
+
+def _picklable(obj):
+    try:
+        pickle.dumps(obj)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return True
+
+
+def trapz_batch(fun, a, b, *args, n=100, vectorized=None, processes=None,
+                **kwargs):
+    """
+    Compute the areas under lots of curves y = fun(x, ...), for x between
+    a and b, at once -- like calling trapz() for each of them
+
+    :param fun: the function to evaluate -- or a sequence of functions,
+                one for each integral (like the ones curry_quadratic()
+                makes)
+
+    :param a: the start point for the integration -- or a sequence, one
+              for each integral
+
+    :param b: the end point for the integration -- or a sequence
+
+    :param n=100: the number of intervals to use -- the same for each one
+
+    :param vectorized=None: evaluate all the integrals at once, with
+                            numpy arrays. If None, it's used if fun works
+                            that way. (see vectorized.py) For a sequence
+                            of functions, each one is evaluated with
+                            arrays (if it works that way).
+
+    :param processes=None: the number of processes to share the integrals
+                           out to, if they aren't done with arrays --
+                           None for the number of cores. It's done in
+                           this process if fun can't be pickled (a
+                           lambda, for instance)
+
+    :returns: an array of the integrals: a numpy array if numpy is
+              installed, an array.array('d') if not
+
+    any other arguments will be passed through to fun (except ones called
+    n, vectorized or processes, like trapz()) -- a single value is used
+    for every integral, a sequence has one for each of them:
+
+        trapz_batch(quadratic, 0, 10, A=[1, 2, 3], B=2) ==
+            [trapz(quadratic, 0, 10, A=1, B=2),
+             trapz(quadratic, 0, 10, A=2, B=2),
+             trapz(quadratic, 0, 10, A=3, B=2)]
+    """
+    count = _num_integrals(fun, a, b, *args, *kwargs.values())
+    if vectorized and np is None:
+        raise ValueError("vectorized=True needs numpy")
+    if callable(fun):
+        if vectorized is None:
+            vectorized = accepts_batch(fun, a, b, *args, **kwargs)
+        if vectorized:
+            return _trapz_arrays(fun, a, b, args, kwargs, count, n)
+        each = False
+    else:
+        # one at a time -- but each function might work with arrays, so
+        # trapz() can check each of them (if vectorized is None)
+        each = vectorized
+    if processes is None:
+        processes = os.cpu_count()
+    if processes == 1 or count <= 1 or not _picklable(fun):
+        results = _trapz_jobs(_jobs(fun, a, b, args, kwargs, 0, count),
+                              n, each)
+    else:
+        # a few chunks for each process, so they all finish about together
+        chunk = -(-count // (processes * 4))
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(_trapz_jobs,
+                                   _jobs(fun, a, b, args, kwargs,
+                                         start, min(start + chunk, count)),
+                                   n, each)
+                       for start in range(0, count, chunk)]
+            results = [area for future in futures
+                       for area in future.result()]
+    if np is None:
+        return array('d', results)
+    return np.array(results)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Time integrating lots of quadratics, with different A, B, C and end
+points: calling trapz() for each one, and trapz_batch() with numpy arrays
+(if it's installed) and with a pool of processes.
+
+    python bench_batch.py [num_integrals] [n]
+
+The defaults are 10,000 integrals of 100 intervals each.
+"""
+
+import os
+import random
+import sys
+import time
+
+from batch import trapz_batch
+from trapz import trapz, quadratic
+import vectorized
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:24s} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def each(A, B, C, ends, n):
+    return [trapz(quadratic, 0, end, a, b, c, n=n, vectorized=False)
+            for a, b, c, end in zip(A, B, C, ends)]
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rand = random.Random(42)
+    A, B, C, ends = ([rand.uniform(-5, 5) for _ in range(num)]
+                     for _ in range(4))
+    print(f"{num} integrals, {n} intervals, {os.cpu_count()} cores:")
+
+    expected = timed("trapz() for each", each, A, B, C, ends, n)
+    results = timed(f"{os.cpu_count()} processes", trapz_batch, quadratic,
+                    0, ends, A, B, C, n=n, vectorized=False)
+    assert all(abs(x - y) <= 1e-9 * abs(y) for x, y in zip(results, expected))
+    if vectorized.np is not None:
+        results = timed("arrays", trapz_batch, quadratic, 0, ends, A, B, C,
+                        n=n, vectorized=True)
+        assert all(abs(x - y) <= 1e-9 * abs(y) + 1e-9
+                   for x, y in zip(results, expected))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+"""
+Time trapz() on quadratic() for N = 10, 100 ... up to 100,000,000 steps:
+calling it once for each point, and with numpy arrays, if it's installed.
+
+    python bench_trapz.py [max_scalar_n]
+
+Calling it once for each point takes a while for big N, so that stops at
+max_scalar_n (default 10,000,000).
+"""
+
+import sys
+import time
+
+import trapz
+import vectorized
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    max_scalar = int(sys.argv[1]) if len(sys.argv) > 1 else 10**7
+    args = (trapz.quadratic, 0, 10, 2, -4, 3)
+    print(f"{'N':>12s} {'scalar':>10s} {'arrays':>10s} {'speedup':>8s}")
+    for power in range(1, 9):
+        n = 10**power
+        scalar = vector = None
+        if n <= max_scalar:
+            result, scalar = timed(trapz.trapz, *args, n=n, vectorized=False)
+        if vectorized.np is not None:
+            result2, vector = timed(trapz.trapz, *args, n=n, vectorized=True)
+            if scalar is not None:
+                assert abs(result - result2) <= 1e-9 * abs(result)
+        print(f"{n:12d}",
+              f"{scalar:10.4f}" if scalar is not None else f"{'-':>10s}",
+              f"{vector:10.4f}" if vector is not None else f"{'-':>10s}",
+              f"{scalar / vector:8.1f}" if scalar and vector else "")
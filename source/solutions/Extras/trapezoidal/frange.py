@@ -1,5 +1,7 @@
-# the index method takes an object and returns its index equivalent.
-from operator import index
+try:
+    import numpy as np
+except ImportError:  # only needed for to_array()
+    np = None
 
 
 class frange:
@@ -32,15 +34,52 @@ class frange:
           interval:
 
           list(frange(0, 1, 5)) == [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+        Like range(), the values are computed as they are needed, and a
+        slice (with a step, too) is another frange -- so it doesn't
+        matter how many there are. to_array() makes a numpy array of them.
         """
         if num_steps == 0:
             raise ValueError("frange() arg 3 must not be zero")
-        self.start = float(start)
-        self.stop = float(stop)
-        self.num_steps = int(num_steps)
-        self._delta = (self.stop - self.start) / num_steps
-        if self._delta == 0.0:
+        start = float(start)
+        stop = float(stop)
+        num_steps = int(num_steps)
+        delta = (stop - start) / num_steps
+        if delta == 0.0:
             raise ValueError("start and stop must be different")
+        self._set(start, stop, delta, num_steps, range(num_steps + 1))
+
+    def _set(self, origin, end, delta, last, indices):
+        """
+        The values are stored as a range() of indices into the full
+        series: value i is origin + i * delta, except the last one (index
+        last), which is end -- so they all come out the same after
+        slicing, and nothing is stored for each value.
+        """
+        self._origin = origin
+        self._end = end
+        self._delta = delta
+        self._last = last
+        self._indices = indices
+
+    def _value(self, i):
+        if i == self._last:
+            return self._end
+        return self._origin + (self._delta * i)
+
+    @property
+    def start(self):
+        return self._value(self._indices.start)
+
+    @property
+    def stop(self):
+        if not self._indices:
+            return self.start
+        return self._value(self._indices[-1])
+
+    @property
+    def num_steps(self):
+        return len(self._indices) - 1
 
     def __repr__(self):
         return "frange({!r}, {!r}, {!r})".format(self.start,
@@ -57,25 +96,38 @@ class frange:
             return False
 
     def __len__(self):
-        return self.num_steps + 1
+        return len(self._indices)
 
     def __getitem__(self, ind):
-        # process a slice:
-        # fixme: might want to round a bit when making a slice:
-        # http://code.activestate.com/recipes/578114-round-number-to-specified-number-of-significant-di/
+        # a slice is another frange -- of some of the same indices
         if isinstance(ind, slice):
-            print("slice is:", ind)
-            if ind.step is not None:
-                raise ValueError("frange does not support slicing with a step")
-            istart, istop, _ = ind.indices(len(self))
-            start = self.start + (istart * self._delta)
-            stop = self.stop - ((self.num_steps + 1 - istop) * self._delta)
-            num_steps = istop - istart - 1
-            return frange(start, stop, num_steps)
-        ind = index(ind)
-        if ind < 0:
-            ind += (self.num_steps + 1)
-        if ind > self.num_steps or ind < 0:
-            raise IndexError
-        val = self.start + (self._delta * ind)
-        return val
+            sliced = frange.__new__(frange)
+            sliced._set(self._origin, self._end, self._delta, self._last,
+                        self._indices[ind])
+            return sliced
+        try:
+            return self._value(self._indices[ind])
+        except IndexError:
+            raise IndexError("frange index out of range") from None
+
+    def __iter__(self):
+        return map(self._value, self._indices)
+
+    def to_array(self):
+        """
+        the values as a numpy array -- made with only one allocation
+        """
+        if np is None:
+            raise ImportError("frange.to_array() needs numpy")
+        indices = self._indices
+        arr = np.arange(indices.start, indices.stop, indices.step,
+                        dtype=np.float64)
+        arr *= self._delta
+        arr += self._origin
+        if self._last in indices:
+            arr[indices.index(self._last)] = self._end
+        return arr
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.to_array()
+        return arr if dtype is None else arr.astype(dtype, copy=False)
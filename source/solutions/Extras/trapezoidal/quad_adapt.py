@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+locally adaptive integration
+
+trapz_adapt.trapz refines the whole interval at once -- if the function
+has a sharp peak in one place, it needs small steps there, so it takes
+small steps everywhere.
+
+This uses Simpson's rule on each sub-interval, with an estimate of its
+error, and only splits the sub-intervals where the error is too big. The
+sub-intervals are kept in a priority queue (a heap), so the one with
+the largest error is always split next, until the total error is small
+enough.
+"""
+
+import heapq
+import math
+from collections import namedtuple
+
+# what integrate() returns:
+#   value: the area
+#   error: the estimated error
+#   evaluations: the number of times fun was called
+#   converged: if the error is within the tolerance
+Integral = namedtuple("Integral", ["value", "error", "evaluations",
+                                   "converged"])
+
+
+def simpson(width, f_start, f_mid, f_end):
+    """
+    Simpson's rule for one interval, with the function values at the
+    start, middle and end
+    """
+    return width / 6 * (f_start + 4 * f_mid + f_end)
+
+
+def _estimate(a, b, fa, fl, fm, fr, fb):
+    """
+    the estimate of the area from a to b, and its error
+
+    Simpson's rule on the whole interval, and on each half -- the
+    difference between them is (about) 15 times the error of the halves.
+
+    :param fa, fl, fm, fr, fb: the function at a, a quarter of the way,
+                               the middle, three quarters, and b
+    """
+    width = b - a
+    whole = simpson(width, fa, fm, fb)
+    halves = (simpson(width / 2, fa, fl, fm)
+              + simpson(width / 2, fm, fr, fb))
+    # extrapolate, like Romberg does
+    value = halves + (halves - whole) / 15
+    return value, abs(halves - whole) / 15
+
+
+def integrate(fun, a, b, tol=1e-4, *args, max_evaluations=100000, **kwargs):
+    """
+    Compute the area under the curve defined by
+    y = fun(x), for x between a and b -- using more points only where
+    they are needed
+
+    :param fun: the function to evaluate
+    :type fun: a function that takes the value to be integrated over as
+               its first argument. Any arguments can be passed in at the end.
+
+    :param a: the start point for the integration
+
+    :param b: the end point for the integration
+
+    :param tol=1e-4: accuracy expected -- relative, or absolute for
+                     results near zero, like trapz_adapt.trapz
+
+    :param max_evaluations=100000: the most times to call fun -- if
+                                   the result isn't accurate enough by
+                                   then, it's returned anyway, with
+                                   converged False. It takes at least 5
+                                   for the first estimate.
+
+    :returns: an Integral: (value, error, evaluations, converged)
+
+    any other arguments will be passed through to fun.
+    """
+    if max_evaluations < 5:
+        raise ValueError("max_evaluations must be at least 5, "
+                         "not {}".format(max_evaluations))
+    evaluations = 0
+
+    def f(x):
+        nonlocal evaluations
+        evaluations += 1
+        return fun(x, *args, **kwargs)
+
+    a, b = float(a), float(b)
+    width = b - a
+    points = (a, a + width / 4, a + width / 2, b - width / 4, b)
+    first = (a, b) + tuple(f(x) for x in points)
+    value, error = _estimate(*first)
+
+    # the heap of sub-intervals, largest error first:
+    # (-error, value, a, b, fa, fl, fm, fr, fb)
+    heap = [(-error, value) + first]
+    # the intervals too small to split (a + width/4 == a)
+    done = []
+    total, total_error = value, error
+    while total_error > max(tol, tol * abs(total)):
+        if evaluations + 4 > max_evaluations or not heap:
+            break
+        neg_error, value, a, b, fa, fl, fm, fr, fb = heapq.heappop(heap)
+        m = (a + b) / 2
+        quarter = (b - a) / 4
+        if a + quarter / 2 in (a, m):
+            done.append((neg_error, value))
+            continue
+        left = (a, m, fa, f(a + quarter / 2), fl, f(m - quarter / 2), fm)
+        right = (m, b, fm, f(m + quarter / 2), fr, f(b - quarter / 2), fb)
+        total -= value
+        total_error += neg_error
+        for interval in (left, right):
+            value, error = _estimate(*interval)
+            heapq.heappush(heap, (-error, value) + interval)
+            total += value
+            total_error += error
+
+    # add them up again, without the rounding errors of keeping a total
+    intervals = heap + done
+    total = math.fsum(item[1] for item in intervals)
+    total_error = math.fsum(-item[0] for item in intervals)
+    return Integral(total, total_error, evaluations,
+                    total_error <= max(tol, tol * abs(total)))
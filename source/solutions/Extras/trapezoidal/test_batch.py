@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""
+test code for integrating lots of functions at once
+"""
+import math
+from array import array
+from math import isclose
+
+import pytest
+
+import batch
+import vectorized
+from batch import trapz_batch, accepts_batch
+from trapz import trapz, quadratic, curry_quadratic
+
+A = [1, -2, 3.5, 0]
+B = [2, 0, -1, 4]
+C = [0, 3, 1, -1]
+ENDS = [1, 2, 3, 10]
+
+
+def all_close(results, expected):
+    assert len(results) == len(expected)
+    for result, value in zip(results, expected):
+        assert isclose(result, value, rel_tol=1e-12, abs_tol=1e-12)
+    return True
+
+
+def expected_quadratics():
+    return [trapz(quadratic, -1, b, A=a_, B=b_, C=c_)
+            for b, a_, b_, c_ in zip(ENDS, A, B, C)]
+
+
+def line(x):
+    return 5
+
+
+def test_accepts_batch():
+    pytest.importorskip("numpy")
+
+    assert accepts_batch(quadratic, -1, ENDS, A=A, B=B, C=C)
+    assert accepts_batch(quadratic, 0, 1, A, B)
+
+
+@pytest.mark.parametrize("fun", [math.sin, line])
+def test_not_batch(fun):
+    assert not accepts_batch(fun, 0, ENDS)
+
+
+def test_parameters():
+    results = trapz_batch(quadratic, -1, ENDS, A=A, B=B, C=C)
+
+    assert all_close(results, expected_quadratics())
+
+
+def test_positional_parameters():
+    results = trapz_batch(quadratic, -1, ENDS, A, B, C, n=10)
+
+    assert all_close(results, [trapz(quadratic, -1, b, a_, b_, c_, n=10)
+                               for b, a_, b_, c_ in zip(ENDS, A, B, C)])
+
+
+def test_single_values():
+    results = trapz_batch(quadratic, [0, 1], 2, 1, C=[1, 2])
+
+    assert all_close(results, [trapz(quadratic, 0, 2, 1, C=1),
+                               trapz(quadratic, 1, 2, 1, C=2)])
+
+
+def test_closures():
+    funs = [curry_quadratic(*abc) for abc in zip(A, B, C)]
+
+    results = trapz_batch(funs, -1, ENDS)
+
+    assert all_close(results, expected_quadratics())
+
+
+def test_closures_use_arrays():
+    np = pytest.importorskip("numpy")
+    types = set()
+
+    def recording(A):
+        def fun(x):
+            types.add(type(x))
+            return quadratic(x, A)
+        return fun
+
+    results = trapz_batch([recording(a_) for a_ in A], 0, 1)
+
+    assert np.ndarray in types
+    assert all_close(results, [trapz(quadratic, 0, 1, a_, vectorized=False)
+                               for a_ in A])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_not_arrays(processes):
+    results = trapz_batch(math.sin, 0, ENDS, n=1000, processes=processes)
+
+    assert all_close(results, [trapz(math.sin, 0, b, n=1000) for b in ENDS])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_empty(processes):
+    assert len(trapz_batch(math.sin, [], [], processes=processes)) == 0
+
+
+def test_same_both_ways():
+    pytest.importorskip("numpy")
+    kwargs = dict(A=A, B=B, C=C, n=50)
+
+    assert all_close(trapz_batch(quadratic, -1, ENDS, vectorized=True,
+                                 **kwargs),
+                     trapz_batch(quadratic, -1, ENDS, vectorized=False,
+                                 processes=2, **kwargs))
+
+
+def test_chunks(monkeypatch):
+    pytest.importorskip("numpy")
+    # less than one row at a time, then a few rows at a time
+    for chunk_size in (7, 300):
+        monkeypatch.setattr(vectorized, "CHUNK_SIZE", chunk_size)
+        results = trapz_batch(quadratic, -1, ENDS, A=A, B=B, C=C,
+                              vectorized=True)
+        assert all_close(results, expected_quadratics())
+
+
+def test_wrong_lengths():
+    with pytest.raises(ValueError):
+        trapz_batch(quadratic, 0, [1, 2, 3], A=[1, 2])
+
+
+def test_no_numpy(monkeypatch):
+    monkeypatch.setattr(batch, "np", None)
+
+    with pytest.raises(ValueError):
+        trapz_batch(quadratic, 0, ENDS, vectorized=True)
+    results = trapz_batch(quadratic, -1, ENDS, A=A, B=B, C=C, processes=1)
+    assert type(results) is array
+    assert all_close(results, expected_quadratics())
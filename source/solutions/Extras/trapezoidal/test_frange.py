@@ -99,3 +99,58 @@ def test_start_stop_same():
 def test_zero_num_steps():
     with pytest.raises(ValueError):
         assert list(frange(3, 10, 0)) == []
+
+
+def test_iterate():
+    assert list(frange(0, 1, 4)) == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+
+def test_last_is_stop():
+    r = frange(0, 0.3, 3)
+    assert r[-1] == 0.3
+    assert list(r)[-1] == 0.3
+    assert r[1:].stop == 0.3
+
+
+def test_slice_is_lazy():
+    r = frange(0, 1, 2**40)
+    s = r[1:-1]
+    assert isinstance(s, frange)
+    assert len(s) == 2**40 - 1
+    assert s[0] == r[1]
+    assert s[-1] == r[-2]
+
+
+def test_slice_same_values():
+    r = frange(0.1, 7.3, 37)
+    assert list(r[3:30]) == list(r)[3:30]
+    assert list(r[3:30][2:-5]) == list(r)[3:30][2:-5]
+
+
+def test_slice_step():
+    r = frange(0, 1, 10)
+    assert r[::2] == frange(0, 1, 5)
+    assert list(r[1::2]) == list(r)[1::2]
+    assert list(r[::-3]) == list(r)[::-3]
+
+
+def test_slice_empty_and_single():
+    r = frange(0, 1, 10)
+    assert len(r[5:5]) == 0
+    assert list(r[5:5]) == []
+    assert list(r[5:6]) == [r[5]]
+
+
+def test_slice_index_too_large():
+    with pytest.raises(IndexError):
+        frange(0, 1, 10)[2:8][6]
+
+
+def test_to_array():
+    np = pytest.importorskip("numpy")
+    r = frange(0, 0.3, 30)
+    for fr in (r, r[1:-1], r[1::2], r[::-1]):
+        arr = fr.to_array()
+        assert arr.dtype == np.float64
+        assert arr.tolist() == list(fr)
+    assert np.asarray(r).tolist() == list(r)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+"""
+test code for the locally adaptive integration
+"""
+import math
+from math import isclose
+
+import pytest
+
+from quad_adapt import integrate
+from trapz_adapt import trapz_refinements
+
+
+def peak(x, width=1e-4):
+    """ a sharp peak at x = 0.3 """
+    return 1 / (width + (x - 0.3)**2)
+
+
+def peak_area(a, b, width=1e-4):
+    root = math.sqrt(width)
+    return (math.atan((b - 0.3) / root) - math.atan((a - 0.3) / root)) / root
+
+
+def test_cubic_exact():
+    # Simpson's rule is exact for cubics -- no need to split
+    def cubic(x):
+        return x**3 - 2 * x + 1
+
+    result = integrate(cubic, 0, 2)
+
+    assert isclose(result.value, 2.0)
+    assert result.evaluations == 5
+    assert result.converged
+
+
+def test_sine():
+    result = integrate(math.sin, 0, math.pi, tol=1e-10)
+
+    assert isclose(result.value, 2.0, rel_tol=1e-10)
+    assert result.error < 1e-10 * 2
+    assert result.converged
+
+
+def test_sine2():
+    result = integrate(math.sin, 0, 2 * math.pi, tol=1e-10)
+
+    assert isclose(result.value, 0.0, abs_tol=1e-10)
+
+
+def test_backwards():
+    result = integrate(math.sin, math.pi, 0, tol=1e-10)
+
+    assert isclose(result.value, -2.0, rel_tol=1e-10)
+
+
+def test_args():
+    def line(x, m, c=0):
+        return m * x + c
+
+    assert isclose(integrate(line, 0, 2, 1e-6, 3, c=1).value, 8.0)
+
+
+def test_counts_evaluations():
+    calls = []
+
+    def fun(x):
+        calls.append(x)
+        return peak(x)
+
+    result = integrate(fun, 0, 1, tol=1e-8)
+
+    assert result.evaluations == len(calls)
+    # each point only once
+    assert len(set(calls)) == len(calls)
+
+
+def test_peak():
+    result = integrate(peak, 0, 1, tol=1e-8)
+
+    assert isclose(result.value, peak_area(0, 1), rel_tol=1e-8)
+    assert result.converged
+    # the points are mostly around the peak
+    assert result.evaluations < 2000
+
+
+def test_peak_fewer_than_trapz():
+    # a much sharper peak
+    width = 1e-8
+    exact = peak_area(0, 1, width)
+
+    result = integrate(peak, 0, 1, 1e-6, width)
+
+    assert isclose(result.value, exact, rel_tol=1e-6)
+    # trapz needs small steps everywhere to get it that close
+    for n, s in trapz_refinements(peak, 0, 1, width):
+        if isclose(s, exact, rel_tol=1e-6):
+            break
+    assert result.evaluations * 50 < n
+
+
+def test_budget():
+    result = integrate(peak, 0, 1, tol=1e-12, max_evaluations=101)
+
+    assert result.evaluations <= 101
+    assert not result.converged
+    # not accurate enough -- but close
+    assert isclose(result.value, peak_area(0, 1), rel_tol=1e-2)
+
+
+def test_budget_too_small():
+    with pytest.raises(ValueError):
+        integrate(peak, 0, 1, max_evaluations=4)
+    assert integrate(peak, 0, 1, max_evaluations=5).evaluations == 5
+
+
+def test_infinite_spike():
+    # 1/sqrt(x) is infinite at zero -- but the area is 2
+    def spike(x):
+        return 1 / math.sqrt(x) if x else 0.0
+
+    result = integrate(spike, 0, 1, tol=1e-6, max_evaluations=1000000)
+
+    assert isclose(result.value, 2.0, rel_tol=1e-5)
@@ -5,7 +5,7 @@ test code for the trapezoidal rule exercise
 """
 import pytest
 
-from trapz_adapt import trapz, isclose
+from trapz_adapt import trapz, romberg, trapz_refinements, isclose
 
 import math
 
@@ -69,6 +69,84 @@ def test_sine2():
 
 
 
+class Counter:
+    """
+    a function that counts how many times it's called -- and at what x
+    """
+    def __init__(self, fun):
+        self.fun = fun
+        self.xs = []
+
+    def __call__(self, x, *args, **kwargs):
+        self.xs.append(x)
+        return self.fun(x, *args, **kwargs)
+
+
+def test_each_point_once():
+    fun = Counter(math.sin)
+    refinements = trapz_refinements(fun, 0, math.pi)
+
+    for _ in range(5):
+        n, s = next(refinements)
+
+    assert n == 32
+    # every point evaluated, and only once
+    assert len(fun.xs) == n + 1
+    assert len(set(fun.xs)) == n + 1
+
+
+def test_trapz_evaluations():
+    fun = Counter(math.sin)
+    # (vectorized=False, so it isn't tried with an array first)
+    result = trapz(fun, 0, math.pi, tol=1e-8, vectorized=False)
+
+    assert isclose(result, 2.0, rel_tol=1e-8)
+    assert len(fun.xs) == len(set(fun.xs))
+
+
+def test_trapz_args():
+    def line(x, m, c=0):
+        return m * x + c
+
+    assert isclose(trapz(line, 0, 2, 1e-6, 3, c=1), 8.0)
+    assert isclose(romberg(line, 0, 2, 1e-6, 3, c=1), 8.0)
+
+
+def test_zero_width():
+    assert trapz(math.sin, 1, 1) == 0.0
+    assert romberg(math.sin, 1, 1) == 0.0
+    assert next(trapz_refinements(math.sin, 1, 1)) == (2, 0.0)
+
+
+def test_romberg_sine():
+    result = romberg(math.sin, 0, math.pi, tol=1e-12)
+    assert isclose(result, 2.0, rel_tol=1e-12)
+
+    result = romberg(math.sin, 0, 2 * math.pi, tol=1e-12)
+    assert isclose(result, 0.0, abs_tol=1e-12)
+
+
+def test_romberg_fewer_evaluations():
+    fun_trapz = Counter(math.exp)
+    fun_romberg = Counter(math.exp)
+
+    assert isclose(trapz(fun_trapz, 0, 1, tol=1e-10, vectorized=False),
+                   math.e - 1,
+                   rel_tol=1e-9)
+    assert isclose(romberg(fun_romberg, 0, 1, tol=1e-10, vectorized=False),
+                   math.e - 1,
+                   rel_tol=1e-12)
+    assert len(fun_romberg.xs) * 100 < len(fun_trapz.xs)
+
+
+def test_not_converging():
+    # 1/sqrt(x) has an infinite spike at zero
+    def spike(x):
+        return 1 / math.sqrt(x) if x else 1e300
+
+    with pytest.raises(ValueError):
+        trapz(spike, 0, 1, tol=1e-12)
+
 
 if __name__ == "__main__":
     test_sine2()
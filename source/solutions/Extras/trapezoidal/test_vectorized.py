@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+test code for evaluating the function with numpy arrays
+"""
+import math
+from math import isclose
+
+import pytest
+
+from frange import frange
+import vectorized
+from vectorized import accepts_arrays, use_arrays, array_sum
+import trapz
+import trapz_adapt
+
+
+def step(x):
+    return 1.0 if x > 0 else 0.0
+
+
+def constant(x):
+    return 5
+
+
+@pytest.mark.parametrize("fun", [math.sin, step, constant])
+def test_not_arrays(fun):
+    assert not accepts_arrays(fun, -1, 1)
+
+
+def test_accepts_arrays():
+    pytest.importorskip("numpy")
+
+    assert accepts_arrays(trapz.quadratic, 0, 1, 1, 2, C=3)
+    assert accepts_arrays(trapz.curry_quadratic(1, 2, 3), 0, 1)
+
+
+def test_use_arrays():
+    assert not use_arrays(False, trapz.quadratic, 0, 1)
+    assert not use_arrays(None, math.sin, 0, 1)
+
+
+def test_no_numpy(monkeypatch):
+    monkeypatch.setattr(vectorized, "np", None)
+
+    assert not accepts_arrays(trapz.quadratic, 0, 1, 1, 2, 3)
+    with pytest.raises(ValueError):
+        use_arrays(True, trapz.quadratic, 0, 1)
+    # it still works -- just not with arrays
+    assert isclose(trapz.trapz(trapz.quadratic, 0, 1, 0, 0, 3), 3.0)
+
+
+def test_array_sum(monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(vectorized, "CHUNK_SIZE", 7)
+
+    xs = frange(1, 15.5, 29)
+    total = array_sum(np.sqrt, xs)
+
+    assert isclose(total, sum(math.sqrt(x) for x in xs))
+    assert type(total) is float
+
+
+def test_trapz_same():
+    pytest.importorskip("numpy")
+    args = (-5, 5, 2, -4, 3)
+
+    assert isclose(trapz.trapz(trapz.quadratic, *args, vectorized=True),
+                   trapz.trapz(trapz.quadratic, *args, vectorized=False))
+
+
+def test_trapz_n():
+    pytest.importorskip("numpy")
+    # A=1, B=C=0 -- the area under x**2 from 0 to 1 is 1/3
+    for n in (10, 1000, 100000):
+        vector = trapz.trapz(trapz.quadratic, 0, 1, 1, n=n, vectorized=True)
+        scalar = trapz.trapz(trapz.quadratic, 0, 1, 1, n=n, vectorized=False)
+        assert isclose(vector, scalar)
+    assert isclose(vector, 1 / 3, rel_tol=1e-9)
+
+
+def test_trapz_adapt_same():
+    np = pytest.importorskip("numpy")
+
+    vector = trapz_adapt.trapz(np.sin, 0, math.pi, tol=1e-10)
+    scalar = trapz_adapt.trapz(math.sin, 0, math.pi, tol=1e-10)
+
+    assert isclose(vector, scalar, rel_tol=1e-12)
+    assert isclose(trapz_adapt.romberg(np.exp, 0, 1, tol=1e-12),
+                   math.e - 1, rel_tol=1e-12)
+
+
+class Awkward:
+    """ raises something other than a TypeError for arrays """
+    def __call__(self, x):
+        if hasattr(x, "shape"):
+            raise ZeroDivisionError("not an array")
+        return x * 2
+
+
+def test_other_errors():
+    pytest.importorskip("numpy")
+    fun = Awkward()
+
+    assert not accepts_arrays(fun, 0, 1)
+    assert isclose(trapz.trapz(fun, 0, 1), 1.0)
+    assert isclose(trapz_adapt.trapz(fun, 0, 1), 1.0)
+
+
+def test_remembered():
+    pytest.importorskip("numpy")
+    calls = []
+
+    def fun(x, A):
+        calls.append(x)
+        return A * x
+
+    assert accepts_arrays(fun, 0, 1, 2)
+    assert len(calls) == 4
+    assert accepts_arrays(fun, 5, 6, 3)
+    # a different type of argument could make a difference
+    assert accepts_arrays(fun, 5, 6, 3.0)
+    assert len(calls) == 8
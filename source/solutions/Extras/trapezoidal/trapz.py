@@ -61,10 +61,11 @@ def quadratic(x, A=0, B=0, C=0):
 #     yield b
 
 from frange import frange
+from vectorized import use_arrays, array_sum
 
 
 
-def trapz(fun, a, b, *args, **kwargs):
+def trapz(fun, a, b, *args, n=100, vectorized=None, **kwargs):
     """
     Compute the area under the curve defined by
     y = fun(x), for x between a and b
@@ -77,14 +78,30 @@ def trapz(fun, a, b, *args, **kwargs):
 
     :param b: the end point for the integration
     :type b: a numeric value
+
+    :param n=100: the number of intervals to use
+
+    :param vectorized=None: call fun with a numpy array of all the
+                            points, rather than once for each point.
+                            If None, it's used if fun works that way.
+                            (see vectorized.py)
+
+    any other arguments will be passed through to fun -- but not ones
+    called n or vectorized, as trapz() uses those itself. If fun takes
+    arguments with those names, pass them positionally, or lock them in
+    with functools.partial (see curry_quadratic below).
     """
     # compute the range
-    n = 100  # hard code that for now
     # vals = iter(frange(a, b, n))
 
     # next(vals)
     # s = sum([fun(next(vals), *args, **kwargs) for i in range(n - 1)])
-    s = sum([fun(val, *args, **kwargs) for val in frange(a, b, n)[1:-1]])
+    # all but the end points -- a slice of an frange doesn't copy anything
+    vals = frange(a, b, n)[1:-1]
+    if use_arrays(vectorized, fun, a, b, *args, **kwargs):
+        s = array_sum(fun, vals, *args, **kwargs)
+    else:
+        s = sum(fun(val, *args, **kwargs) for val in vals)
     s += (fun(a, *args, **kwargs) + fun(b, *args, **kwargs)) / 2
     s *= (b - a) / n
 
@@ -8,6 +8,9 @@ Can integerate any function passed in
 
 """
 
+from frange import frange
+from vectorized import use_arrays, array_sum
+
 # need a function for testing approximate equality
 import math
 try:
@@ -51,30 +54,47 @@ except ImportError:  # only there in py3.5 -- so we'll define it here.
                 (diff <= abs_tol))
 
 
-def frange(a, b, n):
-    """
-    kind of like a floating point range function
+# the most intervals to try before giving up
+# (about half the precision of a double)
+MAX_STEPS = 2**22
 
-    :param a: the start point
-    :param b: the end point
-    :param n: the number of intervals you want.
 
-    :returns: a sequence of floating point nubers, evenly spaced between
-    a and b
+def trapz_refinements(fun, a, b, *args, vectorized=False, **kwargs):
+    """
+    generate better and better trapezoidal rule estimates of the area
+    under fun(x) from a to b
 
-    result[0] == a
-    result[-1] == b
-    len(result) == n+1
+    :yields: (n, s) -- the estimate s with n intervals, for n = 2, 4, 8 ...
 
-    n specifies the number of intervals, so you get a nice delta. i.e.
-    frange(1,10,100) == [1.0, 1.1, 1.2, ..., 9.8, 9.9, 10.0]
+    Each time the number of intervals is doubled, the new points are
+    the midpoints of the old intervals -- the old points are all still
+    there. So the old sum can be re-used, and fun only evaluated at the
+    new points: every point is only evaluated once.
 
+    :param vectorized=False: call fun with numpy arrays of the new points
+                             (see vectorized.py)
+
+    any other arguments will be passed through to fun.
     """
-    delta = (float(b) - a) / n
-    return [a + i*delta for i in range(n+1)]
+    n = 1
+    h = float(b - a)  # the width of each interval
+    s = (fun(a, *args, **kwargs) + fun(b, *args, **kwargs)) / 2 * h
+    while True:
+        # the new points: every other one of the next set
+        # (there aren't any if a == b -- frange needs them different)
+        new_points = frange(a, b, 2 * n)[1::2] if a != b else ()
+        if vectorized:
+            midpoints = array_sum(fun, new_points, *args, **kwargs)
+        else:
+            midpoints = sum(fun(x, *args, **kwargs) for x in new_points)
+        # half the width -- and the new points added in
+        s = (s + midpoints * h) / 2
+        n *= 2
+        h /= 2
+        yield n, s
 
 
-def trapz(fun, a, b, tol=1e-4, *args, **kwargs):
+def trapz(fun, a, b, tol=1e-4, *args, vectorized=None, **kwargs):
     """
     Compute the area under the curve defined by
     y = fun(x), for x between a and b
@@ -91,26 +111,60 @@ def trapz(fun, a, b, tol=1e-4, *args, **kwargs):
 
     :param tol=1e-4: accuracy expected.
 
-    any other arguments will be passed through to fun.
-    """
-    # compute the range
+    :param vectorized=None: call fun with numpy arrays of points, rather
+                            than once for each point. If None, it's used
+                            if fun works that way. (see vectorized.py)
 
+    any other arguments will be passed through to fun -- but not one
+    called vectorized, as trapz() uses that itself (like tol). Pass it
+    positionally, or lock it in with functools.partial.
+    """
+    if a == b:
+        return 0.0
+    vectorized = use_arrays(vectorized, fun, a, b, *args, **kwargs)
     # loop to try varying step sizes until desired accuracey is achieved
-
+    # (each pass only evaluates fun at the new points)
     prev_s = None
-    n = 2  # start with only two steps
-    while True:  # break out when desired accuracy is reached
-        vals = frange(a, b, n)
-        s = sum([fun(x, *args, **kwargs) for x in vals[1:-1]])
-        s += (fun(a, *args, **kwargs) + fun(b, *args, **kwargs)) / 2
-        s *= (b-a) / n
+    for n, s in trapz_refinements(fun, a, b, *args, vectorized=vectorized,
+                                  **kwargs):
         if prev_s is not None:
             # check if we're close enough
             # abs_tol is for comparison to zero
             if isclose(s, prev_s, rel_tol=tol, abs_tol=tol):
                 return s
-        n *= 2
         prev_s = s
         # this could be a more sophisticated criterion
-        if n >= 2**22:  # it's not going to work (about half the precision of a double)
+        if n * 2 >= MAX_STEPS:  # it's not going to work
+            raise ValueError("Solution didn't converge")
+
+
+def romberg(fun, a, b, tol=1e-4, *args, vectorized=None, **kwargs):
+    """
+    Compute the area under the curve defined by
+    y = fun(x), for x between a and b -- with Romberg's method
+
+    The error of the trapezoidal rule goes down by about 4 times each
+    time the number of intervals is doubled. So the error can be
+    estimated from two estimates, and taken out ("Richardson
+    extrapolation") -- and the same again, with the better estimates,
+    and so on. For smooth functions, it converges with far fewer points
+    than the trapezoidal rule alone.
+
+    The parameters are the same as for trapz()
+    """
+    if a == b:
+        return 0.0
+    vectorized = use_arrays(vectorized, fun, a, b, *args, **kwargs)
+    prev_row = []
+    for n, s in trapz_refinements(fun, a, b, *args, vectorized=vectorized,
+                                  **kwargs):
+        row = [s]
+        for k, prev in enumerate(prev_row, start=1):
+            # take out the error term in h**(2k)
+            row.append(row[-1] + (row[-1] - prev) / (4**k - 1))
+        if prev_row:
+            if isclose(row[-1], prev_row[-1], rel_tol=tol, abs_tol=tol):
+                return row[-1]
+        prev_row = row
+        if n * 2 >= MAX_STEPS:
             raise ValueError("Solution didn't converge")
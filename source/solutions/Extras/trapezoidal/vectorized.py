@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+evaluating the function to integrate at lots of points at once
+
+Calling a python function once for each point is slow. If the function
+works with numpy arrays (like quadratic(), which only uses arithmetic)
+it can be called once with an array of all the points instead, which
+is about 100 times faster -- see integrate_numpy in
+examples/threading-multiprocessing/integrate.py
+
+The integrators take a vectorized parameter:
+
+    None: check if the function works with arrays, and use them if it does
+    True: the function works with arrays -- use them
+    False: call the function once for each point
+"""
+
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # it will all work without it -- just slower
+    np = None
+
+# the most points to evaluate at once -- so a huge n doesn't need
+# huge arrays
+CHUNK_SIZE = 2**20
+
+
+def _probe(fun, a, b, *args, **kwargs):
+    xs = [a, (a + b) / 2, b]
+    try:
+        result = fun(np.array(xs, dtype=float), *args, **kwargs)
+        if not isinstance(result, np.ndarray) or result.shape != (len(xs),):
+            # a constant function gives back a single value, for instance
+            return False
+        expected = [fun(x, *args, **kwargs) for x in xs]
+        return bool(np.allclose(result, expected, equal_nan=True))
+    except Exception:
+        # whatever went wrong, calling it once for each point will work
+        # if anything does
+        return False
+
+
+# what accepts_arrays() found for each function -- by the types of the
+# other arguments, as they might make a difference
+_accepts_cache = weakref.WeakKeyDictionary()
+
+
+def accepts_arrays(fun, a, b, *args, **kwargs):
+    """
+    check if fun can be called with an array of x values -- and gives an
+    array of the same results as calling it with each one
+
+    a function that only works for a single number (like math.sin) will
+    raise an Exception, or give back something else.
+
+    This calls fun four times, so the answer is remembered for each
+    function (and the types of the other arguments) -- it's assumed that
+    a function that works with arrays for one interval works for all of
+    them.
+    """
+    if np is None:
+        return False
+    key = (tuple(type(arg) for arg in args),
+           tuple(sorted((name, type(value))
+                        for name, value in kwargs.items())))
+    try:
+        found = _accepts_cache.setdefault(fun, {})
+    except TypeError:  # can't make a weakref to it -- so don't remember
+        found = {}
+    if key not in found:
+        found[key] = _probe(fun, a, b, *args, **kwargs)
+    return found[key]
+
+
+def use_arrays(vectorized, fun, a, b, *args, **kwargs):
+    """
+    work out if arrays should be used, from the vectorized parameter
+    """
+    if vectorized is None:
+        return accepts_arrays(fun, a, b, *args, **kwargs)
+    if vectorized and np is None:
+        raise ValueError("vectorized=True needs numpy")
+    return bool(vectorized)
+
+
+def array_sum(fun, xs, *args, **kwargs):
+    """
+    the sum of fun(x) for x in xs
+
+    :param xs: an frange of the points
+
+    fun is called with arrays of up to CHUNK_SIZE points at a time
+
+    any other arguments will be passed through to fun.
+    """
+    total = 0.0
+    for first in range(0, len(xs), CHUNK_SIZE):
+        total += np.sum(fun(xs[first:first + CHUNK_SIZE].to_array(),
+                            *args, **kwargs))
+    return float(total)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Time to run a challenge on a big donor database: the map() version from
+mailroom_mfr.py, and mailroom_parallel.py with 1, 2, 4 ... processes
+(up to the number of cores), and with numpy, if it's installed.
+
+    python bench_challenge.py [num_donations]
+
+The donations (default 10,000,000) are spread over donors with 10 each.
+"""
+
+import os
+import random
+import sys
+import time
+
+import mailroom_mfr
+import mailroom_parallel
+
+
+def make_db(num_donations, per_donor=10):
+    rand = random.Random(42)
+    return {f"Donor {i}": [round(rand.uniform(1, 1000), 2)
+                           for _ in range(per_donor)]
+            for i in range(num_donations // per_donor)}
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:20s} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    db = make_db(num)
+    print(f"{num} donations, {os.cpu_count()} cores:")
+
+    expected = timed("map()", mailroom_mfr.challenge, db, 2)
+    processes = 1
+    while processes <= os.cpu_count():
+        result = timed(f"{processes} processes",
+                       mailroom_parallel.challenge, db, 2,
+                       processes=processes)
+        assert result == expected
+        processes *= 2
+    if mailroom_parallel.np is not None:
+        result = timed("numpy", mailroom_parallel.challenge_numpy, db, 2)
+        assert result == expected
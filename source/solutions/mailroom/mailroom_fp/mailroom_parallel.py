@@ -3,8 +3,17 @@
 #  http://uwpce-pythoncert.github.io/IntroToPython/exercises/mailroom-fp.html
 
 import glob
+import math
+import os
 import pickle
-import ipyparallel as ipp
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def print_usage():
@@ -94,24 +103,146 @@ def multiplier_factory(factor):
     return func
 
 
-def challenge(db, factor):
-    """ Run a fund raising challenge
+def flatten_donordb(db):
+    """ Put all the donations in one flat array
 
     Args:
         db (dict): the donor database
-        factor (int): challenge multiplier
 
     Returns:
-        dict: a new, updaated donor database
+        list: the donor names
+        array: the number of donations for each donor
+        array: all the donations, donor by donor
     """
+    names = list(db)
+    counts = array('q', (len(db[name]) for name in names))
+    amounts = array('d')
+    for name in names:
+        amounts.extend(db[name])
+    return names, counts, amounts
+
+
+def in_range_factory(min_donation=None, max_donation=None):
+    """
+    A closure to create the filter for the donations a challenge applies to
+
+    Args:
+        min_donation (float): the smallest donation to match, or None
+        max_donation (float): the largest donation to match, or None
+
+    Returns:
+        a function which returns True if its argument is in the range
+    """
+    low = -math.inf if min_donation is None else float(min_donation)
+    high = math.inf if max_donation is None else float(max_donation)
+
+    def func(value):
+        return low <= value <= high
+
+    return func
+
+
+def challenge_donors(donors, factor, min_donation=None, max_donation=None):
+    """ Run a challenge on some of the donors
 
+    Args:
+        donors (dict): some of the donor database
+        factor (int): challenge multiplier
+        min_donation (float): the smallest donation to match, or None
+        max_donation (float): the largest donation to match, or None
+
+    Returns:
+        dict: the new donor database for just those donors -- the ones
+            with no donations in range are left out
+    """
     challenge_multiplier = multiplier_factory(factor)
+    in_range = in_range_factory(min_donation, max_donation)
+    new_db = dict()
+    for name, donations in donors.items():
+        donations = [challenge_multiplier(value)
+                     for value in donations if in_range(value)]
+        if donations:
+            new_db[name] = donations
+    return new_db
+
+
+def challenge_processes(db, factor, min_donation=None, max_donation=None,
+                        processes=None):
+    """ Run a challenge with a pool of processes
+
+    The donors are split up into chunks, and each process makes the new
+    database for its chunk -- so all the parent does is hand out the
+    donors and put the pieces together, which is all done by pickle and
+    dict.update, not Python loops.
+    """
+    processes = processes or os.cpu_count()
+    if processes == 1:
+        return challenge_donors(db, factor, min_donation,
+                                max_donation)
+    new_db = dict()
+    if not db:
+        return new_db
+    # a few chunks per process, so they all keep busy
+    chunk_size = -(-len(db) // (processes * 4))
+    donors = iter(db.items())
+    with ProcessPoolExecutor(processes) as pool:
+        jobs = [pool.submit(challenge_donors,
+                            dict(islice(donors, chunk_size)),
+                            factor, min_donation, max_donation)
+                for _ in range(0, len(db), chunk_size)]
+        for job in jobs:
+            new_db.update(job.result())
+    return new_db
+
+
+def challenge_numpy(db, factor, min_donation=None, max_donation=None):
+    """ Run a challenge on all the donations at once with numpy
+    """
+    names, counts, amounts = flatten_donordb(db)
+    amounts = np.frombuffer(amounts, dtype=np.float64)
+    in_range = np.ones(len(amounts), dtype=bool)
+    if min_donation is not None:
+        in_range &= amounts >= float(min_donation)
+    if max_donation is not None:
+        in_range &= amounts <= float(max_donation)
+    donor_ids = np.repeat(np.arange(len(names)), counts)
+    new_amounts = amounts[in_range] * int(factor)
+    new_counts = np.bincount(donor_ids[in_range], minlength=len(names))
+
+    new_db = dict()
+    start = 0
+    for name, count in zip(names, new_counts.tolist()):
+        if count:
+            new_db[name] = new_amounts[start:start + count].tolist()
+        start += count
+    return new_db
+
+
+def challenge(db, factor, min_donation=None, max_donation=None,
+              processes=None):
+    """ Run a fund raising challenge
 
-    # Distributed map operation via ipyparallel
-    for donor in db:
-        c = ipp.Client()
-        c[:].apply_sync(challenge_multiplier, db[donor])
-    return db
+    Only the donations from min_donation to max_donation are matched --
+    the new database has just those, multiplied by factor.
+
+    Args:
+        db (dict): the donor database
+        factor (int): challenge multiplier
+        min_donation (float): the smallest donation to match, or None
+        max_donation (float): the largest donation to match, or None
+        processes (int): the number of processes to use. If None, numpy
+            is used if it's there, otherwise a process for each core.
+
+    Returns:
+        dict: a new, updated donor database
+    """
+
+    if multiplier_factory(factor) is None:
+        return db
+    if processes is None and np is not None:
+        return challenge_numpy(db, factor, min_donation, max_donation)
+    return challenge_processes(db, factor, min_donation, max_donation,
+                               processes)
 
 
 def print_db(db):
@@ -9,6 +9,8 @@ from mailroom_parallel import (
     load_donordb,
     add_donation,
     tally_report,
+    challenge,
+    flatten_donordb,
 )
 
 
@@ -38,3 +40,52 @@ def test_tally_report(db):
     assert donation_total == sum(db[doner])
     assert num_gifts == len(db[doner])
     assert average_gift == donation_total / num_gifts
+
+
+@pytest.fixture
+def challenge_db():
+    return {"Aristotle": [384.0, 322.0],
+            "Kant": [1724.0, 1804.0, 1785.0],
+            "Locke": [1632.0],
+            "Russell": [1872.0, 1970.0, 1950.0],
+            "Dennett": [1942.0],
+            }
+
+
+@pytest.mark.parametrize("processes", [None, 1, 2])
+def test_challenge(challenge_db, processes):
+    new_db = challenge(challenge_db, 2, processes=processes)
+
+    assert new_db == {name: [value * 2 for value in donations]
+                      for name, donations in challenge_db.items()}
+    # the original is not changed
+    assert challenge_db["Locke"] == [1632.0]
+
+
+@pytest.mark.parametrize("processes", [None, 1, 2])
+def test_challenge_min_max(challenge_db, processes):
+    new_db = challenge(challenge_db, 3, min_donation=1000,
+                       max_donation=1900, processes=processes)
+
+    assert new_db == {"Kant": [5172.0, 5412.0, 5355.0],
+                      "Locke": [4896.0],
+                      "Russell": [5616.0],
+                      }
+
+
+def test_challenge_bad_factor(challenge_db):
+    assert challenge(challenge_db, 0) is challenge_db
+
+
+def test_challenge_empty():
+    assert challenge({}, 2, processes=2) == {}
+    assert challenge({"Nobody": [10.0]}, 2, min_donation=100) == {}
+
+
+def test_flatten(challenge_db):
+    names, counts, amounts = flatten_donordb(challenge_db)
+
+    assert names == list(challenge_db)
+    assert list(counts) == [2, 3, 1, 3, 1]
+    assert list(amounts) == [value for donations in challenge_db.values()
+                             for value in donations]
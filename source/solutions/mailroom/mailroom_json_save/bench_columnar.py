@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+Memory use and timing of the regular DonorDB and the ColumnarDonorDB
+
+    python bench_columnar.py [num_donors]
+
+num_donors defaults to 100,000, each with 1 to 40 donations.
+
+The memory is what the DB takes, as measured by tracemalloc. The report
+and projection are timed from scratch (for the columnar DB, that
+includes the group-by).
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from mailroom.model import Donor, DonorDB
+from mailroom.columnar import ColumnarDonorDB, np
+
+
+def make_donors(num_donors):
+    rand = random.Random(42)
+    for i in range(num_donors):
+        donations = [round(rand.uniform(1, 1000), 2)
+                     for _ in range(rand.randint(1, 40))]
+        yield Donor(f"Donor {i:07d}", donations)
+
+
+def measure_memory(make, *args):
+    tracemalloc.start()
+    db = make(*args)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return db, memory
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def projection(db):
+    # the regular DonorDB doesn't have one -- so loop through the donors
+    return sum(amount * 2 for donor in db.donors
+               for amount in donor.donations if 50 <= amount <= 500)
+
+
+def columnar_report(db):
+    db._groups = None
+    db.generate_donor_report()
+
+
+def columnar_projection(db):
+    db.projection(2, 50, 500)
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{num} donors (numpy {'is' if np else 'is not'} installed):")
+    print(f"{'':10s} {'memory':>10s} {'report':>9s} {'projection':>11s}")
+
+    db, memory = measure_memory(lambda: DonorDB(make_donors(num)))
+    print(f"{'DonorDB':10s} {memory / 2**20:7.1f} MB "
+          f"{timed(db.generate_donor_report):7.2f} s "
+          f"{timed(projection, db):9.2f} s")
+
+    columnar, memory = measure_memory(ColumnarDonorDB.from_donor_db, db)
+    del db
+    print(f"{'columnar':10s} {memory / 2**20:7.1f} MB "
+          f"{timed(columnar_report, columnar):7.2f} s "
+          f"{timed(columnar_projection, columnar):9.2f} s")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""
+Size and speed of saving the donor data as JSON or in the binary format
+
+    python bench_formats.py [num_donors]
+
+Uses the sample data that comes with mailroom, and a made-up DB with
+num_donors donors (default 100000), each with 1 to 40 donations.
+"""
+
+import random
+import sys
+import time
+
+from json_save import codec
+
+from mailroom import data_dir
+from mailroom.model import Donor, DonorDB
+
+
+def make_db(num_donors):
+    rand = random.Random(42)
+    donors = []
+    for i in range(num_donors):
+        donations = [round(rand.uniform(1, 1000), 2)
+                     for _ in range(rand.randint(1, 40))]
+        donors.append(Donor(f"Donor {i:07d}", donations))
+    return DonorDB(donors)
+
+
+def best_time(func, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def compare(label, db):
+    print(f"{label}:")
+    print(f"{'':8s} {'size':>12s} {'save':>11s} {'load':>11s}")
+    for name in ("json", "binary"):
+        save_time, data = best_time(codec.dumps, db, name)
+        load_time, db2 = best_time(codec.loads, data, name)
+        assert db2 == db
+        print(f"{name:8s} {len(data):12,d} {save_time * 1000:9.2f}ms "
+              f"{load_time * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    num_donors = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    compare("mailroom sample data",
+            DonorDB.load(data_dir / "mailroom_data.json"))
+    compare(f"{num_donors} donors", make_db(num_donors))
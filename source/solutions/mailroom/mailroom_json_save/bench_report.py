@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""
+Timing and memory use of the different ways to make the donor report
+
+    python bench_report.py [num_donors]
+
+num_donors defaults to a million.
+
+The memory is the peak memory allocated while making the report (on top
+of the DonorDB itself), as measured by tracemalloc -- which slows things
+down a lot, so the times are measured in a separate run.
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from mailroom.model import Donor, DonorDB
+
+
+def make_db(num_donors):
+    rand = random.Random(42)
+    donors = []
+    for i in range(num_donors):
+        donations = [round(rand.uniform(1, 1000), 2)
+                     for _ in range(rand.randint(1, 5))]
+        donors.append(Donor(f"Donor {i:07d}", donations))
+    return DonorDB(donors)
+
+
+def make_report(db, write, chunk_size):
+    if write:
+        with open(os.devnull, 'w') as outfile:
+            db.write_donor_report(outfile, chunk_size)
+    else:
+        db.generate_donor_report()
+
+
+def bench(db, label, write=True, chunk_size=None):
+    start = time.perf_counter()
+    make_report(db, write, chunk_size)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    make_report(db, write, chunk_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{label:40s} {elapsed:7.2f} s {peak / 2**20:9.1f} MB")
+
+
+if __name__ == "__main__":
+    num_donors = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"Building a DonorDB with {num_donors} donors")
+    db = make_db(num_donors)
+
+    bench(db, "generate_donor_report", write=False)
+    bench(db, "write_donor_report")
+    bench(db, "write_donor_report, chunk_size=100000", chunk_size=100000)
+    db.indexes  # the index is built once, and then kept up to date
+    bench(db, "write_donor_report, with the indexes")
@@ -0,0 +1,509 @@
+#!/usr/bin/env python
+"""
+A columnar donor store.
+
+The regular DonorDB keeps a Donor object for each donor, each with its
+own list of donations -- that's a lot of little Python objects, and
+adding them all up for a report means looping over every one of them.
+
+This keeps all the donations in three flat arrays, one entry per
+donation:
+
+ * donor_id: the donor that made it (its index in the names list)
+ * amount: how much it was
+ * timestamp: when it was made
+
+and presents the same API as DonorDB and Donor, with DonorView objects
+that look up their donations in the arrays.
+
+The per-donor numbers (totals, averages, ...) are all computed at once,
+with a "group-by" on donor_id -- with numpy, if it is installed, or with
+one pass through the arrays if not. The results are kept until the next
+change.
+"""
+
+import math
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .model import Donor, DonorDB
+from .letters import LETTER_TEMPLATE, save_letters
+
+
+class DonorGroups:
+    """
+    the donations grouped by donor
+
+    order: the positions of the donations, donor by donor -- and in the
+           order they were made for each donor
+
+    starts: where each donor's donations start in order (with the end
+            of the last one at the end)
+
+    and the count, total, min, max and last donation of each donor
+    (min, max and last are NaN for a donor with no donations)
+    """
+
+    def __init__(self, order, starts, counts, totals, mins, maxes, lasts):
+        self.order = order
+        self.starts = starts
+        self.counts = counts
+        self.totals = totals
+        self.mins = mins
+        self.maxes = maxes
+        self.lasts = lasts
+
+    @classmethod
+    def from_arrays(cls, num_donors, donor_id, amount):
+        if np is not None:
+            return cls._numpy_groups(num_donors, donor_id, amount)
+        return cls._python_groups(num_donors, donor_id, amount)
+
+    @classmethod
+    def _numpy_groups(cls, num_donors, donor_id, amount):
+        ids = np.frombuffer(donor_id, dtype=np.int64)
+        amounts = np.frombuffer(amount, dtype=np.float64)
+        # a stable sort keeps each donor's donations in order
+        order = np.argsort(ids, kind="stable")
+        counts = np.bincount(ids, minlength=num_donors)
+        starts = np.zeros(num_donors + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        totals = np.bincount(ids, weights=amounts, minlength=num_donors)
+
+        mins = np.full(num_donors, np.nan)
+        maxes = np.full(num_donors, np.nan)
+        lasts = np.full(num_donors, np.nan)
+        given = counts > 0
+        if given.any():
+            grouped = amounts[order]
+            group_starts = starts[:-1][given]
+            mins[given] = np.minimum.reduceat(grouped, group_starts)
+            maxes[given] = np.maximum.reduceat(grouped, group_starts)
+            lasts[given] = grouped[starts[1:][given] - 1]
+        return cls(order, starts, counts, totals, mins, maxes, lasts)
+
+    @classmethod
+    def _python_groups(cls, num_donors, donor_id, amount):
+        counts = [0] * num_donors
+        totals = [0.0] * num_donors
+        mins = [math.nan] * num_donors
+        maxes = [math.nan] * num_donors
+        lasts = [math.nan] * num_donors
+        for i, value in zip(donor_id, amount):
+            counts[i] += 1
+            totals[i] += value
+            # NaN compares False, so the first one always replaces it
+            if not value >= mins[i]:
+                mins[i] = value
+            if not value <= maxes[i]:
+                maxes[i] = value
+            lasts[i] = value
+
+        starts = [0] * (num_donors + 1)
+        for i, count in enumerate(counts):
+            starts[i + 1] = starts[i] + count
+        # a counting sort -- by donor, then in the order they were made
+        order = array('q', bytes(8 * len(amount)))
+        next_pos = starts[:-1]
+        for pos, i in enumerate(donor_id):
+            order[next_pos[i]] = pos
+            next_pos[i] += 1
+        return cls(order, starts, counts, totals, mins, maxes, lasts)
+
+
+class DonationsView:
+    """
+    a donor's donations, in the order they were made -- read from the
+    columnar arrays
+
+    works like a (read-only) list
+    """
+
+    def __init__(self, donor_db, donor_id, column="amount"):
+        self._db = donor_db
+        self._id = donor_id
+        self._column = column
+
+    def _positions(self):
+        groups = self._db.groups
+        return groups.order[groups.starts[self._id]:
+                            groups.starts[self._id + 1]]
+
+    def __len__(self):
+        return int(self._db.groups.counts[self._id])
+
+    def __getitem__(self, index):
+        column = getattr(self._db, self._column)
+        positions = self._positions()
+        if isinstance(index, slice):
+            return [column[pos] for pos in positions[index]]
+        return column[positions[index]]
+
+    def __iter__(self):
+        column = getattr(self._db, self._column)
+        return (column[pos] for pos in self._positions())
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class DonorView:
+    """
+    A donor in a ColumnarDonorDB
+
+    Has the same API as a Donor, but all the data is in the DB's arrays.
+    """
+    __slots__ = ("_db", "_id")
+
+    normalize_name = staticmethod(Donor.normalize_name)
+
+    def __init__(self, donor_db, donor_id):
+        self._db = donor_db
+        self._id = donor_id
+
+    def __str__(self):
+        msg = (f"Donor: {self.name}, with {self.num_donations:d} "
+               f"donations, totaling: ${self.total_donations:.2f}")
+        return msg
+
+    def __eq__(self, other):
+        if not isinstance(other, DonorView):
+            return NotImplemented
+        return self._db is other._db and self._id == other._id
+
+    def __hash__(self):
+        return hash((id(self._db), self._id))
+
+    @property
+    def name(self):
+        return self._db.names[self._id]
+
+    @property
+    def norm_name(self):
+        return self.normalize_name(self.name)
+
+    @property
+    def donations(self):
+        return DonationsView(self._db, self._id)
+
+    @property
+    def timestamps(self):
+        """
+        when each donation was made -- seconds since the epoch
+        """
+        return DonationsView(self._db, self._id, "timestamp")
+
+    def _stat(self, name):
+        value = getattr(self._db.groups, name)[self._id]
+        return None if math.isnan(value) else float(value)
+
+    @property
+    def last_donation(self):
+        """
+        The most recent donation made
+        """
+        return self._stat("lasts")
+
+    @property
+    def total_donations(self):
+        return float(self._db.groups.totals[self._id])
+
+    @property
+    def num_donations(self):
+        return int(self._db.groups.counts[self._id])
+
+    @property
+    def average_donation(self):
+        return self.total_donations / self.num_donations
+
+    @property
+    def min_donation(self):
+        """
+        The smallest donation made
+        """
+        return self._stat("mins")
+
+    @property
+    def max_donation(self):
+        """
+        The largest donation made
+        """
+        return self._stat("maxes")
+
+    def add_donation(self, amount, timestamp=None):
+        """
+        add a new donation
+        """
+        self._db.add_donation(self._id, amount, timestamp)
+
+    def gen_letter(self):
+        """
+        Generate a thank you letter for the donor
+        """
+        return LETTER_TEMPLATE.format(self.name, self.last_donation)
+
+
+class ColumnarDonorDB:
+    """
+    A donor database with all the donations in flat arrays
+
+    Has the same API for finding donors and making reports as DonorDB.
+    """
+    REPORT_HEADER = DonorDB.REPORT_HEADER
+    REPORT_ROW = DonorDB.REPORT_ROW
+    sort_key = staticmethod(DonorDB.sort_key)
+
+    def __init__(self, donors=None):
+        """
+        Initialize a new donor database
+
+        :param donors=None: iterable of Donor objects (or DonorViews)
+        """
+        self.names = []
+        self._ids = {}  # normalized name: donor id
+        self.donor_id = array('q')
+        self.amount = array('d')
+        self.timestamp = array('d')
+        self._groups = None
+        if donors is not None:
+            for donor in donors:
+                self.add_donor(donor)
+
+    @classmethod
+    def from_donor_db(cls, donor_db):
+        """
+        make a columnar copy of a regular DonorDB
+        """
+        return cls(donor_db.donors)
+
+    def to_donor_db(self, db_file=None):
+        """
+        make a regular DonorDB from this one
+        """
+        return DonorDB((Donor(donor.name, donor.donations)
+                        for donor in self.donors), db_file=db_file)
+
+    @property
+    def groups(self):
+        """
+        the DonorGroups -- worked out again after any change
+        """
+        if self._groups is None:
+            self._groups = DonorGroups.from_arrays(len(self.names),
+                                                   self.donor_id,
+                                                   self.amount)
+        return self._groups
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def donors(self):
+        """
+        an iterable of all the donors
+        """
+        return (DonorView(self, i) for i in range(len(self.names)))
+
+    def add_donor(self, donor):
+        """
+        Add a new donor to the donor db
+
+        :param donor: the name of the donor (or a Donor, whose donations
+                      are added too)
+
+        :returns: The new or existing DonorView
+        """
+        if isinstance(donor, (Donor, DonorView)):
+            view = self.add_donor(donor.name)
+            for amount in donor.donations:
+                self.add_donation(view._id, amount)
+            return view
+        name = donor.strip()
+        norm_name = Donor.normalize_name(name)
+        donor_id = self._ids.get(norm_name)
+        if donor_id is None:
+            donor_id = self._ids[norm_name] = len(self.names)
+            self.names.append(name)
+            self._groups = None
+        return DonorView(self, donor_id)
+
+    def add_donation(self, donor_id, amount, timestamp=None):
+        """
+        add a donation for a donor
+
+        :param donor_id: the id of the donor (DonorView._id)
+
+        :param timestamp=None: when it was made -- now, if None
+        """
+        amount = float(amount)
+        if amount <= 0.0:
+            raise ValueError("Donation must be greater than zero")
+        self.donor_id.append(donor_id)
+        self.amount.append(amount)
+        self.timestamp.append(time.time() if timestamp is None
+                              else timestamp)
+        self._groups = None
+
+    def find_donor(self, name):
+        """
+        find a donor in the donor db
+
+        :returns: The DonorView -- None if not there
+        """
+        donor_id = self._ids.get(Donor.normalize_name(name))
+        return None if donor_id is None else DonorView(self, donor_id)
+
+    def list_donors(self):
+        """
+        creates a list of the donors as a string, so they can be printed
+        """
+        return "\n".join(["Donor list:"] + self.names)
+
+    def top_donors(self, n):
+        """
+        the n donors that have given the most
+
+        :returns: a list of DonorViews, largest total first
+        """
+        totals = self.groups.totals
+        if np is not None:
+            top = np.argsort(-totals, kind="stable")[:n].tolist()
+        else:
+            top = sorted(range(len(totals)), key=totals.__getitem__,
+                         reverse=True)[:n]
+        return [DonorView(self, i) for i in top]
+
+    def report_rows(self):
+        """
+        the rows of the report: (total, normalized name, name, number of
+        donations, average donation) for each donor, unsorted
+        """
+        groups = self.groups
+        if np is not None:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                averages = (groups.totals / groups.counts).tolist()
+            totals = groups.totals.tolist()
+            counts = groups.counts.tolist()
+        else:
+            totals, counts = groups.totals, groups.counts
+            averages = [total / count if count else math.nan
+                        for total, count in zip(totals, counts)]
+        return [(total, Donor.normalize_name(name), name, count, average)
+                for total, name, count, average
+                in zip(totals, self.names, counts, averages)]
+
+    def iter_donor_report(self):
+        """
+        Generate the report of the donors and amounts donated, a line
+        at a time -- sorted by total given (and then by name)
+        """
+        yield self.REPORT_HEADER
+        yield "-" * 66
+        for total, norm_name, name, num, average in sorted(
+                self.report_rows(), key=self.sort_key):
+            yield self.REPORT_ROW.format(name, total, num, average)
+
+    def write_donor_report(self, outfile):
+        for line in self.iter_donor_report():
+            outfile.write(line + "\n")
+
+    def generate_donor_report(self):
+        """
+        Generate the report of the donors and amounts donated.
+
+        :returns: the donor report as a string.
+        """
+        return "\n".join(self.iter_donor_report())
+
+    def save_letters_to_disk(self, directory=".", archive=None, **kwargs):
+        """
+        make a letter for each donor, and save it to disk.
+
+        see DonorDB.save_letters_to_disk
+        """
+        print("Saving letters:")
+        return save_letters(self.donors, directory, archive, **kwargs)
+
+    def _matching(self, min_donation=None, max_donation=None):
+        """
+        which donations are between min_donation and max_donation
+        """
+        low = -math.inf if min_donation is None else float(min_donation)
+        high = math.inf if max_donation is None else float(max_donation)
+        if np is not None:
+            amounts = np.frombuffer(self.amount, dtype=np.float64)
+            return (amounts >= low) & (amounts <= high)
+        return [low <= value <= high for value in self.amount]
+
+    def projected_totals(self, factor, min_donation=None, max_donation=None):
+        """
+        how much each donor would give in a challenge: their donations
+        from min_donation to max_donation, multiplied by factor
+
+        :returns: the projected total of each donor, by donor id
+        """
+        matching = self._matching(min_donation, max_donation)
+        if np is not None:
+            ids = np.frombuffer(self.donor_id, dtype=np.int64)
+            amounts = np.frombuffer(self.amount, dtype=np.float64)
+            return np.bincount(ids, weights=amounts * matching * factor,
+                               minlength=len(self.names))
+        totals = [0.0] * len(self.names)
+        for i, value, match in zip(self.donor_id, self.amount, matching):
+            if match:
+                totals[i] += value * factor
+        return totals
+
+    def projection(self, factor, min_donation=None, max_donation=None):
+        """
+        the total a challenge would bring in
+
+        see projected_totals
+        """
+        return float(sum(self.projected_totals(factor, min_donation,
+                                               max_donation)))
+
+    def challenge(self, factor, min_donation=None, max_donation=None):
+        """
+        Run a challenge: a new DB with the donations from min_donation to
+        max_donation, multiplied by factor.
+
+        Donors with no matching donations are left out.
+        """
+        matching = self._matching(min_donation, max_donation)
+        new_db = type(self)()
+        if np is not None:
+            ids = np.frombuffer(self.donor_id, dtype=np.int64)[matching]
+            # renumber the donors that are left
+            kept, new_ids = np.unique(ids, return_inverse=True)
+            new_db.names = [self.names[i] for i in kept.tolist()]
+            new_db.donor_id = array('q', new_ids.astype(np.int64).tobytes())
+            new_db.amount = array('d', (np.frombuffer(
+                self.amount, dtype=np.float64)[matching] * factor).tobytes())
+            new_db.timestamp = array('d', np.frombuffer(
+                self.timestamp, dtype=np.float64)[matching].tobytes())
+        else:
+            kept = sorted({i for i, match in zip(self.donor_id, matching)
+                           if match})
+            new_ids = {i: new_id for new_id, i in enumerate(kept)}
+            new_db.names = [self.names[i] for i in kept]
+            for i, value, timestamp, match in zip(self.donor_id, self.amount,
+                                                  self.timestamp, matching):
+                if match:
+                    new_db.donor_id.append(new_ids[i])
+                    new_db.amount.append(value * factor)
+                    new_db.timestamp.append(timestamp)
+        new_db._ids = {Donor.normalize_name(name): i
+                       for i, name in enumerate(new_db.names)}
+        return new_db
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+Indexes for fast donor lookups.
+
+The DonorDB stores the donors in a dict keyed by normalized name, which
+is great for exact lookups, but anything else means looking at every
+donor. This keeps a few extra data structures so that the common queries
+from the UI are fast:
+
+ * a sorted list of names -- for finding names that start with a prefix
+ * a "trigram" index: the set of names that have each three letter
+   sequence in them -- for finding names that are close to a misspelled
+   name
+ * a sorted list of (total, name) -- for the top donors by total given
+
+For the fuzzy search, the number of trigrams in each name is kept too,
+so names too long or too short to be a close match can be skipped
+without looking at them.
+
+The DonorDB keeps it up to date as donors and donations are added.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+
+def name_trigrams(name):
+    """
+    the set of three-character sequences in a (normalized) name
+
+    padded with spaces, so the start and end of the name count for more
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DonorIndex:
+    """
+    Secondary indexes on a collection of donors
+    """
+
+    def __init__(self, donors=()):
+        """
+        build the indexes
+
+        :param donors=(): iterable of Donor objects to index
+        """
+        self.trigrams = {}  # trigram: set of normalized names
+        self.totals = {}  # normalized name: total used in by_total
+        self.num_trigrams = {}  # normalized name: number of trigrams
+        for donor in donors:
+            name = donor.norm_name
+            self.totals[name] = donor.total_donations
+            self._add_trigrams(name)
+        # sorting it all at once is a lot faster than inserting one by one
+        self.names = sorted(self.totals)  # sorted normalized names
+        # sorted (-total, normalized name) -- negative, so biggest is first
+        self.by_total = sorted((-total, name)
+                               for name, total in self.totals.items())
+
+    def update(self, donor):
+        """
+        add a donor to the indexes -- or update it if it's already there
+        """
+        name = donor.norm_name
+        total = donor.total_donations
+        if name in self.totals:
+            if self.totals[name] == total:
+                return
+            # take the old total out
+            del self.by_total[bisect_left(self.by_total,
+                                          (-self.totals[name], name))]
+        else:
+            insort(self.names, name)
+            self._add_trigrams(name)
+        # negative, so the biggest come first
+        insort(self.by_total, (-total, name))
+        self.totals[name] = total
+
+    def _add_trigrams(self, name):
+        trigrams = name_trigrams(name)
+        self.num_trigrams[name] = len(trigrams)
+        for trigram in trigrams:
+            self.trigrams.setdefault(trigram, set()).add(name)
+
+    def prefix(self, prefix, limit=None):
+        """
+        the normalized names that start with prefix, in sorted order
+
+        :param prefix: the start of the name -- should be normalized
+
+        :param limit=None: the maximum number of names to return
+        """
+        results = []
+        for i in range(bisect_left(self.names, prefix), len(self.names)):
+            if not self.names[i].startswith(prefix):
+                break
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(self.names[i])
+        return results
+
+    def fuzzy(self, name, limit=10, min_score=0.3):
+        """
+        the normalized names most like name, best match first
+
+        The score is the fraction of trigrams the names have in common:
+        1.0 is a perfect match.
+
+        :param name: the name to look for -- should be normalized
+
+        :param limit=10: the maximum number of names to return
+
+        :param min_score=0.3: don't return names with a lower score
+        """
+        query = name_trigrams(name)
+        size = len(query)
+        # a name with min_score has at least this many trigrams in common
+        # (the small bit is for rounding errors, so none are missed)
+        need = max(1, math.ceil(min_score * size - 1e-9))
+        # so it has to have one of the rarest (size - need + 1) of them --
+        # the sets of names for the very common ones don't need looking
+        # through, only looking in
+        postings = sorted((self.trigrams.get(trigram, set())
+                           for trigram in query), key=len)
+        rare = size - need + 1
+        # and the sizes can't be too different
+        shortest = min_score * size - 1e-9
+        longest = size / min_score + 1e-9 if min_score > 0 else math.inf
+
+        num_trigrams = self.num_trigrams
+        common = {}
+        for names in postings[:rare]:
+            for match in names:
+                common[match] = common.get(match, 0) + 1
+        common = {match: count for match, count in common.items()
+                  if shortest <= num_trigrams[match] <= longest}
+        for names in postings[rare:]:
+            for match in common:
+                if match in names:
+                    common[match] += 1
+
+        scored = []
+        for match, count in common.items():
+            score = count / (size + num_trigrams[match] - count)
+            if score >= min_score:
+                scored.append((-score, match))
+        scored.sort()
+        return [match for score, match in scored[:limit]]
+
+    def top(self, n):
+        """
+        the normalized names of the n donors that have given the most
+        """
+        return [name for total, name in self.by_total[:n]]
+
+    def ascending_totals(self):
+        """
+        yield the normalized names from the smallest total up
+
+        donors with the same total come out in name order
+        """
+        by_total = self.by_total
+        end = len(by_total)
+        while end > 0:
+            # find the start of the group with the same total --
+            # (-total,) sorts before any (-total, name)
+            start = bisect_left(by_total, (by_total[end - 1][0],), 0, end)
+            for i in range(start, end):
+                yield by_total[i][1]
+            end = start
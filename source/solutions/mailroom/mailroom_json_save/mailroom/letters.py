@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+"""
+Writing lots of thank you letters at once.
+
+Donor.gen_letter is fine for one letter, but the year-end run writes a
+letter to every donor -- hundreds of thousands of them. So this:
+
+ * dedents the template once, rather than for every letter
+ * renders the letters in chunks, in a pool of worker processes
+ * writes the files with a small pool of threads, so there are never
+   more than max_open_files files open at once
+ * or puts them all in a single zip or tar file
+ * reports how far along it is, and how fast it's going
+"""
+
+import io
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from pathlib import Path
+from textwrap import dedent
+
+LETTER_TEMPLATE = dedent('''Dear {0:s},
+
+              Thank you for your very kind donation of ${1:.2f}.
+              It will be put to very good use.
+
+                             Sincerely,
+                                -The Team
+              ''')
+
+
+def letter_filename(name):
+    """
+    the file name for a donor's letter
+    """
+    # I don't like spaces in filenames...
+    return name.replace(" ", "_") + ".txt"
+
+
+def render_letters(donors):
+    """
+    render the letters for a chunk of donors
+
+    :param donors: a list of (name, last_donation) tuples -- rather than
+                   Donor objects, so they are quick to pass to a worker
+                   process
+
+    :returns: a list of (filename, letter) tuples
+    """
+    template = LETTER_TEMPLATE
+    return [(letter_filename(name), template.format(name, amount))
+            for name, amount in donors]
+
+
+def _write_files(directory, letters):
+    for filename, letter in letters:
+        with open(directory / filename, 'w') as outfile:
+            outfile.write(letter)
+
+
+class _DirectoryWriter:
+    """
+    writes letters to files in a directory, with a pool of threads
+    """
+
+    def __init__(self, directory, max_open_files):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_open_files = max_open_files
+        self.executor = ThreadPoolExecutor(max_open_files)
+        self.pending = []
+
+    def write(self, letters):
+        # don't let the rendered letters pile up faster than they can
+        # be written
+        if len(self.pending) >= 2 * self.max_open_files:
+            self.pending.pop(0).result()
+        self.pending.append(self.executor.submit(_write_files,
+                                                 self.directory, letters))
+
+    def close(self):
+        for future in self.pending:
+            future.result()
+        self.executor.shutdown()
+
+
+class _ZipWriter:
+    def __init__(self, archive):
+        self.archive = zipfile.ZipFile(archive, 'w',
+                                       compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, letters):
+        for filename, letter in letters:
+            self.archive.writestr(filename, letter)
+
+    def close(self):
+        self.archive.close()
+
+
+class _TarWriter:
+    def __init__(self, archive):
+        name = str(archive)
+        compressed = name.endswith(".tar.gz") or name.endswith(".tgz")
+        self.archive = tarfile.open(archive, 'w:gz' if compressed else 'w')
+        self.mtime = time.time()
+
+    def write(self, letters):
+        for filename, letter in letters:
+            data = letter.encode("utf-8")
+            info = tarfile.TarInfo(filename)
+            info.size = len(data)
+            info.mtime = self.mtime
+            self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+
+def print_progress(done, total, seconds):
+    """
+    the default progress report: letters done, and letters per second
+    """
+    rate = done / seconds if seconds else 0
+    print(f"Saved {done} of {total} letters ({rate:.0f} letters/s)",
+          end="\n" if done == total else "\r", flush=True)
+
+
+def save_letters(donors, directory=".", archive=None, processes=None,
+                 chunk_size=1000, max_open_files=8, progress=print_progress):
+    """
+    write a thank you letter for each donor
+
+    :param donors: an iterable of Donor objects
+
+    :param directory=".": the directory to write the letters to
+
+    :param archive=None: the name of a zip or tar file to put all the
+                         letters in, rather than writing them to directory
+                         (.zip, .tar, .tar.gz or .tgz)
+
+    :param processes=None: the number of worker processes to render the
+                           letters with -- defaults to the number of cores.
+                           With 1, or only one chunk, no pool is used.
+
+    :param chunk_size=1000: the number of letters handed to a worker at once
+
+    :param max_open_files=8: the most files to have open at once
+
+    :param progress=print_progress: called with (done, total, seconds)
+                                    after each chunk -- or None for quiet
+
+    :returns: (number of letters, seconds taken)
+    """
+    start = time.perf_counter()
+    jobs = [(donor.name, donor.last_donation) for donor in donors]
+    total = len(jobs)
+    chunks = [jobs[i:i + chunk_size] for i in range(0, total, chunk_size)]
+
+    if archive is None:
+        writer = _DirectoryWriter(directory, max_open_files)
+    elif str(archive).endswith(".zip"):
+        writer = _ZipWriter(archive)
+    elif str(archive).endswith((".tar", ".tar.gz", ".tgz")):
+        writer = _TarWriter(archive)
+    else:
+        raise ValueError(f"Don't know what kind of archive {archive} is: "
+                         "it should end in .zip, .tar, .tar.gz or .tgz")
+
+    pool = None
+    if processes != 1 and len(chunks) > 1:
+        pool = Pool(processes)
+        rendered = pool.imap(render_letters, chunks)
+    else:
+        rendered = map(render_letters, chunks)
+
+    done = 0
+    try:
+        for letters in rendered:
+            writer.write(letters)
+            done += len(letters)
+            if progress is not None:
+                progress(done, total, time.perf_counter() - start)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return total, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # write letters for a lot of made up donors, to see how fast it goes
+    import sys
+    import tempfile
+
+    from mailroom.model import Donor
+
+    num_donors = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    donors = [Donor(f"Donor {i}", [i % 1000 + 0.5]) for i in range(num_donors)]
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        for archive in (None, "letters.zip", "letters.tar"):
+            if archive is not None:
+                archive = os.path.join(tempdir, archive)
+            print("Writing to", archive or "files")
+            count, seconds = save_letters(donors, tempdir, archive)
+            print(f"{count} letters in {seconds:.2f} s")
@@ -7,14 +7,54 @@ This is where the program logic is.
 This version has been made Object Oriented.
 """
 
-# handy utility to make pretty printing easier
-from textwrap import dedent
 from pathlib import Path
+from itertools import islice
+import heapq
+import os
+import tempfile
+import threading
 
 import json_save.json_save_dec as js
 import json
 
 from . import data_dir
+from .donor_index import DonorIndex
+from .letters import LETTER_TEMPLATE, save_letters
+
+
+class DonationStats:
+    """
+    running aggregates of a donor's donations
+
+    These are kept up to date as donations are added, so the totals
+    don't need to be re-computed from the whole list every time.
+    """
+
+    def __init__(self, donations):
+        """
+        compute the stats for an existing list of donations
+
+        :param donations: the list of donations -- a reference is kept,
+                          so it can be checked if it's been changed.
+        """
+        self.donations = donations
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.last = None
+        for amount in donations:
+            self.add(amount)
+
+    def add(self, amount):
+        """
+        update the stats with one more donation
+        """
+        self.count += 1
+        self.total += amount
+        self.min = amount if self.min is None else min(self.min, amount)
+        self.max = amount if self.max is None else max(self.max, amount)
+        self.last = amount
 
 
 @js.json_save
@@ -38,7 +78,6 @@ class Donor:
         :param donations=None: iterable of past donations
         """
 
-        self.norm_name = self.normalize_name(name)
         self.name = name.strip()
         if donations is None:
             self.donations = []
@@ -63,12 +102,11 @@ class Donor:
         # note that this is expecting to decorate a method
         # so self will be the first argument
         def wrapped(self, *args, **kwargs):
-            print("wrapped method called")
-            print(self)
-            print(self._donor_db)
             res = method(self, *args, **kwargs)
             if self._donor_db is not None:
-                self._donor_db.save()
+                self._donor_db.update_indexes(self)
+                self._donor_db.record_change(method.__name__, args,
+                                             donor=self)
             return res
         return wrapped
 
@@ -81,38 +119,75 @@ class Donor:
         """
         return name.lower().strip()
 
+    @property
+    def norm_name(self):
+        """
+        The normalized name -- the key for this donor in the DonorDB
+
+        A property, so that it's there for Donors loaded from JSON too.
+        """
+        return self.normalize_name(self.name)
+
+    @property
+    def _stats(self):
+        """
+        The running stats of the donations
+
+        They are only computed from scratch if the donations list has been
+        replaced, or changed other than with add_donation -- as happens
+        when a Donor is loaded with from_json_dict.
+        """
+        stats = vars(self).get("_donation_stats")
+        if (stats is None
+                or stats.donations is not self.donations
+                or stats.count != len(self.donations)):
+            stats = self._donation_stats = DonationStats(self.donations)
+        return stats
+
     @property
     def last_donation(self):
         """
         The most recent donation made
         """
-        try:
-            return self.donations[-1]
-        except IndexError:
-            return None
+        return self._stats.last
 
     @property
     def total_donations(self):
-        return sum(self.donations)
+        return self._stats.total
 
     @property
     def num_donations(self):
-        return len(self.donations)
+        return self._stats.count
 
     @property
     def average_donation(self):
         return self.total_donations / self.num_donations
 
+    @property
+    def min_donation(self):
+        """
+        The smallest donation made
+        """
+        return self._stats.min
+
+    @property
+    def max_donation(self):
+        """
+        The largest donation made
+        """
+        return self._stats.max
+
     @mutating
     def add_donation(self, amount):
         """
         add a new donation
         """
-        print("add_donation called")
         amount = float(amount)
         if amount <= 0.0:
             raise ValueError("Donation must be greater than zero")
+        stats = self._stats
         self.donations.append(amount)
+        stats.add(amount)
 
     def gen_letter(self):
         """
@@ -125,15 +200,61 @@ class Donor:
         note: This doesn't actually write to a file -- that's a separate
               function. This makes it more flexible and easier to test.
         """
-        return dedent('''Dear {0:s},
+        return LETTER_TEMPLATE.format(self.name, self.last_donation)
 
-              Thank you for your very kind donation of ${1:.2f}.
-              It will be put to very good use.
 
-                             Sincerely,
-                                -The Team
-              '''.format(self.name, self.last_donation)
-                      )
+class Journal:
+    """
+    An append-only log of the changes made to a DonorDB
+
+    Each change is written as a single line of JSON. The file is flushed
+    to disk (fsync-ed) every sync_every records, rather than for every
+    single one -- so a crash can lose at most that many changes.
+    """
+
+    def __init__(self, path, sync_every=100):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.count = 0  # number of records in the file
+        self._unsynced = 0
+        self._file = open(self.path, 'a')
+
+    def write(self, record):
+        """
+        append a record (a json-compatible dict) to the journal
+        """
+        self._file.write(json.dumps(record) + "\n")
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """
+        make sure everything written so far is on disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    @staticmethod
+    def read(path):
+        """
+        generate the records in a journal file
+
+        stops at a partly-written last record (from a crash)
+        """
+        with open(path) as journal_file:
+            for line in journal_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
 
 
 @js.json_save
@@ -145,6 +266,18 @@ class DonorDB:
     donor_data = js.Dict()
 
     _frozen = False
+    _indexes = None
+
+    # the sequence number of the last change recorded in the journal.
+    # This is saved in the file, so replaying the journal can skip
+    # the changes that are already in it.
+    journal_seq = 0
+
+    # journal mode -- see use_journal()
+    _journal = None
+    _replaying = False
+    _compactor = None
+    compact_every = 10000
 
     def __init__(self, donors=None, db_file=None):
         """
@@ -155,6 +288,9 @@ class DonorDB:
         :param db_file=None: path to file to store the datbase in.
                              if None, the data will be stored in the
                              package data_dir
+
+        By default, the whole file is re-written every time a change is
+        made. call use_journal() to record changes in a journal instead.
         """
         if db_file is None:
             self.db_file = data_dir / "mailroom_data.json"
@@ -178,18 +314,193 @@ class DonorDB:
         data will be saved whenever it's been changed.
 
         NOTE: This is not very efficient -- it will re-write
-              the entire file each time.
+              the entire file each time -- unless the DB is using
+              a journal (see use_journal())
         """
 
         # note that this is expecting to decorate a method
         # so self will be the first argument
         def wrapped(self, *args, **kwargs):
             res = method(self, *args, **kwargs)
+            # the mutating DonorDB methods return the Donor they changed
+            if isinstance(res, Donor):
+                self.update_indexes(res)
             if not self._frozen:
-                self.save()
+                self.record_change(method.__name__, args)
             return res
         return wrapped
 
+    @property
+    def indexes(self):
+        """
+        The DonorIndex for this DB -- built the first time it's needed
+        """
+        if self._indexes is None:
+            self._indexes = DonorIndex(self.donors)
+        return self._indexes
+
+    def update_indexes(self, donor):
+        """
+        keep the indexes up to date when a donor has changed
+
+        (if they haven't been built yet, there's nothing to do)
+        """
+        if self._indexes is not None:
+            self._indexes.update(donor)
+
+    def record_change(self, method_name, args, donor=None):
+        """
+        Record a change made by one of the mutating methods
+
+        Without a journal, this saves the whole DB. With one, it appends a
+        record of the method call to the journal, so it can be replayed.
+
+        :param method_name: the name of the method that was called
+
+        :param args: the arguments it was called with
+
+        :param donor=None: the Donor, if it was a Donor method
+        """
+        if self._replaying:
+            return
+        if self._journal is None:
+            self.save()
+            return
+        self.journal_seq += 1
+        record = {"seq": self.journal_seq,
+                  "method": method_name,
+                  "args": js.List.to_json_compat(args)}
+        if donor is not None:
+            record["donor"] = donor.norm_name
+        self._journal.write(record)
+        if self._journal.count >= self.compact_every:
+            self.compact()
+
+    @property
+    def journal_file(self):
+        return self.db_file.with_name(self.db_file.name + ".journal")
+
+    @property
+    def _compacting_file(self):
+        # the journal being compacted into the snapshot
+        return self.db_file.with_name(self.db_file.name + ".compacting")
+
+    def _remove_journals(self):
+        for path in (self._compacting_file, self.journal_file):
+            if path.exists():
+                path.unlink()
+
+    def use_journal(self, sync_every=100, compact_every=10000):
+        """
+        Record changes in an append-only journal, rather than re-writing
+        the whole file for every change.
+
+        :param sync_every=100: the journal is flushed to disk every this
+                               many changes
+
+        :param compact_every=10000: after this many changes, the journal
+                                    is merged into the snapshot file, in a
+                                    background thread
+
+        Any existing journal is replayed first.
+        """
+        self.replay_journal()
+        self.compact_every = compact_every
+        self._journal = Journal(self.journal_file, sync_every)
+
+    def replay_journal(self):
+        """
+        apply the changes in the journal file(s) that aren't already in
+        this DB -- used when loading
+        """
+        self._replaying = True
+        try:
+            for path in (self._compacting_file, self.journal_file):
+                if path.exists():
+                    for record in Journal.read(path):
+                        self._apply(record)
+        finally:
+            self._replaying = False
+
+    def _apply(self, record):
+        if record["seq"] <= self.journal_seq:  # already got this one
+            return
+        if "donor" in record:
+            target = self.donor_data[record["donor"]]
+        else:
+            target = self
+        args = js.List.to_python(record["args"])
+        getattr(target, record["method"])(*args)
+        self.journal_seq = record["seq"]
+
+    def compact(self):
+        """
+        start merging the journal into the snapshot, in a background thread
+
+        The current journal is set aside, and a new one started. The
+        background thread loads the snapshot file, replays the old journal
+        onto it, and saves it again -- it never touches this DB, so
+        changes can keep on being made while it works.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return  # one at a time
+        if self._compacting_file.exists():
+            # left over from a crash -- just save everything
+            self.save()
+            return
+        sync_every = self._journal.sync_every
+        self._journal.close()
+        os.replace(self.journal_file, self._compacting_file)
+        self._journal = Journal(self.journal_file, sync_every)
+        self._compactor = threading.Thread(target=self._compact_snapshot,
+                                           args=(self.db_file,
+                                                 self._compacting_file))
+        self._compactor.start()
+
+    @classmethod
+    def _compact_snapshot(cls, db_file, journal_path):
+        """
+        merge a journal into a snapshot file -- run by compact()
+        """
+        if db_file.exists():
+            # just the snapshot -- this is merging the journal into it
+            snapshot = cls._load_snapshot(db_file)
+        else:  # nothing has been saved yet
+            snapshot = cls(db_file=db_file)
+        snapshot._replaying = True
+        try:
+            for record in Journal.read(journal_path):
+                snapshot._apply(record)
+        finally:
+            snapshot._replaying = False
+        snapshot._write_snapshot()
+        os.remove(journal_path)
+
+    def wait_for_compaction(self):
+        """
+        wait for a background compaction to finish (if there is one)
+        """
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def flush(self):
+        """
+        make sure all the changes recorded in the journal are on disk
+        """
+        if self._journal is not None:
+            self._journal.sync()
+
+    def close(self):
+        """
+        finish up with the journal -- wait for the compaction, and
+        make sure everything is on disk
+        """
+        self.wait_for_compaction()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
     @classmethod
     def load_from_file(cls, filename):
         """
@@ -203,22 +514,93 @@ class DonorDB:
         return db
 
     @classmethod
-    def load(cls, filepath):
+    def _load_snapshot(cls, filepath):
         """
-        loads a donor database from a json_save format file.
+        load the json_save file itself -- without replaying any journal
         """
         with open(filepath) as jsfile:
-            db = js.from_json(jsfile)
+            data = json.load(jsfile)
+        # not one of the json_save attributes -- see _write_snapshot()
+        journal_seq = data.pop("journal_seq", 0)
+        db = js.from_json_dict(data)
+        db.journal_seq = journal_seq
         db.db_file = filepath
+        for donor in db.donors:
+            donor._donor_db = db
+        return db
+
+    @classmethod
+    def load(cls, filepath, journal=False):
+        """
+        loads a donor database from a json_save format file.
+
+        Any changes in an existing journal (see use_journal()) that
+        aren't in the file are replayed -- whether or not this DB uses
+        a journal.
+
+        :param filepath: the file to load
+
+        :param journal=False: if True, the DB will use a journal (see
+                              use_journal()). The file doesn't need to
+                              exist if there is a journal.
+        """
+        filepath = Path(filepath)
+        if filepath.exists():
+            db = cls._load_snapshot(filepath)
+        else:
+            db = cls(db_file=filepath)
+            if not (journal or db.journal_file.exists()
+                    or db._compacting_file.exists()):
+                raise FileNotFoundError(f"No such file: {filepath}")
+        if journal:
+            db.use_journal()  # replays it first
+        else:
+            db.replay_journal()
+        return db
+
+    def _write_snapshot(self):
+        """
+        write the whole DB to the db_file
+
+        it's written to a temp file first, then moved into place, so
+        there's always a complete file there.
+
+        If a journal has been used, the last journal_seq is added to the
+        top level of the json, next to the json_save attributes.
+        """
+        data = self.to_json_compat()
+        if self.journal_seq:
+            data["journal_seq"] = self.journal_seq
+        temp_file = self.db_file.with_name(self.db_file.name + ".tmp")
+        with open(temp_file, 'w') as db_file:
+            json.dump(data, db_file, indent=4)
+            db_file.flush()
+            os.fsync(db_file.fileno())
+        os.replace(temp_file, self.db_file)
 
     def save(self):
         """
         Save the data to a json_save file
+
+        Any journal is emptied, as everything in it is now in the file.
         """
         # if explicitly called, you want to do it!
         self._frozen = False
-        with open(self.db_file, 'w') as db_file:
-            self.to_json(db_file)
+        if self._journal is None:
+            self._write_snapshot()
+            # load() replayed any journal left from when this DB used
+            # one, so it's all in the snapshot now -- and a journal
+            # replayed on top of a newer snapshot would be out of order
+            self._remove_journals()
+            return
+        self.wait_for_compaction()
+        self._journal.sync()
+        self._write_snapshot()
+        # everything in the journal is in the snapshot now
+        sync_every = self._journal.sync_every
+        self._journal.close()
+        self._remove_journals()
+        self._journal = Journal(self.journal_file, sync_every)
 
     @property
     def donors(self):
@@ -249,6 +631,42 @@ class DonorDB:
         """
         return self.donor_data.get(Donor.normalize_name(name))
 
+    def find_donors_by_prefix(self, prefix, limit=None):
+        """
+        find the donors whose names start with prefix
+
+        :param prefix: the start of the name -- case doesn't matter
+
+        :param limit=None: the maximum number of donors to return
+
+        :returns: a list of Donor objects, sorted by name
+        """
+        return [self.donor_data[name]
+                for name in self.indexes.prefix(Donor.normalize_name(prefix),
+                                                limit)]
+
+    def find_donors_fuzzy(self, name, limit=10):
+        """
+        find the donors with names most like name -- for typos
+
+        :param name: the (possibly misspelled) name
+
+        :param limit=10: the maximum number of donors to return
+
+        :returns: a list of Donor objects, closest match first
+        """
+        return [self.donor_data[match]
+                for match in self.indexes.fuzzy(Donor.normalize_name(name),
+                                                limit)]
+
+    def top_donors(self, n):
+        """
+        the n donors that have given the most
+
+        :returns: a list of Donor objects, largest total first
+        """
+        return [self.donor_data[name] for name in self.indexes.top(n)]
+
     @mutating
     def add_donor(self, donor):
         """
@@ -267,8 +685,102 @@ class DonorDB:
 
     @staticmethod
     def sort_key(item):
-        # used to sort on name in self.donor_data
-        return item[1]
+        # used to sort the report rows: by total, then by normalized name
+        return item[:2]
+
+    REPORT_HEADER = "{:25s} | {:11s} | {:9s} | {:12s}".format("Donor Name",
+                                                             "Total Given",
+                                                             "Num Gifts",
+                                                             "Average Gift")
+    REPORT_ROW = "{:25s}   ${:10.2f}   {:9d}   ${:11.2f}"
+
+    def _report_row(self, donor):
+        # (total, normalized name) first, so the rows can be sorted as is
+        return (donor.total_donations,
+                donor.norm_name,
+                donor.name,
+                donor.num_donations,
+                donor.average_donation)
+
+    def _sorted_report_rows(self, chunk_size=None):
+        """
+        yield the report rows, sorted by total
+
+        If the indexes have been built, they already have the donors
+        sorted by total, so no sorting is needed at all.
+
+        Otherwise, if chunk_size is given, the rows are sorted
+        chunk_size at a time, each sorted chunk is written to a temp
+        file, and the chunks are merged back together as they are read
+        (an "external merge sort") -- so there are never more than
+        chunk_size rows in memory.
+        """
+        if self._indexes is not None:
+            for name in self._indexes.ascending_totals():
+                yield self._report_row(self.donor_data[name])
+        elif chunk_size is None:
+            rows = [self._report_row(donor) for donor in self.donors]
+            rows.sort(key=self.sort_key)
+            yield from rows
+        else:
+            yield from self._merge_sorted_rows(chunk_size)
+
+    def _merge_sorted_rows(self, chunk_size):
+        """
+        sort the report rows with an external merge sort
+        """
+        chunk_files = []
+        try:
+            donors = iter(self.donors)
+            while True:
+                rows = [self._report_row(donor)
+                        for donor in islice(donors, chunk_size)]
+                if not rows:
+                    break
+                rows.sort(key=self.sort_key)
+                chunk_file = tempfile.TemporaryFile('w+')
+                chunk_files.append(chunk_file)
+                for row in rows:
+                    chunk_file.write(json.dumps(row) + "\n")
+                chunk_file.seek(0)
+            chunks = [(tuple(json.loads(line)) for line in chunk_file)
+                      for chunk_file in chunk_files]
+            yield from heapq.merge(*chunks, key=self.sort_key)
+        finally:
+            for chunk_file in chunk_files:
+                chunk_file.close()
+
+    def iter_donor_report(self, chunk_size=None):
+        """
+        Generate the report of the donors and amounts donated, a line
+        at a time
+
+        The donors are sorted by total given (and then by name).
+
+        :param chunk_size=None: if given, sort the donors chunk_size at a
+                                time, using temp files -- for when
+                                there are too many to sort all at once
+                                (not used if the indexes are built, as
+                                they are already sorted)
+        """
+        yield self.REPORT_HEADER
+        yield "-" * 66
+        for total, norm_name, name, num, average in \
+                self._sorted_report_rows(chunk_size):
+            yield self.REPORT_ROW.format(name, total, num, average)
+
+    def write_donor_report(self, outfile, chunk_size=None):
+        """
+        Write the report of the donors and amounts donated to a file
+
+        The report is never all in memory at once.
+
+        :param outfile: an open file (or anything with a write() method)
+
+        :param chunk_size=None: passed on to iter_donor_report
+        """
+        for line in self.iter_donor_report(chunk_size):
+            outfile.write(line + "\n")
 
     def generate_donor_report(self):
         """
@@ -276,36 +788,18 @@ class DonorDB:
 
         :returns: the donor report as a string.
         """
-        # First, reduce the raw data into a summary list view
-        report_rows = []
-        for donor in self.donor_data.values():
-            name = donor.name
-            gifts = donor.donations
-            total_gifts = donor.total_donations
-            num_gifts = len(gifts)
-            avg_gift = donor.average_donation
-            report_rows.append((name, total_gifts, num_gifts, avg_gift))
-
-        # sort the report data
-        report_rows.sort(key=self.sort_key)
-        report = []
-        report.append("{:25s} | {:11s} | {:9s} | {:12s}".format("Donor Name",
-                                                                "Total Given",
-                                                                "Num Gifts",
-                                                                "Average Gift"))
-        report.append("-" * 66)
-        for row in report_rows:
-            report.append("{:25s}   ${:10.2f}   {:9d}   ${:11.2f}".format(*row))
-        return "\n".join(report)
-
-    def save_letters_to_disk(self):
+        return "\n".join(self.iter_donor_report())
+
+    def save_letters_to_disk(self, directory=".", archive=None, **kwargs):
         """
         make a letter for each donor, and save it to disk.
+
+        :param directory=".": the directory to put the letters in
+
+        :param archive=None: the name of a zip or tar file to put the
+                             letters in instead
+
+        other keyword arguments are passed on to letters.save_letters
         """
         print("Saving letters:")
-        for donor in self.donor_data.values():
-            print("donor:", donor.name)
-            letter = donor.gen_letter()
-            # I don't like spaces in filenames...
-            filename = donor.name.replace(" ", "_") + ".txt"
-            open(filename, 'w').write(letter)
+        return save_letters(self.donors, directory, archive, **kwargs)
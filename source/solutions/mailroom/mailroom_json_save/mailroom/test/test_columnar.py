@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+"""
+tests for the columnar donor store
+"""
+
+import io
+
+import pytest
+
+from mailroom.model import Donor
+from mailroom.columnar import ColumnarDonorDB, DonorView
+
+
+@pytest.fixture
+def columnar_db(sample_db):
+    return ColumnarDonorDB.from_donor_db(sample_db)
+
+
+def test_empty():
+    db = ColumnarDonorDB()
+
+    assert db.list_donors().strip() == "Donor list:"
+    assert db.generate_donor_report().count("\n") == 1
+    assert db.projection(2) == 0.0
+
+
+def test_same_donors(sample_db, columnar_db):
+    assert len(columnar_db) == len(list(sample_db.donors))
+    assert columnar_db.list_donors() == sample_db.list_donors()
+    for donor in sample_db.donors:
+        view = columnar_db.find_donor(donor.name)
+        assert isinstance(view, DonorView)
+        assert view.name == donor.name
+        assert view.donations == donor.donations
+        assert list(view.donations) == donor.donations
+        assert view.num_donations == donor.num_donations
+        assert view.total_donations == pytest.approx(donor.total_donations)
+        assert view.average_donation == pytest.approx(donor.average_donation)
+        assert view.last_donation == donor.last_donation
+        assert view.min_donation == donor.min_donation
+        assert view.max_donation == donor.max_donation
+        assert view.gen_letter() == donor.gen_letter()
+        assert str(view) == str(donor)
+
+
+def test_find_donor(columnar_db):
+    assert columnar_db.find_donor("not there") is None
+    assert columnar_db.find_donor("  PAUL Allen ").name == "Paul Allen"
+
+
+def test_report(sample_db, columnar_db):
+    assert columnar_db.generate_donor_report() == \
+        sample_db.generate_donor_report()
+    outfile = io.StringIO()
+    columnar_db.write_donor_report(outfile)
+    assert outfile.getvalue() == columnar_db.generate_donor_report() + "\n"
+
+
+def test_top_donors(sample_db, columnar_db):
+    assert ([donor.name for donor in columnar_db.top_donors(2)]
+            == [donor.name for donor in sample_db.top_donors(2)])
+
+
+def test_add_donation(columnar_db):
+    donor = columnar_db.find_donor("Paul Allen")
+    total = donor.total_donations
+
+    donor.add_donation(100, timestamp=12.5)
+
+    assert donor.last_donation == 100.0
+    assert donor.total_donations == pytest.approx(total + 100)
+    assert donor.timestamps[-1] == 12.5
+    with pytest.raises(ValueError):
+        donor.add_donation(-5)
+
+
+def test_add_donor(columnar_db):
+    num = len(columnar_db)
+
+    new = columnar_db.add_donor("Fred Flintstone")
+    again = columnar_db.add_donor("fred flintstone ")
+
+    assert new == again
+    assert len(columnar_db) == num + 1
+    assert new.num_donations == 0
+    assert new.last_donation is None
+    assert list(new.donations) == []
+
+    donor = columnar_db.add_donor(Donor("Barney Rubble", [10, 20]))
+    assert donor.donations == [10.0, 20.0]
+
+
+def test_interleaved_donations():
+    db = ColumnarDonorDB()
+    a = db.add_donor("A")
+    b = db.add_donor("B")
+    for amount in (1, 2, 3):
+        a.add_donation(amount)
+        b.add_donation(amount * 10)
+
+    assert a.donations == [1.0, 2.0, 3.0]
+    assert b.donations[1:] == [20.0, 30.0]
+    assert b.min_donation == 10.0
+    assert b.max_donation == b.last_donation == 30.0
+
+
+def test_projection():
+    db = ColumnarDonorDB([Donor("A", [10, 50, 200]), Donor("B", [5, 500])])
+
+    assert list(db.projected_totals(2)) == [520.0, 1010.0]
+    assert list(db.projected_totals(3, max_donation=50)) == [180.0, 15.0]
+    assert db.projection(2, min_donation=20, max_donation=300) == 500.0
+
+
+def test_challenge():
+    db = ColumnarDonorDB([Donor("A", [10, 50, 200]),
+                          Donor("B", [5, 500]),
+                          Donor("C", [1000])])
+
+    new_db = db.challenge(2, min_donation=20, max_donation=600)
+
+    assert new_db.list_donors() == "Donor list:\nA\nB"
+    assert new_db.find_donor("a").donations == [100.0, 400.0]
+    assert new_db.find_donor("b").donations == [1000.0]
+    assert new_db.find_donor("c") is None
+    # the original is not changed
+    assert db.find_donor("a").donations == [10.0, 50.0, 200.0]
+
+
+def test_to_donor_db(columnar_db, sample_db, tmp_path):
+    db = columnar_db.to_donor_db(db_file=tmp_path / "db.json")
+
+    assert db.generate_donor_report() == sample_db.generate_donor_report()
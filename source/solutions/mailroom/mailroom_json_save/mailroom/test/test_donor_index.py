@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+tests for the donor indexes: prefix, fuzzy and top-N searches
+"""
+
+from mailroom.model import Donor
+from mailroom.donor_index import DonorIndex, name_trigrams
+
+
+def test_name_trigrams():
+    assert name_trigrams("bob") == {"  b", " bo", "bob", "ob "}
+
+
+def test_index_update():
+    donors = [Donor("Fred Jones", [100]), Donor("Bob Smith", [50, 60])]
+    index = DonorIndex(donors)
+
+    assert index.names == ["bob smith", "fred jones"]
+    assert index.top(2) == ["bob smith", "fred jones"]
+
+    donors[0].add_donation(100)
+    index.update(donors[0])
+
+    assert index.top(2) == ["fred jones", "bob smith"]
+    assert len(index.by_total) == 2
+
+
+def test_prefix(sample_db):
+    donors = sample_db.find_donors_by_prefix("  Pa")
+
+    assert [donor.name for donor in donors] == ["Paul Allen"]
+
+
+def test_prefix_several(sample_db):
+    sample_db.add_donor("Paula Abdul")
+    sample_db.add_donor("Pat Jones")
+
+    names = [donor.name for donor in sample_db.find_donors_by_prefix("pa")]
+
+    assert names == ["Pat Jones", "Paul Allen", "Paula Abdul"]
+    assert len(sample_db.find_donors_by_prefix("pa", limit=2)) == 2
+    assert sample_db.find_donors_by_prefix("zz") == []
+
+
+def test_fuzzy(sample_db):
+    donors = sample_db.find_donors_fuzzy("Jeff Bzos")
+
+    assert donors[0].name == "Jeff Bezos"
+
+
+def test_fuzzy_typo(sample_db):
+    donors = sample_db.find_donors_fuzzy("mark zukerberg")
+
+    assert donors[0].name == "Mark Zuckerberg"
+
+
+def test_fuzzy_nothing_close(sample_db):
+    assert sample_db.find_donors_fuzzy("Xqwv") == []
+
+
+def test_fuzzy_same_as_scoring_all():
+    """
+    skipping the common trigrams and the wrong sizes doesn't lose any
+    """
+    names = ["ann lee", "anne lee", "annie leigh", "dan lee", "lee ann",
+             "al", "annabelle leeson", "bob smith", "ann", "an le"]
+    index = DonorIndex(Donor(name) for name in names)
+
+    for query in ["ann lee", "an", "annabel", "lee", "bob smyth"]:
+        for min_score in (0.0, 0.2, 0.3, 0.5):
+            trigrams = name_trigrams(query)
+            scored = []
+            for name in names:
+                common = len(trigrams & name_trigrams(name))
+                score = common / len(trigrams | name_trigrams(name))
+                if common and score >= min_score:
+                    scored.append((-score, name))
+            expected = [name for score, name in sorted(scored)][:10]
+            assert index.fuzzy(query, min_score=min_score) == expected
+
+
+def test_fuzzy_updated():
+    index = DonorIndex([Donor("Bob Smith")])
+    index.update(Donor("Rob Smith"))
+
+    assert index.num_trigrams["rob smith"] == len(name_trigrams("rob smith"))
+    assert index.fuzzy("rob smith") == ["rob smith", "bob smith"]
+
+
+def test_top_donors(sample_db):
+    top = sample_db.top_donors(2)
+
+    assert [donor.name for donor in top] == ["William Gates III",
+                                             "Mark Zuckerberg"]
+
+
+def test_top_donors_updated(sample_db):
+    """
+    the index is kept up to date as donations are made
+    """
+    sample_db.top_donors(1)  # make sure the index is built
+
+    sample_db.find_donor("jeff bezos").add_donation(1000000)
+    sample_db.add_donor(Donor("Fred Jones", [5000000]))
+
+    top = sample_db.top_donors(3)
+    assert [donor.name for donor in top] == ["Fred Jones",
+                                             "Jeff Bezos",
+                                             "William Gates III"]
+
+
+def test_top_donors_all(sample_db):
+    top = sample_db.top_donors(100)
+
+    assert len(top) == 4
+    totals = [donor.total_donations for donor in top]
+    assert totals == sorted(totals, reverse=True)
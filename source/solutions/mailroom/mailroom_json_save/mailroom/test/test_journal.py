@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+"""
+Test code for saving changes to a DonorDB in a journal
+"""
+
+import json
+
+import pytest
+
+from mailroom.model import Donor, DonorDB
+from mailroom.sample_data import sample_donor_data
+
+
+@pytest.fixture
+def journal_db(tmp_path):
+    """a DonorDB, saved in a temp dir, using a journal"""
+    db = DonorDB(sample_donor_data(), db_file=tmp_path / "db.json_save")
+    db.save()
+    db.use_journal()
+    yield db
+    db.close()
+
+
+def read_journal(db):
+    db.flush()
+    with open(db.journal_file) as journal_file:
+        return [json.loads(line) for line in journal_file]
+
+
+def test_no_rewrite(journal_db):
+    """
+    changes go in the journal -- the file itself isn't re-written
+    """
+    before = journal_db.db_file.read_text()
+
+    journal_db.find_donor("paul allen").add_donation(500)
+    journal_db.add_donor("Fred Jones")
+
+    assert journal_db.db_file.read_text() == before
+    records = read_journal(journal_db)
+    assert [r["method"] for r in records] == ["add_donation", "add_donor"]
+    assert records[0]["donor"] == "paul allen"
+    assert records[0]["args"] == [500]
+
+
+def test_load_replays(journal_db):
+    journal_db.find_donor("paul allen").add_donation(500)
+    journal_db.add_donor("Fred Jones")
+    journal_db.find_donor("fred jones").add_donation(25)
+    journal_db.close()
+
+    db = DonorDB.load(journal_db.db_file, journal=True)
+
+    assert db == journal_db
+    assert db.find_donor("paul allen").num_donations == 4
+    assert db.find_donor("fred jones").donations == [25.0]
+    db.close()
+
+
+def test_add_donor_object(journal_db):
+    journal_db.add_donor(Donor("Wilma Flintstone", [100, 200]))
+    journal_db.close()
+
+    db = DonorDB.load(journal_db.db_file, journal=True)
+
+    assert db.find_donor("wilma flintstone").donations == [100, 200]
+    db.close()
+
+
+def test_save_empties_journal(journal_db):
+    journal_db.find_donor("paul allen").add_donation(500)
+    journal_db.save()
+
+    assert read_journal(journal_db) == []
+
+    db = DonorDB.load(journal_db.db_file, journal=True)
+    assert db == journal_db
+    db.close()
+
+
+def test_replay_skips_saved_changes(journal_db):
+    """
+    if the journal wasn't emptied after a save (a crash), the changes
+    that are already in the file aren't applied twice
+    """
+    journal_db.find_donor("paul allen").add_donation(500)
+    journal_db.flush()
+    old_journal = journal_db.journal_file.read_text()
+    journal_db.save()
+    # put the old journal back, as if the save crashed before emptying it
+    journal_db.journal_file.write_text(old_journal)
+
+    db = DonorDB.load(journal_db.db_file, journal=True)
+
+    assert db.find_donor("paul allen").num_donations == 4
+    db.close()
+
+
+def test_partial_record(journal_db):
+    """
+    a partly written last record is ignored
+    """
+    journal_db.find_donor("paul allen").add_donation(500)
+    journal_db.close()
+    with open(journal_db.journal_file, 'a') as journal_file:
+        journal_file.write('{"seq": 2, "meth')
+
+    db = DonorDB.load(journal_db.db_file, journal=True)
+
+    assert db.find_donor("paul allen").num_donations == 4
+    db.close()
+
+
+def test_compaction(tmp_path):
+    db = DonorDB(sample_donor_data(), db_file=tmp_path / "db.json_save")
+    db.save()
+    db.use_journal(sync_every=10, compact_every=25)
+
+    donor = db.find_donor("jeff bezos")
+    for i in range(60):
+        donor.add_donation(i + 1)
+    db.wait_for_compaction()
+
+    # some of the changes have been compacted into the snapshot
+    with open(db.db_file) as db_file:
+        assert json.load(db_file)["journal_seq"] >= 25
+    assert len(read_journal(db)) < 60
+    db.close()
+
+    # and it all comes back together
+    db2 = DonorDB.load(db.db_file, journal=True)
+    assert db2 == db
+    assert db2.find_donor("jeff bezos").num_donations == 61
+    db2.close()
+
+
+def test_journal_only(tmp_path):
+    """
+    the snapshot file doesn't need to exist
+    """
+    db = DonorDB.load(tmp_path / "new_db.json_save", journal=True)
+    db.add_donor("Fred Jones")
+    db.close()
+
+    db2 = DonorDB.load(tmp_path / "new_db.json_save", journal=True)
+    assert db2.find_donor("fred jones") is not None
+    db2.close()
+
+
+def test_plain_load_replays(journal_db):
+    journal_db.find_donor("paul allen").add_donation(50)
+    journal_db.close()
+
+    db = DonorDB.load(journal_db.db_file)
+
+    assert db.find_donor("paul allen").donations[-1] == 50.0
+    assert db == journal_db
+
+
+def test_plain_save_after_journal(journal_db):
+    """
+    a DB without a journal, saved after a journal was used, doesn't
+    leave the old journal to be replayed again
+    """
+    donations = list(journal_db.find_donor("paul allen").donations)
+    journal_db.find_donor("paul allen").add_donation(50)
+    journal_db.close()
+
+    db = DonorDB.load(journal_db.db_file)
+    db.find_donor("paul allen").add_donation(7)  # saves the whole DB
+
+    assert not db.journal_file.exists()
+    db2 = DonorDB.load(db.db_file, journal=True)
+    assert db2.find_donor("paul allen").donations == donations + [50.0, 7.0]
+    db2.close()
+
+
+def test_no_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DonorDB.load(tmp_path / "not_there.json_save")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""
+tests for writing lots of letters at once
+"""
+
+import tarfile
+import zipfile
+
+import pytest
+
+from mailroom.model import Donor
+from mailroom.letters import letter_filename, render_letters, save_letters
+
+
+def make_donors(num):
+    return [Donor(f"Donor Number {i}", [i + 0.5]) for i in range(num)]
+
+
+def test_letter_filename():
+    assert letter_filename("William Gates III") == "William_Gates_III.txt"
+
+
+def test_render_letters():
+    donor = Donor("Fred Flintstone", [100, 432.45])
+
+    letters = render_letters([(donor.name, donor.last_donation)])
+
+    assert letters == [("Fred_Flintstone.txt", donor.gen_letter())]
+
+
+def test_save_letters(tmp_path):
+    donors = make_donors(25)
+
+    count, seconds = save_letters(donors, tmp_path, processes=1,
+                                  chunk_size=10, max_open_files=2,
+                                  progress=None)
+
+    assert count == 25
+    assert len(list(tmp_path.iterdir())) == 25
+    letter = (tmp_path / "Donor_Number_7.txt").read_text()
+    assert letter == donors[7].gen_letter()
+
+
+def test_save_letters_pool(tmp_path):
+    donors = make_donors(25)
+
+    save_letters(donors, tmp_path, processes=2, chunk_size=10,
+                 progress=None)
+
+    for donor in donors:
+        letter = (tmp_path / letter_filename(donor.name)).read_text()
+        assert letter == donor.gen_letter()
+
+
+def test_save_letters_progress(tmp_path):
+    calls = []
+
+    save_letters(make_donors(25), tmp_path, processes=1, chunk_size=10,
+                 progress=lambda done, total, seconds: calls.append(
+                     (done, total)))
+
+    assert calls == [(10, 25), (20, 25), (25, 25)]
+
+
+def test_save_letters_zip(tmp_path):
+    donors = make_donors(25)
+    archive = tmp_path / "letters.zip"
+
+    save_letters(donors, archive=archive, processes=1, chunk_size=10,
+                 progress=None)
+
+    with zipfile.ZipFile(archive) as zfile:
+        assert len(zfile.namelist()) == 25
+        letter = zfile.read("Donor_Number_3.txt").decode("utf-8")
+    assert letter == donors[3].gen_letter()
+
+
+@pytest.mark.parametrize("name", ["letters.tar", "letters.tar.gz"])
+def test_save_letters_tar(tmp_path, name):
+    donors = make_donors(25)
+    archive = tmp_path / name
+
+    save_letters(donors, archive=archive, processes=1, chunk_size=10,
+                 progress=None)
+
+    with tarfile.open(archive) as tfile:
+        assert len(tfile.getnames()) == 25
+        letter = tfile.extractfile("Donor_Number_3.txt").read()
+    assert letter.decode("utf-8") == donors[3].gen_letter()
+
+
+def test_save_letters_bad_archive(tmp_path):
+    with pytest.raises(ValueError):
+        save_letters(make_donors(2), archive=tmp_path / "letters.rar")
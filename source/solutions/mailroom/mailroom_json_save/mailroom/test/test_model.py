@@ -24,6 +24,7 @@ NOTE: when I first ran it, I got 97% coverage -- it was missing tests
 
 """
 
+import io
 import os
 import pytest
 from mailroom import model
@@ -52,6 +53,68 @@ def test_new_empty_donor():
     assert donor.last_donation is None
 
 
+def test_donation_stats():
+    donor = model.Donor("Fred Flintstone", [432.45, 65.45, 230.0])
+
+    assert donor.num_donations == 3
+    assert donor.total_donations == sum([432.45, 65.45, 230.0])
+    assert donor.min_donation == 65.45
+    assert donor.max_donation == 432.45
+    assert donor.last_donation == 230.0
+
+
+def test_donation_stats_updated():
+    """
+    the running stats are kept up to date by add_donation
+    """
+    donor = model.Donor("Fred Flintstone", [432.45, 65.45, 230.0])
+    donor.total_donations  # make sure the stats are there before adding
+
+    donor.add_donation(1000)
+    donor.add_donation(10)
+
+    donations = [432.45, 65.45, 230.0, 1000.0, 10.0]
+    assert donor.donations == donations
+    assert donor.num_donations == 5
+    assert donor.total_donations == sum(donations)
+    assert donor.average_donation == sum(donations) / 5
+    assert donor.min_donation == 10.0
+    assert donor.max_donation == 1000.0
+    assert donor.last_donation == 10.0
+
+
+def test_donation_stats_list_changed():
+    """
+    the stats are recomputed if the donations list is changed directly
+    """
+    donor = model.Donor("Fred Flintstone", [432.45, 65.45])
+    assert donor.total_donations == 432.45 + 65.45
+
+    donor.donations.append(100.0)
+    assert donor.total_donations == 432.45 + 65.45 + 100.0
+
+    donor.donations = [1.0, 2.0]
+    assert donor.total_donations == 3.0
+    assert donor.max_donation == 2.0
+
+
+def test_donation_stats_from_json():
+    donor = model.Donor("Fred Flintstone", [432.45, 65.45, 230.0])
+    donor2 = model.Donor.from_json_dict(donor.to_json_compat())
+
+    assert donor2.total_donations == donor.total_donations
+    assert donor2.last_donation == 230.0
+
+
+def test_empty_donor_stats():
+    donor = model.Donor("Fred Flintstone")
+
+    assert donor.num_donations == 0
+    assert donor.total_donations == 0
+    assert donor.min_donation is None
+    assert donor.max_donation is None
+
+
 def test_add_donation(sample_db):
     # fixme: there should be a better way to get an arbitrary donor
     donor = sample_db.donor_data.popitem()[1]
@@ -135,6 +198,60 @@ def test_generate_donor_report(sample_db):
     assert "Jeff Bezos                  $    877.33           1   $     877.33" in report
 
 
+def test_iter_donor_report(sample_db):
+    lines = list(sample_db.iter_donor_report())
+
+    assert "\n".join(lines) == sample_db.generate_donor_report()
+    assert len(lines) == len(sample_db.donor_data) + 2
+    # sorted by total
+    assert lines[2].startswith("Paul Allen")
+    assert lines[-1].startswith("William Gates III")
+
+
+def test_donor_report_external_sort(sample_db):
+    """
+    sorting in chunks with temp files gives the same report
+    """
+    report = sample_db.generate_donor_report()
+
+    assert "\n".join(sample_db.iter_donor_report(chunk_size=2)) == report
+
+
+def test_donor_report_indexed(sample_db):
+    """
+    using the sorted index gives the same report
+    """
+    report = sample_db.generate_donor_report()
+    sample_db.indexes  # build the indexes
+
+    assert sample_db.generate_donor_report() == report
+
+
+def test_donor_report_ties(tmp_path):
+    """
+    donors with the same total are sorted by name, whichever way the
+    report is sorted
+    """
+    db = model.DonorDB([model.Donor(name, [100])
+                        for name in ("Cy", "Al", "Bo", "Di")],
+                       db_file=tmp_path / "db.json")
+    db.add_donor("Ed").add_donation(50)
+
+    names = ["Ed", "Al", "Bo", "Cy", "Di"]
+    report = list(db.iter_donor_report())
+    assert [line.split()[0] for line in report[2:]] == names
+    assert list(db.iter_donor_report(chunk_size=3)) == report
+    db.indexes
+    assert list(db.iter_donor_report()) == report
+
+
+def test_write_donor_report(sample_db):
+    outfile = io.StringIO()
+    sample_db.write_donor_report(outfile)
+
+    assert outfile.getvalue() == sample_db.generate_donor_report() + "\n"
+
+
 def test_save_letters_to_disk(sample_db):
     """
     This only tests that the files get created, but that's a start
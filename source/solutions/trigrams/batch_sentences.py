@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+"""
+Generating lots and lots of sentences
+
+make_sentence in trigrams.py is nice and clear, but it builds a new tuple
+for every word, with get_last_pair(), and uses the shared random module.
+
+iter_sentences here works directly on the arrays of a compact model.
+Rather than looking up the last two words each time, it uses the
+model's transitions() array, which says which pair each follower leads
+to -- so no tuples, and no lookups, are needed. It uses its own
+random.Random, so a given seed always gives the same sentences.
+
+generate_streams runs a number of those generators in a pool of worker
+processes -- each with its own seed, so the results are reproducible
+no matter how many processes are used.
+
+Usage:
+
+    python batch_sentences.py model.tri num_streams num_sentences
+
+where model.tri is a model saved by mapped_trigrams.py
+"""
+
+import random
+import sys
+from bisect import bisect_right
+from multiprocessing import Pool
+
+from compact_trigrams import CompactTrigrams, ID_BITS, ID_MASK, NO_PAIR
+from mapped_trigrams import MappedTrigrams
+
+
+def iter_sentences(model, seed=None, num_sentences=None,
+                   min_words=4, max_words=12):
+    """
+    generate random sentences from a trigram model
+
+    :param model: a CompactTrigrams or MappedTrigrams (a trigrams dict
+                  will be converted to a CompactTrigrams first)
+
+    :param seed=None: seed for the random numbers -- the same seed
+                      always gives the same sentences from the same model
+
+    :param num_sentences=None: the number of sentences to generate --
+                               if None, it will go on forever
+
+    :param min_words=4, max_words=12: the range of the sentence lengths
+    """
+    if not isinstance(model, CompactTrigrams):
+        model = CompactTrigrams.from_dict(model)
+    model.compact()
+
+    rand = random.Random(seed)
+    randrange = rand.randrange
+    keys = model.keys
+    offsets = model.offsets
+    followers = model.followers
+    cum_counts = model.cum_counts
+    transitions = model.transitions()
+    words = model.words
+    num_pairs = len(keys)
+
+    count = 0
+    while num_sentences is None or count < num_sentences:
+        count += 1
+        num_words = rand.randint(min_words, max_words)
+        i = randrange(num_pairs)
+        ids = [keys[i] >> ID_BITS, keys[i] & ID_MASK]
+        for _ in range(num_words - 2):
+            start, end = offsets[i], offsets[i + 1]
+            if end - start == 1:  # only one choice -- no need to search
+                j = start
+            else:
+                j = bisect_right(cum_counts, randrange(cum_counts[end - 1]),
+                                 start, end)
+            ids.append(followers[j])
+            # on to the pair made by the last two words
+            i = transitions[j]
+            if i == NO_PAIR:  # a dead end
+                i = randrange(num_pairs)
+        sentence = [words[word_id] for word_id in ids]
+        sentence[0] = sentence[0].capitalize()
+        yield " ".join(sentence) + "."
+
+
+def stream_seed(seed, stream):
+    """
+    the seed for one of a number of streams of sentences
+
+    a string is used, as random.Random seeds from a string the same way
+    every time -- and every stream gets a different one.
+    """
+    return f"{seed}-{stream}"
+
+
+# the model used by the worker processes -- set by _init_worker
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    if isinstance(model, str):
+        model = MappedTrigrams(model)
+    _worker_model = model
+
+
+def _generate_stream(args):
+    seed, num_sentences, min_words, max_words = args
+    return list(iter_sentences(_worker_model, seed, num_sentences,
+                               min_words, max_words))
+
+
+def generate_streams(model, num_streams, num_sentences, seed=0,
+                     processes=None, min_words=4, max_words=12):
+    """
+    generate a number of independent streams of sentences in parallel
+
+    :param model: a CompactTrigrams, or the name of a file saved by
+                  mapped_trigrams.save_model -- a file is better, as
+                  each worker maps it, rather than getting its own copy
+
+    :param num_streams: the number of streams
+
+    :param num_sentences: the number of sentences in each stream
+
+    :param seed=0: the seed for the whole batch -- each stream gets its
+                   own seed from this, with stream_seed()
+
+    :param processes=None: the number of worker processes -- defaults to
+                           the number of cores
+
+    :param min_words=4, max_words=12: the range of the sentence lengths
+
+    yields a list of sentences for each stream, in order. Stream i is
+    always the same as:
+
+        list(iter_sentences(model, stream_seed(seed, i), num_sentences))
+    """
+    jobs = [(stream_seed(seed, stream), num_sentences, min_words, max_words)
+            for stream in range(num_streams)]
+    if isinstance(model, CompactTrigrams):
+        # make the transitions here, so each worker gets a copy of them,
+        # rather than making its own (a saved model has them in the file)
+        model.transitions()
+    with Pool(processes, initializer=_init_worker, initargs=(model,)) as pool:
+        yield from pool.imap(_generate_stream, jobs)
+
+
+if __name__ == "__main__":
+    try:
+        model_file = sys.argv[1]
+        num_streams = int(sys.argv[2])
+        num_sentences = int(sys.argv[3])
+    except (IndexError, ValueError):
+        print("You must pass in a model file name, "
+              "the number of streams, and the number of sentences")
+        sys.exit(1)
+
+    for stream in generate_streams(model_file, num_streams, num_sentences):
+        print(" ".join(stream))
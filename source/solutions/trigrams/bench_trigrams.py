@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+"""
+Benchmarks for the various trigram models
+
+run it with the name of a book (or several):
+
+    python bench_trigrams.py sherlock.txt
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from random import choice
+
+import trigrams
+from compact_trigrams import CompactTrigrams
+from parallel_trigrams import build_trigram_parallel
+from mapped_trigrams import MappedTrigrams, save_model
+from batch_sentences import iter_sentences, generate_streams
+from ngrams import NGramModel
+
+
+def bench_tokenize(filenames, repeat=5):
+    """
+    compare the speed of make_words and make_words_fast
+    """
+    print("Tokenizing:")
+    text = " ".join(trigrams.read_in_data(filename) for filename in filenames)
+    num_words = len(trigrams.make_words(text))
+    times = {}
+    for make_words in (trigrams.make_words, trigrams.make_words_fast):
+        best = min(timeit.repeat(lambda: make_words(text),
+                                 number=1, repeat=repeat))
+        times[make_words.__name__] = best
+        print(f"    {make_words.__name__ + ':':16} "
+              f"{num_words / best:12,.0f} words per second")
+    print(f"    speed up: {times['make_words'] / times['make_words_fast']:.1f}")
+
+
+def measure_memory(build, *args):
+    """
+    call build(*args)
+
+    :returns: (result, retained, peak) -- the memory the result still
+              holds on to when it's done, and the most used while building
+              it
+    """
+    tracemalloc.start()
+    result = build(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak
+
+
+def bench_memory(filenames):
+    """
+    compare the memory used by the dict and compact models
+    """
+    print("Model memory:")
+    words = list(trigrams.iter_words(filenames))
+    tri_dict, dict_size, dict_peak = measure_memory(trigrams.build_trigram,
+                                                    words)
+    model, compact_size, compact_peak = measure_memory(
+        CompactTrigrams.from_words, words)
+    print(f"    {len(words)} words, {len(tri_dict)} pairs, "
+          f"{len(model.words)} distinct words")
+    print(f"    dict model:    {dict_size / 2**20:8.2f} MB "
+          f"(peak while building: {dict_peak / 2**20:.2f} MB)")
+    print(f"    compact model: {compact_size / 2**20:8.2f} MB "
+          f"(peak while building: {compact_peak / 2**20:.2f} MB)")
+    print(f"    ratio:         {dict_size / compact_size:8.1f}")
+    # the vocabulary strings are shared with the word list
+    # so they are not counted above
+    vocab_size = sum(sys.getsizeof(w) for w in model.words)
+    print(f"    (plus {vocab_size / 2**20:.2f} MB of vocabulary strings)")
+
+
+def time_generate(model, num_words):
+    """
+    time generating at least num_words of text from the model
+
+    returns words per second
+    """
+    count = 0
+    start = time.perf_counter()
+    while count < num_words:
+        count += len(trigrams.build_text(model).split())
+    return count / (time.perf_counter() - start)
+
+
+def bench_generate(filenames, num_words=1_000_000):
+    """
+    compare text generation speed with the different models
+
+    A plain dict has to make a list of all its keys every time a random
+    pair is picked -- the others can pick one in O(1). The plain dict is
+    so slow that it only does a 50th of the words.
+    """
+    print(f"Generating {num_words} words:")
+    tri_dict = trigrams.build_trigram_stream(trigrams.iter_words(filenames))
+    models = [("plain dict", dict(tri_dict), num_words // 50),
+              ("TrigramDict", tri_dict, num_words),
+              ("compact model", CompactTrigrams.from_dict(tri_dict), num_words),
+              ]
+    for name, model, num in models:
+        rate = time_generate(model, num)
+        print(f"    {name + ':':15} {rate:12,.0f} words per second")
+
+
+def bench_training(filenames, processes=(1, 2, 4, 8)):
+    """
+    compare building the trigrams sequentially and in parallel
+
+    Each file is one piece of work, so pass in at least as many files
+    as processes to see it scale.
+    """
+    print(f"Training on {len(filenames)} files:")
+    start = time.perf_counter()
+    trigrams.build_trigram_stream(trigrams.iter_words(filenames))
+    print(f"    sequential:   {time.perf_counter() - start:8.2f} s")
+    for num in processes:
+        start = time.perf_counter()
+        build_trigram_parallel(filenames, processes=num)
+        print(f"    {num:2} processes: {time.perf_counter() - start:8.2f} s")
+
+
+def bench_startup(filenames):
+    """
+    compare the time to the first sentence: building the model from
+    scratch vs memory-mapping a saved one
+    """
+    print("Time to first sentence:")
+    start = time.perf_counter()
+    model = CompactTrigrams.from_words(trigrams.iter_words(filenames))
+    trigrams.make_sentence(model, 10)
+    print(f"    building:       {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        model_file = os.path.join(tempdir, "model.tri")
+        save_model(model, model_file)
+        size = os.path.getsize(model_file)
+        start = time.perf_counter()
+        with MappedTrigrams(model_file) as mapped:
+            trigrams.make_sentence(mapped, 10)
+            elapsed = time.perf_counter() - start
+        print(f"    memory mapped:  {elapsed * 1000:8.1f} ms")
+        print(f"    (the file is {size / 2**20:.2f} MB)")
+
+
+def bench_batch(filenames, num_sentences=200_000, num_streams=8):
+    """
+    compare make_sentence with the batch sentence generator
+    """
+    print(f"Generating {num_sentences} sentences:")
+    model = CompactTrigrams.from_words(trigrams.iter_words(filenames))
+    tri_dict = trigrams.build_trigram_stream(trigrams.iter_words(filenames))
+
+    start = time.perf_counter()
+    for _ in range(num_sentences):
+        trigrams.make_sentence(tri_dict, 8)
+    rate = num_sentences / (time.perf_counter() - start)
+    print(f"    make_sentence:     {rate:12,.0f} sentences per second")
+
+    start = time.perf_counter()
+    for _ in iter_sentences(model, 1234, num_sentences):
+        pass
+    rate = num_sentences / (time.perf_counter() - start)
+    print(f"    iter_sentences:    {rate:12,.0f} sentences per second")
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        model_file = os.path.join(tempdir, "model.tri")
+        save_model(model, model_file)
+        start = time.perf_counter()
+        for _ in generate_streams(model_file, num_streams,
+                                  num_sentences // num_streams):
+            pass
+        rate = num_sentences / (time.perf_counter() - start)
+    print(f"    generate_streams:  {rate:12,.0f} sentences per second "
+          f"({os.cpu_count()} cores)")
+
+
+def build_ngram_dict(words, order):
+    """
+    the simple way to do n-grams: tuples of n - 1 words as keys in a dict
+    """
+    ngrams = {}
+    for i in range(len(words) - order + 1):
+        ngrams.setdefault(tuple(words[i:i + order - 1]),
+                          []).append(words[i + order - 1])
+    return ngrams
+
+
+def bench_ngrams(filenames, orders=(2, 3, 4, 5), num_lookups=100_000):
+    """
+    compare the memory use and lookup time of the n-gram trie with a
+    dict of tuples, for each order
+    """
+    print("n-gram models:")
+    words = list(trigrams.iter_words(filenames))
+    rand = random.Random(1234)
+    for order in orders:
+        ngrams, dict_size, dict_peak = measure_memory(build_ngram_dict,
+                                                      words, order)
+        model, trie_size, trie_peak = measure_memory(NGramModel.from_words,
+                                                     words, order)
+        starts = [rand.randrange(len(words) - order) for _ in range(num_lookups)]
+        contexts = [words[i:i + order - 1] for i in starts]
+
+        start = time.perf_counter()
+        for context in contexts:
+            choice(ngrams[tuple(context)])
+        dict_time = (time.perf_counter() - start) / num_lookups
+
+        start = time.perf_counter()
+        for context in contexts:
+            model.get_random_follower(context)
+        trie_time = (time.perf_counter() - start) / num_lookups
+
+        print(f"    order {order}:  dict {dict_size / 2**20:7.2f} MB "
+              f"{dict_time * 1e6:6.2f} us   "
+              f"trie {trie_size / 2**20:7.2f} MB {trie_time * 1e6:6.2f} us")
+        print(f"             (peak while building: dict "
+              f"{dict_peak / 2**20:.2f} MB, trie {trie_peak / 2**20:.2f} MB)")
+
+
+if __name__ == "__main__":
+    filenames = sys.argv[1:]
+    if not filenames:
+        print("You must pass in a filename")
+        sys.exit(1)
+
+    bench_tokenize(filenames)
+    bench_memory(filenames)
+    bench_generate(filenames)
+    bench_training(filenames)
+    bench_startup(filenames)
+    bench_batch(filenames)
+    bench_ngrams(filenames)
@@ -0,0 +1,481 @@
+#!/usr/bin/env python
+
+"""
+A compact trigram model
+
+The dict of tuples -> lists built by trigrams.build_trigram is simple, and
+works fine for a single book. But every word pair is a tuple of two
+strings, and every list holds a reference for every time a word shows up,
+so it grows with the number of words in the text, not the size of the
+vocabulary.
+
+This version:
+
+ * "interns" each word: it is stored once, and referred to by an integer id
+ * packs each pair of ids into a single integer key
+ * stores the followers of each pair as (id, count), rather than a list
+   with every occurrence
+
+All of those are kept in flat arrays (from the array module) rather than
+lots of little Python objects, which is where most of the savings comes
+from. The arrays are sorted by key, so looking up a pair is a binary search.
+
+The sampling distribution is exactly the same as choice(list_of_followers)
+-- a follower that showed up three times is three times as likely to be
+picked -- it's just done with a weighted pick using the counts.
+"""
+
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+# the two ids of a pair are packed into one 64 bit int
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+# used in the transitions array when a pair leads nowhere
+NO_PAIR = ID_MASK
+# the most word pairs to count in a dict before sorting them into a run
+# -- the dicts take a lot more memory than the arrays
+PENDING_PAIRS = 50_000
+# a packed trigram (see _make_run) has the follower and count in the
+# low bits
+FOLLOWER_COUNT_MASK = (1 << 2 * ID_BITS) - 1
+
+
+def pack_pair(id1, id2):
+    """
+    pack a pair of word ids into a single integer key
+    """
+    return (id1 << ID_BITS) | id2
+
+
+def unpack_pair(key):
+    """
+    unpack an integer key back into a pair of word ids
+    """
+    return key >> ID_BITS, key & ID_MASK
+
+
+def build_transitions(keys, offsets, followers):
+    """
+    make the transitions array for the arrays of a model
+
+    (see CompactTrigrams.transitions)
+    """
+    num_pairs = len(keys)
+    transitions = array('I', bytes(4 * len(followers)))
+    for i in range(num_pairs):
+        second = (keys[i] & ID_MASK) << ID_BITS
+        for j in range(offsets[i], offsets[i + 1]):
+            key = second | followers[j]
+            k = bisect_left(keys, key)
+            if k == num_pairs or keys[k] != key:
+                k = NO_PAIR
+            transitions[j] = k
+    return transitions
+
+
+def _make_run(entries):
+    """
+    sort packed trigrams into a run, adding up the counts of any that
+    are the same
+
+    :param entries: an iterable of packed trigrams: the pair key, follower
+                    id and count in one int --
+                    key << 64 | follower << 32 | count
+
+    :returns: a run: (keys, follower_counts) arrays, in order, with
+              follower << 32 | count in follower_counts
+
+    Sorting a lot of ints is done in C, and if the entries are a few
+    sorted runs one after the other, the sort just merges them.
+    """
+    keys = array('Q')
+    follower_counts = array('Q')
+    last = -1
+    for entry in sorted(entries):
+        trigram = entry >> ID_BITS
+        if trigram == last:
+            follower_counts[-1] += entry & ID_MASK
+        else:
+            last = trigram
+            keys.append(entry >> 2 * ID_BITS)
+            follower_counts.append(entry & FOLLOWER_COUNT_MASK)
+    return keys, follower_counts
+
+
+def _run_entries(run):
+    """
+    generate the packed trigrams in a run
+    """
+    keys, follower_counts = run
+    for key, follower_count in zip(keys, follower_counts):
+        yield key << 2 * ID_BITS | follower_count
+
+
+def _pending_entries(pending):
+    """
+    generate the packed trigrams in a dict of pending counts
+    """
+    for key, counts in pending.items():
+        key <<= 2 * ID_BITS
+        if counts.__class__ is dict:
+            for follower, count in counts.items():
+                yield key | follower << ID_BITS | count
+        else:  # seen once
+            yield key | counts << ID_BITS | 1
+
+
+def _group_run(run_keys, follower_counts):
+    """
+    group a run by pair
+
+    :returns: the (keys, offsets, followers, cum_counts) arrays
+    """
+    keys = array('Q')
+    offsets = array('Q')
+    followers = array('I')
+    cum_counts = array('I')
+    last = -1
+    total = 0
+    for key, follower_count in zip(run_keys, follower_counts):
+        if key != last:
+            last = key
+            keys.append(key)
+            offsets.append(len(followers))
+            total = 0
+        total += follower_count & ID_MASK
+        followers.append(follower_count >> ID_BITS)
+        cum_counts.append(total)
+    offsets.append(len(followers))
+    return keys, offsets, followers, cum_counts
+
+
+def _array_entries(keys, offsets, followers, cum_counts):
+    """
+    generate the packed trigrams (see _make_run) in the arrays of a model
+    """
+    for i, key in enumerate(keys):
+        key <<= 2 * ID_BITS
+        total = 0
+        for j in range(offsets[i], offsets[i + 1]):
+            yield key | followers[j] << ID_BITS | cum_counts[j] - total
+            total = cum_counts[j]
+
+
+def merge_arrays(models):
+    """
+    merge the arrays of a number of models that use the same word ids,
+    adding up the counts
+
+    :param models: an iterable of (keys, offsets, followers, cum_counts)
+
+    :returns: (keys, offsets, followers, cum_counts) for all of them
+    """
+    return _group_run(*_make_run(chain.from_iterable(
+        _array_entries(*arrays) for arrays in models)))
+
+
+class CompactTrigrams:
+    """
+    A trigram model with interned words and counted followers
+
+    Build one with from_words() or from_dict(), or create an empty one
+    and call add_words() as many times as you like.
+
+    The data is stored as:
+
+    words: list of all the words -- the index is the word's id
+    keys: sorted array of packed pair keys
+    offsets: the followers of keys[i] are in followers[offsets[i]:offsets[i + 1]]
+    followers: array of follower word ids
+    cum_counts: the running total of the counts of the followers of each pair
+                (that's what's needed for the weighted random pick)
+    """
+
+    def __init__(self):
+        self.words = []
+        self.word_ids = {}
+        self.keys = array('Q')
+        self.offsets = array('Q', [0])
+        self.followers = array('I')
+        self.cum_counts = array('I')
+        # new trigrams are counted in here, and sorted into a run when
+        # there are PENDING_PAIRS of them.
+        # key: {follower_id: count} -- or just follower_id, for a pair
+        # that has only been seen once (most of them)
+        self._pending = {}
+        # the sorted runs waiting to be packed into the arrays when they
+        # are needed -- biggest first (see _flush)
+        self._runs = []
+        self._transitions = None
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        build a model from an iterable of words in order
+        """
+        model = cls()
+        model.add_words(words)
+        return model
+
+    @classmethod
+    def from_dict(cls, word_pairs):
+        """
+        build a model from a trigrams dict as made by trigrams.build_trigram
+        """
+        model = cls()
+        for (word1, word2), followers in word_pairs.items():
+            counts = model._pending_counts(
+                pack_pair(model.intern(word1), model.intern(word2)))
+            for follower in followers:
+                follower = model.intern(follower)
+                counts[follower] = counts.get(follower, 0) + 1
+            if len(model._pending) >= PENDING_PAIRS:
+                model._flush()
+        model.compact()
+        return model
+
+    def intern(self, word):
+        """
+        return the id for a word -- adding it to the vocabulary if it's new
+        """
+        try:
+            return self.word_ids[word]
+        except KeyError:
+            word_id = self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            return word_id
+
+    def add_words(self, words):
+        """
+        add the trigrams in an iterable of words
+
+        only one word is looked at at a time, so this can be passed a
+        generator, like trigrams.iter_words, to build a model of a huge
+        amount of text.
+        """
+        self.add_ids(map(self.intern, words))
+
+    def add_ids(self, ids):
+        """
+        add the trigrams in an iterable of word ids
+
+        :param ids: the ids of the words in order -- as given by intern()
+        """
+        pending = self._pending
+        ids = iter(ids)
+        try:
+            first = next(ids)
+            second = next(ids)
+        except StopIteration:  # not enough words for even one trigram
+            return
+        for follower in ids:
+            key = pack_pair(first, second)
+            first, second = second, follower
+            counts = pending.get(key)
+            if counts is None:
+                pending[key] = follower
+                if len(pending) >= PENDING_PAIRS:
+                    # sort them a batch at a time, so the dict
+                    # never gets big
+                    self._flush()
+                    pending = self._pending
+            elif counts.__class__ is dict:
+                counts[follower] = counts.get(follower, 0) + 1
+            else:  # it's been seen once before
+                pending[key] = {counts: 1}
+                pending[key][follower] = pending[key].get(follower, 0) + 1
+        self.compact()
+
+    def _pending_counts(self, key):
+        """
+        the dict of pending follower counts for a key
+        """
+        counts = self._pending.get(key)
+        if counts is None:
+            counts = self._pending[key] = {}
+        elif counts.__class__ is not dict:
+            counts = self._pending[key] = {counts: 1}
+        return counts
+
+    def add_counts(self, key, counts):
+        """
+        add follower counts for a packed pair key
+
+        :param key: a packed pair key, from pack_pair()
+
+        :param counts: an iterable of (follower_id, count) pairs
+        """
+        pending = self._pending_counts(key)
+        for follower, count in counts:
+            pending[follower] = pending.get(follower, 0) + count
+
+    def update(self, other):
+        """
+        add all the trigrams in another model to this one
+
+        The counts are added together, so building models of two pieces of
+        text and updating one with the other is the same as building a
+        model of both -- except for the trigrams that span the join.
+        """
+        # the other model has its own ids for the words
+        id_map = [self.intern(word) for word in other.words]
+        for key, counts in other.items():
+            id1, id2 = unpack_pair(key)
+            self.add_counts(pack_pair(id_map[id1], id_map[id2]),
+                            [(id_map[f], count) for f, count in counts])
+            if len(self._pending) >= PENDING_PAIRS:
+                self._flush()
+
+    def items(self):
+        """
+        generate (key, [(follower_id, count), ...]) for every pair,
+        in key order
+        """
+        self.compact()
+        return self._packed_items()
+
+    def _packed_items(self):
+        offsets = self.offsets
+        followers = self.followers
+        cum_counts = self.cum_counts
+        for i, key in enumerate(self.keys):
+            counts = []
+            total = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                counts.append((followers[j], cum_counts[j] - total))
+                total = cum_counts[j]
+            yield key, counts
+
+    def compact(self):
+        """
+        pack any pending trigrams into the arrays
+
+        This is done automatically when needed, but it can be called to
+        free up the memory used by the pending counts.
+
+        The trigrams already in the arrays, and all the runs, are merged
+        with one sort, and grouped by pair into new arrays.
+        """
+        self._flush()
+        if not self._runs:
+            return
+        runs = self._runs
+        self._runs = []
+        num_followers = len(self.followers)
+        run = _make_run(chain(
+            _array_entries(self.keys, self.offsets, self.followers,
+                           self.cum_counts),
+            *map(_run_entries, runs)))
+        (self.keys, self.offsets,
+         self.followers, self.cum_counts) = _group_run(*run)
+        if len(self.followers) != num_followers:
+            # there are new pairs or followers -- if not, only the counts
+            # have changed, and the transitions are still good
+            self._transitions = None
+
+    def _flush(self):
+        """
+        sort the pending trigrams into a run
+
+        Then the last runs are merged as long as one is no more than twice
+        the size of the one after it -- like carrying in a binary counter.
+        So there are only ever a few runs, and each trigram is copied
+        about log(n) times, rather than every time a batch is added.
+        """
+        if not self._pending:
+            return
+        runs = self._runs
+        runs.append(_make_run(_pending_entries(self._pending)))
+        self._pending = {}
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            runs[-2:] = [_make_run(chain(*map(_run_entries, runs[-2:])))]
+
+    def transitions(self):
+        """
+        an array with the index of the pair each follower leads to
+
+        That is, if pair i is (a, b), and followers[j] is c, then
+        transitions[j] is the index of (b, c) -- or NO_PAIR if (b, c)
+        isn't there. This lets a chain of words be generated without
+        looking up each new pair.
+
+        It's made the first time it's asked for, and then kept.
+        """
+        self.compact()
+        if self._transitions is None:
+            self._transitions = build_transitions(self.keys, self.offsets,
+                                                  self.followers)
+        return self._transitions
+
+    def _index(self, pair):
+        """
+        the index of a pair of words in self.keys -- or None if not there
+        """
+        word_ids = self.word_ids
+        try:
+            key = pack_pair(word_ids[pair[0]], word_ids[pair[1]])
+        except KeyError:  # one of the words isn't in the vocabulary
+            return None
+        self.compact()
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def __len__(self):
+        """
+        the number of word pairs
+        """
+        self.compact()
+        return len(self.keys)
+
+    def __contains__(self, pair):
+        return self._index(pair) is not None
+
+    def get_followers(self, pair):
+        """
+        return a dict of follower_word: count for a pair of words
+
+        raises a KeyError if the pair is not there
+        """
+        i = self._index(pair)
+        if i is None:
+            raise KeyError(pair)
+        result = {}
+        total = 0
+        for j in range(self.offsets[i], self.offsets[i + 1]):
+            result[self.words[self.followers[j]]] = self.cum_counts[j] - total
+            total = self.cum_counts[j]
+        return result
+
+    def pick_random_pair(self):
+        """
+        return a random pair of words from the model
+        """
+        self.compact()
+        id1, id2 = unpack_pair(self.keys[random.randrange(len(self.keys))])
+        return self.words[id1], self.words[id2]
+
+    def _random_follower(self, i):
+        """
+        pick a weighted random follower of the pair at index i
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        cum_counts = self.cum_counts
+        total = cum_counts[end - 1]
+        j = bisect_right(cum_counts, random.randrange(total), start, end)
+        return self.words[self.followers[j]]
+
+    def get_random_follower(self, pair):
+        """
+        return a random word that follows the pair
+
+        If the pair is not there, a follower of a random pair is returned
+        """
+        i = self._index(pair)
+        if i is None:
+            i = random.randrange(len(self))
+        return self._random_follower(i)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+"""
+Saving a compact trigram model to disk, and memory-mapping it back in
+
+Building the trigrams means reading and tokenizing the whole book every
+time. If a model is going to be used again and again, it can be saved once
+in a compact binary file, and then "memory-mapped" back in. That means the
+operating system pages in just the bits of the file that are actually
+used, and shares those pages between all the processes that have the
+file open -- so "loading" the model takes next to no time at all.
+
+The file holds the same arrays as a CompactTrigrams (see
+compact_trigrams.py), one after the other:
+
+    header: magic number, byte order check and the length of each array
+    word_starts: where each word starts in the vocabulary text
+    vocabulary: all the words, utf-8 encoded, in sorted order
+    keys: the packed word-pair keys, sorted
+    offsets: where the followers of each pair start
+    followers: the follower word ids
+    cum_counts: the running total of the follower counts
+    transitions: the index of the pair each follower leads to
+
+The transitions (see CompactTrigrams.transitions) take a while to work
+out, so they are worked out once, when the model is saved, rather than
+every time it is used -- by every process that uses it.
+
+The words are sorted, so a word's id can be found with a binary search,
+rather than building a dict of the whole vocabulary when the file is
+opened.
+
+Usage:
+
+    python mapped_trigrams.py model.tri book.txt ...  # build and save it
+    python mapped_trigrams.py model.tri  # use the saved model
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+import trigrams
+from compact_trigrams import (CompactTrigrams, build_transitions,
+                             pack_pair, unpack_pair)
+
+MAGIC = b"TRIGRAM2"
+# if this comes back different, the file was written on a machine with
+# a different byte order
+BYTE_ORDER_CHECK = 0x01020304
+# magic, byte order, number of words, vocabulary bytes, pairs, followers
+HEADER = struct.Struct("8sQQQQQ")
+
+
+def _padding(size):
+    """
+    the number of bytes needed to get size up to a multiple of 8
+
+    (so the arrays that follow all line up nicely in memory)
+    """
+    return -size % 8
+
+
+def save_model(model, filename):
+    """
+    save a trigram model to a binary file
+
+    :param model: a CompactTrigrams, or a trigrams dict from build_trigram
+
+    :param filename: the file to write
+    """
+    if not isinstance(model, CompactTrigrams):
+        model = CompactTrigrams.from_dict(model)
+    model.compact()
+
+    # renumber the words in sorted order
+    order = sorted(range(len(model.words)), key=model.words.__getitem__)
+    new_ids = array('I', bytes(4 * len(order)))
+    for new_id, old_id in enumerate(order):
+        new_ids[old_id] = new_id
+
+    word_starts = array('Q', [0])
+    vocabulary = bytearray()
+    for old_id in order:
+        vocabulary += model.words[old_id].encode("utf-8")
+        word_starts.append(len(vocabulary))
+
+    # the keys change when the words are renumbered, so need re-sorting
+    pairs = []
+    for key, counts in model.items():
+        id1, id2 = unpack_pair(key)
+        pairs.append((pack_pair(new_ids[id1], new_ids[id2]), counts))
+    pairs.sort()
+
+    keys = array('Q')
+    offsets = array('Q', [0])
+    followers = array('I')
+    cum_counts = array('I')
+    for key, counts in pairs:
+        total = 0
+        for follower, count in counts:
+            total += count
+            followers.append(new_ids[follower])
+            cum_counts.append(total)
+        keys.append(key)
+        offsets.append(len(followers))
+    transitions = build_transitions(keys, offsets, followers)
+
+    with open(filename, 'wb') as outfile:
+        outfile.write(HEADER.pack(MAGIC, BYTE_ORDER_CHECK, len(order),
+                                  len(vocabulary), len(keys), len(followers)))
+        for data in (word_starts, vocabulary, keys, offsets,
+                     followers, cum_counts, transitions):
+            data = bytes(data)
+            outfile.write(data)
+            outfile.write(bytes(_padding(len(data))))
+
+
+class Vocabulary:
+    """
+    The sorted words in a mapped file, looked like a list
+
+    each word is only decoded when it's asked for
+    """
+
+    def __init__(self, word_starts, text):
+        self.word_starts = word_starts
+        self.text = text
+
+    def __len__(self):
+        return len(self.word_starts) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("word id out of range")
+        return str(self.text[self.word_starts[i]:self.word_starts[i + 1]],
+                   "utf-8")
+
+
+class WordIds:
+    """
+    Looks up the id of a word in a Vocabulary -- looks like a dict
+
+    As the words are sorted, the id can be found with a binary search
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+
+    def __getitem__(self, word):
+        i = bisect_left(self.vocabulary, word)
+        if i < len(self.vocabulary) and self.vocabulary[i] == word:
+            return i
+        raise KeyError(word)
+
+    def __contains__(self, word):
+        try:
+            self[word]
+        except KeyError:
+            return False
+        return True
+
+
+class MappedTrigrams(CompactTrigrams):
+    """
+    A read-only trigram model, memory-mapped from a file written by
+    save_model()
+
+    It works just like a CompactTrigrams (and can be used with the
+    functions in trigrams.py), but nothing can be added to it.
+
+    It can be used as a context manager, to close the file when done.
+    """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as infile:
+            self._mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pending = {}
+        self._runs = []
+
+        (magic, byte_order, num_words, vocab_size, num_pairs,
+         num_followers) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a saved trigram model")
+        if byte_order != BYTE_ORDER_CHECK:
+            raise ValueError(f"{filename} was saved with a different "
+                             "byte order")
+
+        data = memoryview(self._mmap)
+        self._views = []
+        position = HEADER.size
+
+        def section(size, typecode):
+            # a view into the next chunk of the file, as an array
+            nonlocal position
+            view = data[position:position + size]
+            position += size + _padding(size)
+            if typecode is not None:
+                view = view.cast(typecode)
+            self._views.append(view)
+            return view
+
+        word_starts = section(8 * (num_words + 1), 'Q')
+        self.words = Vocabulary(word_starts, section(vocab_size, None))
+        self.word_ids = WordIds(self.words)
+        self.keys = section(8 * num_pairs, 'Q')
+        self.offsets = section(8 * (num_pairs + 1), 'Q')
+        self.followers = section(4 * num_followers, 'I')
+        self.cum_counts = section(4 * num_followers, 'I')
+        self._transitions = section(4 * num_followers, 'I')
+        data.release()
+
+    def intern(self, word):
+        raise TypeError("a MappedTrigrams model is read-only")
+
+    def add_counts(self, key, counts):
+        raise TypeError("a MappedTrigrams model is read-only")
+
+    def close(self):
+        """
+        close the file -- the model can't be used after this
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+if __name__ == "__main__":
+    try:
+        model_file = sys.argv[1]
+    except IndexError:
+        print("You must pass in a model file name")
+        sys.exit(1)
+
+    books = sys.argv[2:]
+    if books:
+        save_model(CompactTrigrams.from_words(trigrams.iter_words(books)),
+                   model_file)
+
+    with MappedTrigrams(model_file) as model:
+        print(trigrams.build_text(model))
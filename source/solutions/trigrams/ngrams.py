@@ -0,0 +1,444 @@
+#!/usr/bin/env python
+
+"""
+n-grams: trigrams generalized to any number of words
+
+A trigram model picks the next word based on the last two. An n-gram
+model picks it based on the last n - 1 words: a 2-gram (bigram) model
+just uses the last word, a 5-gram model the last four.
+
+Simply using tuples of n - 1 words as keys in a dict would work, but
+uses a lot of memory: every key is a new tuple, and the same words show
+up in lots of keys. So this uses a "trie" (a prefix tree): the root has a
+child for every word, each of those has a child for every word that
+followed it, and so on down to n levels deep. Each node keeps a count of
+how many times its sequence of words showed up.
+
+That shares the common prefixes, and it means a trie built for n-grams
+also has everything needed for all the lower orders: the children of the
+node for ("I", "wish") are the followers of that pair (trigrams), the
+children of the node for "wish" are the followers of that word (bigrams).
+
+That lets it "back off": if the last n - 1 words were never seen, it
+tries the last n - 2, and so on, down to just picking a word by how
+often it shows up.
+
+Like CompactTrigrams (see compact_trigrams.py), the words are interned to
+integer ids, and the trie is packed into flat arrays -- one set for each
+level of the trie:
+
+    ids: the word id of each node
+    cum_counts: the running total of the counts of each group of siblings
+    parents: the index of each node's parent in the level above
+
+The nodes of a level are sorted by parent, and each group of siblings by
+word id, so both the children of a node and a child with a given word can
+be found with a binary search.
+
+New n-grams are counted in dicts first. Each full batch is packed into a
+little trie of its own (a "run"), and the runs are merged two at a time
+as they pile up, then all into the main trie when it's needed -- so
+adding a few words doesn't mean rebuilding the whole trie, and the dicts
+never get big.
+"""
+
+import random
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain
+
+import trigrams
+
+# the word ids of a sequence are packed into one int, ID_BITS each
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+# the most n-grams of the highest order to count in the dicts before
+# packing them into a run
+PENDING_NGRAMS = 50_000
+# a packed entry (see _build_levels) has the count in the low bits
+COUNT_BITS = 64
+COUNT_MASK = (1 << COUNT_BITS) - 1
+
+
+class Level:
+    """
+    the packed nodes of one level of the trie
+    """
+
+    def __init__(self):
+        self.ids = array('I')
+        self.cum_counts = array('Q')
+        self.parents = array('I')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def children(self, j):
+        """
+        the range of the nodes in this level whose parent is node j
+        """
+        lo = bisect_left(self.parents, j)
+        return lo, bisect_right(self.parents, j, lo)
+
+    def count(self, j):
+        """
+        the count of node j -- the difference from the running total of
+        the sibling before it
+        """
+        if j > 0 and self.parents[j - 1] == self.parents[j]:
+            return self.cum_counts[j] - self.cum_counts[j - 1]
+        return self.cum_counts[j]
+
+
+def _build_levels(level_entries):
+    """
+    make the levels of a trie from packed entries
+
+    :param level_entries: an iterable of the entries for each level, from
+                          the top. An entry is the packed word ids of a
+                          sequence and its count, in one int:
+                          key << COUNT_BITS | count. They don't need to be
+                          sorted, and the counts of any that are the same
+                          are added up.
+
+    :returns: a list of Levels
+
+    Every sequence's prefix (all but the last word) has to be in the
+    level above.
+
+    Sorting the packed keys puts them in the order the trie needs: by the
+    prefix first, then by the last word. So the parents only go up, and
+    a sort (done in C) of a few sorted runs one after the other is really
+    just a merge.
+    """
+    levels = []
+    above = [0]  # the keys of the level above -- the root's is 0
+    for entries in level_entries:
+        level = Level()
+        ids = level.ids
+        parents = level.parents
+        cum_counts = level.cum_counts
+        keys = []
+        last = -1
+        parent = 0
+        total = 0
+        for entry in sorted(entries):
+            key = entry >> COUNT_BITS
+            total += entry & COUNT_MASK
+            if key == last:
+                cum_counts[-1] = total
+                continue
+            last = key
+            parent_key = key >> ID_BITS
+            if above[parent] != parent_key:
+                # the next parent with any children
+                parent += 1
+                while above[parent] != parent_key:
+                    parent += 1
+                total = entry & COUNT_MASK
+            keys.append(key)
+            ids.append(key & ID_MASK)
+            parents.append(parent)
+            cum_counts.append(total)
+        levels.append(level)
+        above = keys
+    return levels
+
+
+def _level_entries(levels):
+    """
+    generate the packed entries (see _build_levels) of each level of a trie
+    """
+    keys = [0]
+    for level in levels:
+        entries = []
+        new_keys = []
+        last_parent = -1
+        before = 0  # the running total of the sibling before
+        for word_id, parent, total in zip(level.ids, level.parents,
+                                          level.cum_counts):
+            key = keys[parent] << ID_BITS | word_id
+            new_keys.append(key)
+            if parent != last_parent:
+                last_parent = parent
+                before = 0
+            entries.append(key << COUNT_BITS | total - before)
+            before = total
+        keys = new_keys
+        yield entries
+
+
+def _merge_levels(tries):
+    """
+    merge the levels of a number of tries into one, adding up the counts
+    """
+    return _build_levels(map(chain.from_iterable,
+                            zip(*map(_level_entries, tries))))
+
+
+class NGramModel:
+    """
+    An n-gram model, stored in a trie
+
+    :param order=3: the n in n-gram -- from 2 up
+
+    Build one with from_words(), or create it and call add_words().
+    """
+
+    def __init__(self, order=3):
+        if order < 2:
+            raise ValueError("order must be at least 2")
+        self.order = order
+        self.words = []
+        self.word_ids = {}
+        self.levels = [Level() for _ in range(order)]
+        # the last (up to) order words added -- so the n-grams that span
+        # two calls to add_words are counted too
+        self._window = deque(maxlen=order)
+        # new sequences of words are counted in here, one dict for each
+        # level: {packed word ids: count}
+        self._pending = [{} for _ in range(order)]
+        # the packed batches waiting to be merged into the levels when
+        # they are needed -- each a list of Levels, biggest first
+        self._runs = []
+
+    @classmethod
+    def from_words(cls, words, order=3):
+        """
+        build a model from an iterable of words in order
+        """
+        model = cls(order)
+        model.add_words(words)
+        model.compact()
+        return model
+
+    def intern(self, word):
+        """
+        return the id for a word -- adding it to the vocabulary if it's new
+        """
+        try:
+            return self.word_ids[word]
+        except KeyError:
+            word_id = self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            return word_id
+
+    def add_words(self, words):
+        """
+        add the n-grams in an iterable of words
+
+        only one word is looked at at a time, so this can be passed a
+        generator, like trigrams.iter_words. The words carry on from the
+        ones added last time.
+        """
+        intern = self.intern
+        window = self._window
+        pending = self._pending
+        if not pending[0]:
+            pending = self._new_batch()
+        for word in words:
+            window.append(intern(word))
+            # count the sequences that end with this word -- one of each
+            # length, up to order. (each of them ends up as a node, with
+            # the one before it as its parent)
+            key = 0
+            shift = 0
+            for word_id, counts in zip(reversed(window), pending):
+                key |= word_id << shift
+                shift += ID_BITS
+                counts[key] = counts.get(key, 0) + 1
+            if len(pending[-1]) >= PENDING_NGRAMS:
+                self._flush()
+                pending = self._new_batch()
+
+    def _new_batch(self):
+        """
+        start a new batch of pending counts
+
+        The n-grams at the start of the batch have their prefixes in the
+        batch before. So the sequences of the last order - 1 words are put
+        in too, with a count of 0, to be their parents.
+        """
+        pending = self._pending
+        last_words = list(self._window)[1 - self.order:]
+        for start in range(len(last_words)):
+            key = 0
+            for counts, word_id in zip(pending, last_words[start:]):
+                key = key << ID_BITS | word_id
+                counts.setdefault(key, 0)
+        return pending
+
+    def compact(self):
+        """
+        pack any pending counts into the arrays
+
+        This is done automatically when needed, but it can be called to
+        free up the memory used by the pending counts.
+
+        The main trie and all the runs are merged in one go, a level at
+        a time.
+        """
+        self._flush()
+        if not self._runs:
+            return
+        runs = self._runs
+        self._runs = []
+        self.levels = _merge_levels([self.levels] + runs)
+
+    def _flush(self):
+        """
+        pack the pending counts into a run
+
+        Then the last runs are merged as long as one is no more than twice
+        the size of the one after it -- like carrying in a binary counter.
+        So there are only ever a few runs, and each n-gram is copied about
+        log(n) times, rather than every time a batch is added.
+        """
+        pending = self._pending
+        if not pending[0]:
+            return
+        self._pending = [{} for _ in range(self.order)]
+        runs = self._runs
+        runs.append(_build_levels(
+            [key << COUNT_BITS | count for key, count in counts.items()]
+            for counts in pending))
+        while (len(runs) > 1
+               and len(runs[-2][-1]) <= 2 * len(runs[-1][-1])):
+            runs[-2:] = [_merge_levels(runs[-2:])]
+
+    def _node(self, ids):
+        """
+        find the node for a sequence of word ids
+
+        :returns: its index in the level for that many words, or None if
+                  the sequence is not there
+        """
+        j = None
+        for level, word_id in zip(self.levels, ids):
+            lo, hi = (0, len(level)) if j is None else level.children(j)
+            j = bisect_left(level.ids, word_id, lo, hi)
+            if j == hi or level.ids[j] != word_id:
+                return None
+        return j
+
+    def _children(self, context):
+        """
+        find the children of the node for a sequence of word ids
+
+        :returns: (lo, hi) -- the children are at lo:hi in the next level
+                  or None if the sequence is not there.
+        """
+        self.compact()
+        if not context:
+            return 0, len(self.levels[0])
+        j = self._node(context)
+        if j is None:
+            return None
+        return self.levels[len(context)].children(j)
+
+    def _context_ids(self, context):
+        """
+        the ids of the last (up to) order - 1 words of the context
+
+        stops at a word that isn't in the vocabulary -- as no context with
+        that word in it could be found anyway
+        """
+        ids = []
+        for word in reversed(context[-(self.order - 1):]):
+            try:
+                ids.append(self.word_ids[word])
+            except KeyError:
+                break
+        ids.reverse()
+        return ids
+
+    def get_followers(self, context):
+        """
+        return a dict of follower_word: count for a sequence of words
+
+        :param context: the words -- up to order - 1 of them. An empty
+                        context gives the count of every word.
+
+        raises a KeyError if the context is not there, or nothing ever
+        followed it (no backing off)
+        """
+        if len(context) >= self.order:
+            raise KeyError(context)
+        try:
+            ids = [self.word_ids[word] for word in context]
+        except KeyError:
+            raise KeyError(context)
+        found = self._children(ids)
+        if found is None or found[0] == found[1]:
+            raise KeyError(context)
+        level = self.levels[len(ids)]
+        return {self.words[level.ids[j]]: level.count(j)
+                for j in range(*found)}
+
+    def get_random_follower(self, context):
+        """
+        return a random word to follow the context
+
+        :param context: a sequence of words -- only the last order - 1
+                        are used
+
+        If those words were never followed by anything, it backs off to
+        fewer words, all the way down to a random word, picked by how
+        often each shows up.
+        """
+        ids = self._context_ids(context)
+        for k in range(len(ids), -1, -1):
+            found = self._children(ids[len(ids) - k:])
+            if found is not None and found[0] < found[1]:
+                lo, hi = found
+                level = self.levels[k]
+                total = level.cum_counts[hi - 1]
+                j = bisect_right(level.cum_counts, random.randrange(total),
+                                 lo, hi)
+                return self.words[level.ids[j]]
+        raise ValueError("the model is empty")
+
+    def pick_random_context(self):
+        """
+        return a random sequence of order - 1 words from the model
+        """
+        self.compact()
+        depth = self.order - 2
+        j = random.randrange(len(self.levels[depth]))
+        ids = []
+        for level in reversed(self.levels[:depth + 1]):
+            ids.append(level.ids[j])
+            j = level.parents[j]
+        return [self.words[word_id] for word_id in reversed(ids)]
+
+    def make_sentence(self, num_words):
+        """
+        make a sentence from the model with num_words words
+
+        num_words should be at least order - 1
+        """
+        sentence = self.pick_random_context()
+        while len(sentence) < num_words:
+            sentence.append(self.get_random_follower(sentence))
+        sentence = sentence[:num_words]
+
+        sentence[0] = sentence[0].capitalize()
+        sentence[-1] += "."
+        return " ".join(sentence)
+
+
+if __name__ == "__main__":
+    try:
+        order = int(sys.argv[1])
+        filenames = sys.argv[2:]
+    except (IndexError, ValueError):
+        filenames = None
+    if not filenames:
+        print("You must pass in the order, and a filename")
+        sys.exit(1)
+
+    model = NGramModel.from_words(trigrams.iter_words(filenames), order)
+    print(" ".join(model.make_sentence(random.randint(order, 14))
+                   for _ in range(random.randint(7, 10))))
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+
+"""
+Building trigrams from a lot of books, using all the cores
+
+This is done in three rounds of work for a pool of processes:
+
+ 1. Each book is handed off to a worker, which reads it and turns it into
+    an array of word ids. The books are then joined up into one array,
+    with one vocabulary shared by all of them.
+
+ 2. The array is cut into a slice for each worker, one after the other.
+    Each slice overlaps the next by two words, so every trigram is in
+    exactly one of them -- including the ones that span the end of one
+    book and the start of the next. Each worker counts the trigrams in
+    its slice, and splits them up by their first word, into ranges of
+    word ids.
+
+ 3. Each worker takes one range of first words, and puts together the
+    counts for it from all the slices.
+
+As no two ranges have any word pairs in common, the results of the last
+round can simply be put together -- nothing has to be merged pair by pair
+in the main process. And each worker is only sent its own share of the
+words, not all of them.
+
+Arrays of numbers are a lot faster to pass between processes (which means
+pickling them) than dicts full of strings, so that's what is passed
+around as much as possible.
+
+Usage:
+
+    python parallel_trigrams.py book1.txt book2.txt ...
+
+or a directory -- in which case all the .txt files in it are used.
+"""
+
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool
+
+import trigrams
+from compact_trigrams import CompactTrigrams, merge_arrays, pack_pair
+
+
+def read_book(filename):
+    """
+    read a book, and turn it into word ids
+
+    :param filename: the name of the book to read
+
+    :returns: (words, ids) where words is a list of the distinct words, in
+              the order they first show up, and ids is an array of the
+              index in words of each word in the book
+    """
+    word_ids = {}
+    ids = array('I', (word_ids.setdefault(word, len(word_ids))
+                      for word in trigrams.iter_words([filename])))
+    return list(word_ids), ids
+
+
+def join_books(books):
+    """
+    join up the word ids of a number of books, renumbered to use one
+    vocabulary for all of them
+
+    :param books: an iterable of (words, ids), as returned by read_book,
+                  in the order of the books
+
+    :returns: (words, ids) for all the books together -- the words are
+              numbered the same way as a CompactTrigrams would number them
+    """
+    word_ids = {}
+    ids = array('I')
+    for book_words, book_ids in books:
+        id_map = [word_ids.setdefault(word, len(word_ids))
+                  for word in book_words]
+        ids.extend(map(id_map.__getitem__, book_ids))
+    return list(word_ids), ids
+
+
+def split_ids(ids, num_words, num_parts):
+    """
+    split the word ids into ranges, so that about the same number of
+    trigrams start with the words in each range
+
+    :param ids: the array of word ids
+
+    :param num_words: the number of distinct words
+
+    :param num_parts: the number of ranges wanted -- there may be fewer,
+                      if a few words start a lot of the trigrams
+    """
+    total = len(ids) - 2
+    if total <= 0 or num_parts <= 1:
+        return [range(num_words)]
+    # the number of trigrams each word starts
+    counts = Counter(islice(ids, total))
+    parts = []
+    start = 0
+    seen = 0
+    for word_id in range(num_words):
+        seen += counts[word_id]
+        if seen * num_parts >= total * (len(parts) + 1):
+            parts.append(range(start, word_id + 1))
+            start = word_id + 1
+    if start < num_words:
+        parts.append(range(start, num_words))
+    return parts
+
+
+def slice_ids(ids, num_slices):
+    """
+    cut the word ids into slices of about the same size
+
+    Each slice overlaps the next by two ids, so each trigram starts in
+    exactly one of them.
+
+    :param ids: the array of word ids
+
+    :param num_slices: the number of slices wanted -- there may be fewer,
+                       if there are only a few words
+
+    :returns: a list of arrays
+    """
+    total = len(ids) - 2
+    if total <= 0:
+        return []
+    num_slices = max(1, min(num_slices, total))
+    bounds = [total * i // num_slices for i in range(num_slices + 1)]
+    return [ids[start:stop + 2] for start, stop in zip(bounds, bounds[1:])]
+
+
+def count_slice(ids, parts):
+    """
+    count the trigrams in a slice of the word ids
+
+    :param ids: an array of word ids, from slice_ids
+
+    :param parts: the ranges of first word ids, from split_ids
+
+    :returns: a dict for each range, of the trigrams that start with the
+              words in it: {(id1, id2): [follower ids, in order]}
+    """
+    # the ids work just as well as words
+    word_pairs = trigrams.build_trigram_stream(ids, {})
+    starts = [part.start for part in parts]
+    counts = [{} for _ in parts]
+    for pair, followers in word_pairs.items():
+        counts[bisect_right(starts, pair[0]) - 1][pair] = followers
+    return counts
+
+
+def build_part(counts, words):
+    """
+    build the trigrams that start with one range of words
+
+    :param counts: the dicts for the range from count_slice, one for each
+                   slice, in order
+
+    :param words: the list of words the ids refer to
+
+    :returns: a regular dict of trigrams -- the keys and followers are the
+              words, like build_trigram makes
+    """
+    id_pairs = {}
+    for slice_counts in counts:
+        for pair, followers in slice_counts.items():
+            if pair in id_pairs:
+                id_pairs[pair].extend(followers)
+            else:
+                id_pairs[pair] = followers
+    return {(words[first], words[second]): [words[f] for f in followers]
+            for (first, second), followers in id_pairs.items()}
+
+
+def count_compact_slice(ids, parts):
+    """
+    count the compact trigrams in a slice of the word ids
+
+    :param ids: an array of word ids, from slice_ids
+
+    :param parts: the ranges of first word ids, from split_ids
+
+    :returns: the (keys, offsets, followers, cum_counts) arrays of the
+              trigrams that start with the words in each range. The keys
+              are sorted by the first word first, so each range is just a
+              slice of the arrays of the whole model.
+    """
+    model = CompactTrigrams()
+    model.add_ids(ids)
+    keys = model.keys
+    offsets = model.offsets
+    counts = []
+    for part in parts:
+        i = bisect_left(keys, pack_pair(part.start, 0))
+        j = bisect_left(keys, pack_pair(part.stop, 0))
+        start, stop = offsets[i], offsets[j]
+        counts.append((keys[i:j],
+                       array('Q', map(start.__rsub__, offsets[i:j + 1])),
+                       model.followers[start:stop],
+                       model.cum_counts[start:stop]))
+    return counts
+
+
+def build_compact_part(counts):
+    """
+    build the compact trigrams that start with one range of words
+
+    :param counts: the arrays for the range from count_compact_slice, one
+                   set for each slice
+
+    :returns: the (keys, offsets, followers, cum_counts) arrays of a
+              CompactTrigrams with just those trigrams in it
+    """
+    return merge_arrays(counts)
+
+
+def join_parts(parts):
+    """
+    put together the trigram dicts from build_part into one TrigramDict
+
+    No word pair is in more than one of them, so they can just be added
+    """
+    word_pairs = {}
+    for part in parts:
+        word_pairs.update(part)
+    return trigrams.TrigramDict(word_pairs)
+
+
+def join_compact_parts(words, parts):
+    """
+    put together the arrays from build_compact_part into one CompactTrigrams
+
+    :param words: the list of words the ids refer to
+
+    :param parts: the arrays for each range of ids, in order
+
+    The keys are sorted by the first word first, so the arrays for each
+    range of words just go one after the other.
+    """
+    model = CompactTrigrams()
+    for word in words:
+        model.intern(word)
+    for keys, offsets, followers, cum_counts in parts:
+        shift = len(model.followers)
+        model.keys.extend(keys)
+        model.offsets.extend(map(shift.__add__, offsets[1:]))
+        model.followers.extend(followers)
+        model.cum_counts.extend(cum_counts)
+    return model
+
+
+def build_trigram_parallel(filenames, processes=None, compact=False):
+    """
+    build the trigrams for a number of books, using a pool of processes
+
+    :param filenames: the books to read, in order
+
+    :param processes=None: number of worker processes -- defaults to the
+                           number of cores
+
+    :param compact=False: build a CompactTrigrams, rather than a TrigramDict
+
+    The result is the same as:
+
+        trigrams.build_trigram_stream(trigrams.iter_words(filenames))
+
+    (though the word pairs of a TrigramDict may be in a different order)
+    """
+    if processes is None:
+        processes = os.cpu_count()
+    with Pool(processes) as pool:
+        # imap hands the books back in order, so they can be joined
+        # as they come in.
+        words, ids = join_books(pool.imap(read_book, filenames))
+        parts = split_ids(ids, len(words), processes)
+        slices = [(ids_slice, parts)
+                  for ids_slice in slice_ids(ids, processes)]
+        if compact:
+            counts = pool.starmap(count_compact_slice, slices)
+            # zip(*counts) gives the counts from every slice for each range
+            return join_compact_parts(
+                words, pool.map(build_compact_part, zip(*counts)))
+        counts = pool.starmap(count_slice, slices)
+        return join_parts(pool.starmap(
+            build_part, [(part_counts, words)
+                         for part_counts in zip(*counts)]))
+
+
+def find_books(names):
+    """
+    expand any directories in a list of file names to the .txt files in them
+    """
+    filenames = []
+    for name in names:
+        if os.path.isdir(name):
+            filenames.extend(sorted(os.path.join(name, f)
+                                    for f in os.listdir(name)
+                                    if f.endswith(".txt")))
+        else:
+            filenames.append(name)
+    return filenames
+
+
+if __name__ == "__main__":
+    filenames = find_books(sys.argv[1:])
+    if not filenames:
+        print("You must pass in a filename or directory")
+        sys.exit(1)
+
+    word_pairs = build_trigram_parallel(filenames)
+
+    print(trigrams.build_text(word_pairs))
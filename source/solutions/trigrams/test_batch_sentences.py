@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""
+tests for the batch sentence generator
+"""
+
+from itertools import islice
+
+import trigrams
+from compact_trigrams import CompactTrigrams
+from mapped_trigrams import save_model
+from batch_sentences import iter_sentences, generate_streams, stream_seed
+
+from test_trigrams import LONGER_TEXT
+
+
+MODEL = CompactTrigrams.from_words(LONGER_TEXT)
+
+
+def test_sentences():
+    sentences = list(iter_sentences(MODEL, 1234, 100))
+
+    assert len(sentences) == 100
+    for sentence in sentences:
+        assert 4 <= len(sentence.split()) <= 12
+        assert sentence[0] == sentence[0].upper()
+        assert sentence.endswith(".")
+
+
+def test_words_follow():
+    """
+    every three words in a sentence should be a trigram from the text
+    (apart from after a dead end)
+    """
+    words = [word.lower() for word in LONGER_TEXT]
+    tri_dict = trigrams.build_trigram(words)
+    model = CompactTrigrams.from_words(words)
+    last_pair = tuple(words[-2:])
+    for sentence in iter_sentences(model, 1234, 100,
+                                   min_words=3, max_words=3):
+        first, second, third = sentence[:-1].split()
+        pair = (first.lower(), second)
+        if pair != last_pair:
+            assert third in tri_dict[pair]
+
+
+def test_forever():
+    sentences = iter_sentences(MODEL, 1234)
+
+    assert len(list(islice(sentences, 1000))) == 1000
+
+
+def test_reproducible():
+    assert (list(iter_sentences(MODEL, 42, 50)) ==
+            list(iter_sentences(MODEL, 42, 50)))
+    assert (list(iter_sentences(MODEL, 42, 50)) !=
+            list(iter_sentences(MODEL, 43, 50)))
+
+
+def test_dict_model():
+    tri_dict = trigrams.build_trigram(LONGER_TEXT)
+
+    assert (list(iter_sentences(tri_dict, 42, 50)) ==
+            list(iter_sentences(MODEL, 42, 50)))
+
+
+def test_generate_streams():
+    streams = list(generate_streams(MODEL, 4, 20, seed=7, processes=2))
+
+    assert len(streams) == 4
+    for i, stream in enumerate(streams):
+        assert stream == list(iter_sentences(MODEL, stream_seed(7, i), 20))
+
+
+def test_generate_streams_file(tmp_path):
+    model_file = str(tmp_path / "model.tri")
+    save_model(MODEL, model_file)
+
+    from_file = list(generate_streams(model_file, 3, 10, processes=2))
+    in_memory = list(generate_streams(MODEL, 3, 10, processes=1))
+
+    # the saved model has its words renumbered, so the sentences aren't
+    # the same -- but there are the right number of them
+    assert [len(stream) for stream in from_file] == [10, 10, 10]
+    assert [len(stream) for stream in in_memory] == [10, 10, 10]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""
+tests for the compact trigram model
+"""
+
+import random
+from collections import Counter
+
+import trigrams
+import compact_trigrams
+from compact_trigrams import CompactTrigrams, pack_pair, unpack_pair, NO_PAIR
+
+from test_trigrams import IWISH, LONGER_TEXT
+
+
+def test_pack_unpack():
+    assert unpack_pair(pack_pair(3, 45678)) == (3, 45678)
+
+
+def test_intern():
+    model = CompactTrigrams()
+
+    assert model.intern("this") == 0
+    assert model.intern("that") == 1
+    assert model.intern("this") == 0
+    assert model.words == ["this", "that"]
+
+
+def test_pairs():
+    model = CompactTrigrams.from_words(IWISH)
+
+    assert len(model) == 4
+    for pair in [("I", "wish"), ("wish", "I"), ("may", "I"), ("I", "may")]:
+        assert pair in model
+    assert ("wish", "wish") not in model
+    assert ("not", "there") not in model
+
+
+def test_followers():
+    model = CompactTrigrams.from_words(IWISH)
+
+    assert model.get_followers(("I", "wish")) == {"I": 2}
+    assert model.get_followers(("wish", "I")) == {"may": 1, "might": 1}
+    assert model.get_followers(("may", "I")) == {"wish": 1}
+
+
+def test_same_as_dict():
+    """
+    the counts should match the lists in the regular trigrams dict
+    """
+    words = LONGER_TEXT * 3
+    tri_dict = trigrams.build_trigram(words)
+    model = CompactTrigrams.from_words(words)
+
+    assert len(model) == len(tri_dict)
+    for pair, followers in tri_dict.items():
+        assert model.get_followers(pair) == Counter(followers)
+
+
+def test_from_dict():
+    tri_dict = trigrams.build_trigram(LONGER_TEXT)
+    model = CompactTrigrams.from_dict(tri_dict)
+
+    for pair, followers in tri_dict.items():
+        assert model.get_followers(pair) == Counter(followers)
+
+
+def test_add_words_more_than_once():
+    model = CompactTrigrams.from_words(IWISH)
+    model.add_words(IWISH)
+
+    assert model.get_followers(("I", "wish")) == {"I": 4}
+    assert model.get_followers(("wish", "I")) == {"may": 2, "might": 2}
+
+
+def test_random_follower_distribution():
+    """
+    a follower that shows up more often should be picked more often
+    """
+    model = CompactTrigrams.from_words("a b c a b c a b c a b d".split())
+
+    random.seed(1234)
+    picked = Counter(model.get_random_follower(("a", "b")) for _ in range(4000))
+
+    assert set(picked) == {"c", "d"}
+    # should be about 3 to 1
+    assert 2.5 < picked["c"] / picked["d"] < 3.5
+
+
+def test_random_follower_not_there():
+    model = CompactTrigrams.from_words(IWISH)
+
+    assert model.get_random_follower(("not", "there"))
+
+
+def test_make_sentence():
+    """
+    the compact model can be used with the regular trigrams functions
+    """
+    model = CompactTrigrams.from_words(LONGER_TEXT)
+
+    sentence = trigrams.make_sentence(model, 6)
+
+    assert len(sentence.split()) == 6
+    assert sentence[-1] == "."
+
+
+def test_transitions():
+    """
+    each follower leads to the pair made with the word before it
+    """
+    model = CompactTrigrams.from_words(IWISH)
+    transitions = model.transitions()
+    keys = list(model.keys)
+
+    for key, counts in model.items():
+        second = unpack_pair(key)[1]
+        start = model.offsets[keys.index(key)]
+        for j, (follower, count) in enumerate(counts, start):
+            next_key = pack_pair(second, follower)
+            if next_key in keys:
+                assert transitions[j] == keys.index(next_key)
+            else:
+                assert transitions[j] == NO_PAIR
+
+
+def test_small_batches(monkeypatch):
+    """
+    packing the trigrams a few at a time gives the same model
+    """
+    words = LONGER_TEXT * 3 + IWISH
+    whole = CompactTrigrams.from_words(words)
+    monkeypatch.setattr(compact_trigrams, "PENDING_PAIRS", 3)
+
+    model = CompactTrigrams.from_words(words)
+
+    assert model.keys == whole.keys
+    assert model.words == whole.words
+    for (key, counts), (key2, counts2) in zip(model.items(), whole.items()):
+        assert key == key2
+        assert dict(counts) == dict(counts2)
+    tri_dict = trigrams.build_trigram(words)
+    assert CompactTrigrams.from_dict(tri_dict).keys == whole.keys
+
+
+def test_compact_keeps_transitions_for_counts():
+    """
+    adding counts of followers that are already there doesn't change
+    the structure -- only new pairs and followers do
+    """
+    model = CompactTrigrams.from_words(IWISH)
+    transitions = model.transitions()
+
+    model.add_words(IWISH)
+    assert model.transitions() is transitions
+    model.add_words(["I", "wish", "you"])
+    assert model.transitions() is not transitions
+
+
+def test_make_run_adds_repeats():
+    """
+    the same trigram in more than one run is counted once, with the
+    counts added up
+    """
+    run1 = compact_trigrams._make_run([1 << 64 | 2 << 32 | 1,
+                                       3 << 64 | 4 << 32 | 2])
+    run2 = compact_trigrams._make_run([3 << 64 | 4 << 32 | 5,
+                                       1 << 64 | 7 << 32 | 1])
+    keys, follower_counts = compact_trigrams._make_run(
+        list(compact_trigrams._run_entries(run1))
+        + list(compact_trigrams._run_entries(run2)) * 2)
+
+    assert list(keys) == [1, 1, 3]
+    assert list(follower_counts) == [2 << 32 | 1, 7 << 32 | 2, 4 << 32 | 12]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+"""
+tests for saving and memory-mapping trigram models
+"""
+
+import random
+
+import pytest
+
+import trigrams
+from compact_trigrams import CompactTrigrams, build_transitions
+from mapped_trigrams import MappedTrigrams, save_model
+
+from test_trigrams import LONGER_TEXT, SMALL_BOOK
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    filename = str(tmp_path / "model.tri")
+    save_model(CompactTrigrams.from_words(LONGER_TEXT * 2), filename)
+    return filename
+
+
+def test_round_trip(model_file):
+    model = CompactTrigrams.from_words(LONGER_TEXT * 2)
+    with MappedTrigrams(model_file) as mapped:
+        assert len(mapped) == len(model)
+        assert sorted(mapped.words) == sorted(model.words)
+        assert list(mapped.words) == sorted(model.words)
+        for key, counts in model.items():
+            id1, id2 = key >> 32, key & 0xFFFFFFFF
+            pair = (model.words[id1], model.words[id2])
+            assert mapped.get_followers(pair) == model.get_followers(pair)
+
+
+def test_save_dict(tmp_path):
+    filename = str(tmp_path / "model.tri")
+    tri_dict = trigrams.build_trigram_stream(trigrams.iter_words([SMALL_BOOK]))
+    save_model(tri_dict, filename)
+
+    with MappedTrigrams(filename) as mapped:
+        assert len(mapped) == len(tri_dict)
+        for pair, followers in tri_dict.items():
+            assert sum(mapped.get_followers(pair).values()) == len(followers)
+
+
+def test_not_there(model_file):
+    with MappedTrigrams(model_file) as mapped:
+        assert ("was", "seized") in mapped
+        assert ("was", "zebra") not in mapped
+        assert ("aardvark", "was") not in mapped
+        with pytest.raises(KeyError):
+            mapped.get_followers(("was", "zebra"))
+        assert mapped.get_random_follower(("was", "zebra"))
+
+
+def test_saved_transitions(model_file):
+    with MappedTrigrams(model_file) as mapped:
+        transitions = mapped.transitions()
+        # read from the file, not made again
+        assert mapped.transitions() is transitions
+        assert list(transitions) == list(build_transitions(
+            mapped.keys, mapped.offsets, mapped.followers))
+
+
+def test_read_only(model_file):
+    with MappedTrigrams(model_file) as mapped:
+        with pytest.raises(TypeError):
+            mapped.add_words(["one", "two", "three"])
+
+
+def test_not_a_model(tmp_path):
+    filename = tmp_path / "junk.tri"
+    filename.write_bytes(b"this is not a model" * 10)
+
+    with pytest.raises(ValueError):
+        MappedTrigrams(str(filename))
+
+
+def test_make_sentence(model_file):
+    random.seed(1234)
+    with MappedTrigrams(model_file) as mapped:
+        sentence = trigrams.make_sentence(mapped, 8)
+
+    assert len(sentence.split()) == 8
+    assert sentence[-1] == "."
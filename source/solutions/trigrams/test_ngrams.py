@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+"""
+tests for the n-gram model
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+import ngrams
+import trigrams
+from ngrams import NGramModel
+
+from test_trigrams import IWISH, LONGER_TEXT
+
+
+def test_order_too_small():
+    with pytest.raises(ValueError):
+        NGramModel(1)
+
+
+def test_trigrams_same():
+    """
+    an order 3 model has the same followers as the trigrams dict
+    """
+    tri_dict = trigrams.build_trigram(LONGER_TEXT)
+    model = NGramModel.from_words(LONGER_TEXT, 3)
+
+    for pair, followers in tri_dict.items():
+        assert model.get_followers(pair) == Counter(followers)
+
+
+def test_lower_orders():
+    """
+    a higher order model has the lower orders in it too
+    """
+    model = NGramModel.from_words(IWISH, 4)
+
+    assert model.get_followers(("I", "wish", "I")) == {"may": 1, "might": 1}
+    assert model.get_followers(("I", "wish")) == {"I": 2}
+    assert model.get_followers(("I",)) == {"wish": 2, "may": 1, "might": 1}
+    assert model.get_followers(()) == {"I": 4, "wish": 2,
+                                       "may": 1, "might": 1}
+
+
+def test_not_there():
+    model = NGramModel.from_words(IWISH, 3)
+
+    with pytest.raises(KeyError):
+        model.get_followers(("wish", "wish"))
+    with pytest.raises(KeyError):
+        model.get_followers(("not", "there"))
+    with pytest.raises(KeyError):
+        model.get_followers(("too", "many", "words"))
+
+
+def test_nothing_follows():
+    """
+    a context that is there, but at the very end, has no followers
+    """
+    model = NGramModel.from_words(IWISH, 3)
+
+    with pytest.raises(KeyError):
+        model.get_followers(("I", "might"))
+
+
+def test_add_words_more_than_once():
+    model = NGramModel.from_words(IWISH, 3)
+    model.add_words(IWISH)
+
+    assert model.get_followers(("wish", "I")) == {"may": 2, "might": 2}
+    assert model.get_followers(()) == {"I": 8, "wish": 4,
+                                       "may": 2, "might": 2}
+
+
+def assert_same_trie(model1, model2):
+    model1.compact()
+    model2.compact()
+    assert model1.words == model2.words
+    for level1, level2 in zip(model1.levels, model2.levels):
+        assert level1.ids == level2.ids
+        assert level1.parents == level2.parents
+        assert level1.cum_counts == level2.cum_counts
+
+
+@pytest.mark.parametrize("order", [2, 3, 4])
+def test_add_words_spanning(order):
+    """
+    the n-grams that span two calls to add_words are counted
+    """
+    model = NGramModel(order)
+    for i in range(0, len(LONGER_TEXT), 7):
+        model.add_words(LONGER_TEXT[i:i + 7])
+
+    assert_same_trie(model, NGramModel.from_words(LONGER_TEXT, order))
+
+
+def test_small_batches(monkeypatch):
+    """
+    packing the counts a few at a time gives the same trie
+    """
+    model = NGramModel.from_words(LONGER_TEXT, 4)
+    monkeypatch.setattr(ngrams, "PENDING_NGRAMS", 3)
+
+    assert_same_trie(NGramModel.from_words(LONGER_TEXT, 4), model)
+
+
+@pytest.mark.parametrize("order", [2, 3, 5])
+def test_small_batches_spanning(monkeypatch, order):
+    """
+    batches that start part way through a call to add_words, or at the
+    start of one, give the same trie
+    """
+    whole = NGramModel.from_words(LONGER_TEXT, order)
+    monkeypatch.setattr(ngrams, "PENDING_NGRAMS", 4)
+    model = NGramModel(order)
+    for i in range(0, len(LONGER_TEXT), 5):
+        model.add_words(LONGER_TEXT[i:i + 5])
+        if i % 3 == 0:
+            model.compact()
+
+    assert_same_trie(model, whole)
+
+
+def test_followers_after_add():
+    model = NGramModel.from_words(IWISH, 3)
+    assert model.get_followers(("I", "wish")) == {"I": 2}
+    model.add_words(["I", "wish", "upon"])
+
+    assert model.get_followers(("I", "wish")) == {"I": 2, "upon": 1}
+    assert model.get_followers(("might", "I")) == {"wish": 1}
+
+
+def test_backoff():
+    """
+    an unknown context backs off to a shorter one
+    """
+    model = NGramModel.from_words(IWISH, 3)
+
+    random.seed(1234)
+    # "might" is the end of the text, so ("I", "might") has no followers
+    # -- but "might" has none either, so it has to back off to any word
+    assert model.get_random_follower(["I", "might"]) in IWISH
+    # ("not", "wish") isn't there, but "wish" is always followed by "I"
+    for _ in range(10):
+        assert model.get_random_follower(["not", "wish"]) == "I"
+
+
+@pytest.mark.parametrize("order", [2, 3, 4, 5])
+def test_make_sentence(order):
+    model = NGramModel.from_words(LONGER_TEXT, order)
+
+    sentence = model.make_sentence(8)
+
+    assert len(sentence.split()) == 8
+    assert sentence[0] == sentence[0].upper()
+    assert sentence.endswith(".")
+
+
+def test_pick_random_context():
+    model = NGramModel.from_words(LONGER_TEXT, 4)
+    text = " ".join(LONGER_TEXT)
+
+    for _ in range(20):
+        context = model.pick_random_context()
+        assert len(context) == 3
+        assert " ".join(context) in text
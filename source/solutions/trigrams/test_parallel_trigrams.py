@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+"""
+tests for building trigrams in parallel
+"""
+
+import pickle
+from array import array
+
+import trigrams
+import parallel_trigrams as pt
+from compact_trigrams import CompactTrigrams, unpack_pair
+
+from test_trigrams import SMALL_BOOK
+
+
+def write_book(path, text):
+    """
+    write a text file that looks like a Gutenberg book to read_lines
+    """
+    path.write_text("\n" * 61 + text + "\n")
+    return str(path)
+
+
+def test_trigram_dict_pickle():
+    tris = trigrams.build_trigram("I wish I may I wish I might".split())
+    tris2 = pickle.loads(pickle.dumps(tris))
+
+    assert tris2 == tris
+    assert tris2.pairs == tris.pairs
+
+
+def write_books(tmp_path):
+    """
+    some short books -- including ones too short for a trigram
+    """
+    texts = ["I wish I may", "I wish", "I", "", "might I wish I may"]
+    return [write_book(tmp_path / f"book{i}.txt", text)
+            for i, text in enumerate(texts)]
+
+
+def test_read_book(tmp_path):
+    words, ids = pt.read_book(write_book(tmp_path / "book.txt",
+                                         "I wish I may I wish"))
+
+    assert words == ["I", "wish", "may"]
+    assert list(ids) == [0, 1, 0, 2, 0, 1]
+
+
+def test_join_books(tmp_path):
+    books = write_books(tmp_path)
+    sequential = CompactTrigrams()
+    sequential_ids = [sequential.intern(word)
+                      for word in trigrams.iter_words(books)]
+    words, ids = pt.join_books(pt.read_book(book) for book in books)
+
+    assert words == sequential.words
+    assert list(ids) == sequential_ids
+
+
+def test_split_ids():
+    ids = array('I', [0, 1, 0, 2, 3, 1, 4, 0, 1, 2])
+    parts = pt.split_ids(ids, 5, 3)
+
+    assert len(parts) == 3
+    # all the words, in order, with no gaps
+    assert [i for part in parts for i in part] == list(range(5))
+
+
+def test_split_ids_short():
+    assert pt.split_ids(array('I', [0, 1]), 2, 4) == [range(2)]
+    assert pt.split_ids(array('I'), 0, 4) == [range(0)]
+
+
+def test_slice_ids():
+    ids = array('I', range(10))
+    slices = pt.slice_ids(ids, 3)
+
+    assert len(slices) == 3
+    # each trigram is in just one of them
+    trigrams_in = [tuple(s[i:i + 3])
+                   for s in slices for i in range(len(s) - 2)]
+    assert trigrams_in == [tuple(ids[i:i + 3]) for i in range(8)]
+
+
+def test_slice_ids_short():
+    assert pt.slice_ids(array('I', [0, 1]), 4) == []
+    assert pt.slice_ids(array('I', [0, 1, 2, 3]), 4) == [array('I', [0, 1, 2]),
+                                                        array('I', [1, 2, 3])]
+
+
+def build_parts(books, num_slices, num_parts):
+    """
+    count the slices, and build each range of first words, like
+    build_trigram_parallel does -- without the processes
+    """
+    words, ids = pt.join_books(pt.read_book(book) for book in books)
+    parts = pt.split_ids(ids, len(words), num_parts)
+    slices = pt.slice_ids(ids, num_slices)
+    dict_parts = [pt.build_part(counts, words) for counts in
+                  zip(*(pt.count_slice(s, parts) for s in slices))]
+    compact_parts = [pt.build_compact_part(counts) for counts in
+                     zip(*(pt.count_compact_slice(s, parts) for s in slices))]
+    return words, dict_parts, compact_parts
+
+
+def test_parts_same_as_sequential(tmp_path):
+    books = write_books(tmp_path)
+    sequential = trigrams.build_trigram_stream(trigrams.iter_words(books))
+    _, parts, _ = build_parts(books, 4, 3)
+    # each pair is only in one part
+    assert sum(len(part) for part in parts) == len(sequential)
+
+    joined = pt.join_parts(parts)
+    assert joined == sequential
+    assert sorted(joined.pairs) == sorted(sequential.pairs)
+
+
+def test_compact_parts_same_as_sequential(tmp_path):
+    books = write_books(tmp_path)
+    sequential = CompactTrigrams.from_words(trigrams.iter_words(books))
+    words, _, parts = build_parts(books, 4, 3)
+    model = pt.join_compact_parts(words, parts)
+
+    assert model.words == sequential.words
+    assert model.keys == sequential.keys
+    assert model.offsets == sequential.offsets
+    assert model.followers == sequential.followers
+    assert model.cum_counts == sequential.cum_counts
+
+
+def test_parts_many_slices():
+    """
+    the pairs that are in more than one slice have their followers put
+    together in order
+    """
+    books = [SMALL_BOOK] * 2
+    sequential = trigrams.build_trigram_stream(trigrams.iter_words(books))
+    sequential_compact = CompactTrigrams.from_words(trigrams.iter_words(books))
+    words, parts, compact_parts = build_parts(books, 7, 3)
+
+    assert pt.join_parts(parts) == sequential
+    model = pt.join_compact_parts(words, compact_parts)
+    assert list(model.items()) == list(sequential_compact.items())
+
+
+def test_build_trigram_parallel():
+    books = [SMALL_BOOK] * 3
+    sequential = trigrams.build_trigram_stream(trigrams.iter_words(books))
+
+    assert pt.build_trigram_parallel(books, processes=2) == sequential
+
+
+def test_build_trigram_parallel_compact():
+    books = [SMALL_BOOK] * 3
+    sequential = CompactTrigrams.from_words(trigrams.iter_words(books))
+    model = pt.build_trigram_parallel(books, processes=2, compact=True)
+
+    assert model.words == sequential.words
+    assert list(model.items()) == list(sequential.items())
+
+
+def test_build_trigram_parallel_no_books():
+    assert pt.build_trigram_parallel([], processes=2) == {}
+    assert len(pt.build_trigram_parallel([], processes=2, compact=True)) == 0
+
+
+def test_find_books(tmp_path):
+    write_book(tmp_path / "b.txt", "")
+    write_book(tmp_path / "a.txt", "")
+    (tmp_path / "notes.md").write_text("")
+
+    assert pt.find_books([str(tmp_path), "other.txt"]) == [
+        str(tmp_path / "a.txt"), str(tmp_path / "b.txt"), "other.txt"]
@@ -17,9 +17,12 @@ the text -- if so, then update the tests (and add more) to reflect how you want
 
 # this is expecting a "trigrams.py" file with your code in it.
 
+import os
 import random
 import trigrams
 
+SMALL_BOOK = os.path.join(os.path.dirname(__file__), "sherlock_small.txt")
+
 IWISH = "I wish I may I wish I might".split()
 
 LONGER_TEXT = """I was seized with a keen desire to see Holmes
@@ -64,6 +67,49 @@ def test_trigrams_following_words():
     assert tris[("I", "may")] == ["I"]
 
 
+def test_build_trigram_stream():
+    """
+    the streaming version should give the same result as the list version
+    """
+    tris = trigrams.build_trigram_stream(iter(LONGER_TEXT))
+
+    assert tris == trigrams.build_trigram(LONGER_TEXT)
+
+
+def test_build_trigram_stream_add_to():
+    """
+    adding to an existing dict in pieces should be the same as all at once
+    """
+    tris = trigrams.build_trigram_stream(IWISH[:4])
+    tris = trigrams.build_trigram_stream(IWISH[2:], tris)
+
+    assert tris == trigrams.build_trigram(IWISH)
+
+
+def test_build_trigram_stream_too_short():
+    assert trigrams.build_trigram_stream(["one", "two"]) == {}
+
+
+def test_iter_words():
+    """
+    streaming the words from a file gives the same words as reading it all in
+    """
+    words = list(trigrams.iter_words([SMALL_BOOK]))
+
+    assert words == trigrams.make_words(
+        trigrams.read_in_data(SMALL_BOOK))
+
+
+def test_iter_words_multiple_files():
+    """
+    the words keep going across files -- so trigrams span file boundaries
+    """
+    words = list(trigrams.iter_words([SMALL_BOOK] * 2))
+    single = trigrams.make_words(trigrams.read_in_data(SMALL_BOOK))
+
+    assert words == single * 2
+
+
 def test_pick_random_pair():
     test_pairs = {("one", "two"): [],
                   ("two", "three"): [],
@@ -78,6 +124,35 @@ def test_pick_random_pair():
     assert pair == ('six', 'seven')
 
 
+def test_trigram_dict_pairs():
+    """
+    the TrigramDict keeps its list of pairs in sync with its keys
+    """
+    tris = trigrams.build_trigram(IWISH)
+
+    assert isinstance(tris, trigrams.TrigramDict)
+    assert tris.pairs == list(tris.keys())
+
+    tris[("new", "pair")] = ["word"]
+    del tris[("I", "wish")]
+    tris.pop(("may", "I"))
+
+    assert tris.pairs == list(tris.keys())
+
+
+def test_trigram_dict_pick_random_pair():
+    """
+    picking from a TrigramDict gives the same answer as from a dict
+    """
+    tris = trigrams.build_trigram(LONGER_TEXT)
+
+    random.seed(1234)
+    pair = trigrams.pick_random_pair(tris)
+    random.seed(1234)
+
+    assert pair == trigrams.pick_random_pair(dict(tris))
+
+
 def test_get_last_pair():
     words = ["this", "that", "the", "other"]
 
@@ -241,3 +316,38 @@ def test_make_words_single_quote():
     assert False
 
 
+# make_words_fast should give exactly the same words as make_words
+# so check that on the text above, and a lot of random text made up
+# of the tricky characters.
+
+def test_make_words_fast_same():
+    assert (trigrams.make_words_fast(TEXT_WITH_PUNC) ==
+            trigrams.make_words(TEXT_WITH_PUNC))
+
+
+def test_make_words_fast_single_quotes():
+    text = """' '' ''' 'i i' 'I' i 'it's' a'b i-i (i) "'" ''a''"""
+
+    assert trigrams.make_words_fast(text) == trigrams.make_words(text)
+
+
+def test_make_words_fast_random():
+    """
+    property test: make_words_fast agrees with make_words on random text
+    """
+    rand = random.Random(42)
+    characters = "aIib'\"-.,() \n\t ’\x1c"
+    for _ in range(20000):
+        text = "".join(rand.choice(characters)
+                       for _ in range(rand.randint(0, 20)))
+        assert trigrams.make_words_fast(text) == trigrams.make_words(text), \
+            repr(text)
+
+
+def test_make_words_fast_empty_word_char():
+    """
+    if the text happens to have the place holder in it, it still works
+    """
+    text = "this has a \x00 in ' it"
+
+    assert trigrams.make_words_fast(text) == trigrams.make_words(text)
@@ -14,7 +14,9 @@ This one is pretty straight forward -- really a quickie script
 There is lots of room to make it fancier of you want
 """
 
+import re
 import sys
+from itertools import islice
 from random import randint, choice
 
 
@@ -56,26 +58,166 @@ def make_words(text):
     return words2
 
 
-def read_in_data(infilename):
+# These are used by make_words_fast -- made once, rather than every call.
+# The punctuation to remove (or replace with a space):
+PUNCTUATION_TABLE = str.maketrans({'-': ' ',
+                                   ',': None,
+                                   '.': None,
+                                   ')': None,
+                                   '(': None,
+                                   '"': None,
+                                   })
+# a lone "i" -- not part of a longer word
+# (the regex module searches much faster for a pattern that starts
+#  with a plain character, so the look-behind goes after the i)
+LONE_I = re.compile(r"i(?!\S)(?<!\Si)")
+# a word that is nothing but one or two single quotes
+ONLY_QUOTES = re.compile(r"'(?<!\S')'?(?!\S)")
+# a single quote at the start or end of a word
+OUTER_QUOTE = re.compile(r"'(?<!\S')|'(?!\S)")
+# stands in for the words that end up empty
+EMPTY_WORD = "\x00"
+# the number of lines iter_words tokenizes at once
+CHUNK_LINES = 1000
+
+
+def make_words_fast(text):
     """
-    read the contents of a project Gutenberg book
+    make a list of words from a large bunch of text
 
-    returns it as one big string
+    This gives exactly the same result as make_words, but rather than
+    looping through the words in Python, it works on the whole text at
+    once with str.translate, regular expressions and str.split -- which
+    all do their looping in C.
+    """
+    if EMPTY_WORD in text:  # can't use it as a place holder
+        return make_words(text)
+    text = text.translate(PUNCTUATION_TABLE).lower()
+    text = LONE_I.sub("I", text)
+    # make_words turns a bare quote into an empty word -- the place holder
+    # keeps it from disappearing when the text is split.
+    text = ONLY_QUOTES.sub(EMPTY_WORD, text)
+    text = OUTER_QUOTE.sub("", text)
+    words = text.split()
+    # there are very few of these, so find them with list.index
+    # rather than looping through all the words
+    i = -1
+    for _ in range(text.count(EMPTY_WORD)):
+        i = words.index(EMPTY_WORD, i + 1)
+        words[i] = ""
+    return words
+
+
+def read_lines(infilename):
+    """
+    generate the lines of a project Gutenberg book, one at a time
+
+    skips the header and stops at the footer, so only the text of the
+    book itself is produced -- the whole file is never in memory at once
     """
     with open(infilename, 'r') as infile:  # text mode is default
         # strip out the header, table of contents, etc.
         for i in range(61):
             infile.readline()
 
-        full_text = []
         # read the rest of the file line by line -- stopping at the footer
         for line in infile:
             if line.startswith("End of the Project Gutenberg EBook"):
                 break
-            full_text.append(line)
+            yield line
+
+
+def read_in_data(infilename):
+    """
+    read the contents of a project Gutenberg book
 
+    returns it as one big string
+    """
     # put all the lines together into one big string:
-    return " ".join(full_text)
+    return " ".join(read_lines(infilename))
+
+
+def iter_words(filenames):
+    """
+    generate the words from a sequence of project Gutenberg books
+
+    The text is tokenized a chunk of lines at a time, so only a small
+    piece of it is ever in memory. As make_words only ever looks at one
+    word at a time, this gives exactly the same words as
+    make_words(read_in_data(filename)) would for each file in turn --
+    make_words_fast is used, as it gives the same words, only faster.
+
+    :param filenames: an iterable of file names, read in order
+    """
+    for filename in filenames:
+        lines = read_lines(filename)
+        while True:
+            # tokenizing a bunch of lines at once is a lot faster than
+            # one at a time -- and still doesn't need much memory
+            chunk = " ".join(islice(lines, CHUNK_LINES))
+            if not chunk:
+                break
+            yield from make_words_fast(chunk)
+
+
+class TrigramDict(dict):
+    """
+    A dict that also keeps a list of its keys
+
+    picking a random key from a regular dict requires making a list of
+    all the keys -- every time. This keeps the list up to date as keys
+    are added, so a random pair can be picked in O(1).
+
+    Removing a key needs to search the list, so is O(n) -- but when
+    building up trigrams, keys are only ever added.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pairs = list(self.keys())
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.pairs.append(key)
+        super().__setitem__(key, value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.pairs.append(key)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.pairs.remove(key)
+
+    def pop(self, key, *args):
+        if key in self:
+            self.pairs.remove(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        item = super().popitem()
+        self.pairs.remove(item[0])
+        return item
+
+    def clear(self):
+        super().clear()
+        self.pairs.clear()
+
+    def __reduce__(self):
+        # the default pickling would add the items before the pairs
+        # list exists -- so rebuild it from a regular dict instead
+        return (self.__class__, (dict(self),))
+
+    def pick_random_pair(self):
+        """
+        return a random key -- without making a new list
+        """
+        return choice(self.pairs)
 
 
 def build_trigram(words):
@@ -84,14 +226,15 @@ def build_trigram(words):
 
     :param words: a list of individual words in order
 
-    :returns: a dict with:
+    :returns: a TrigramDict with:
          keys: word pairs in tuples
          values: list of the words that follow the pain in the key
     """
     # Dictionary for trigram results:
     # The keys will be all the word pairs
     # The values will be a list of the words that follow each pair
-    word_pairs = {}
+    # (a TrigramDict is a dict that can pick a random key quickly)
+    word_pairs = TrigramDict()
 
     # loop through the words
     # (rare case where using the index to loop is easiest)
@@ -111,10 +254,46 @@ def build_trigram(words):
     return word_pairs
 
 
+def build_trigram_stream(words, word_pairs=None):
+    """
+    build up (or add to) the trigrams dict from a stream of words
+
+    Unlike build_trigram, this only looks at one word at a time, so it
+    works with any iterable -- such as the iter_words generator -- and
+    memory use depends only on the size of the dict, not on the size of
+    the input.
+
+    :param words: an iterable of individual words in order
+
+    :param word_pairs=None: an existing trigrams dict to add to -- if not
+                            provided, a new one is created.
+
+    :returns: the trigrams dict, same as build_trigram
+    """
+    if word_pairs is None:
+        word_pairs = TrigramDict()
+
+    # keep a sliding window of the last two words seen
+    words = iter(words)
+    try:
+        first = next(words)
+        second = next(words)
+    except StopIteration:  # not enough words for even one trigram
+        return word_pairs
+    for follower in words:
+        word_pairs.setdefault((first, second), []).append(follower)
+        first, second = second, follower
+    return word_pairs
+
+
 def pick_random_pair(word_pairs):
     """
     return a random key from the word_pairs dict
     """
+    # a model that knows how to pick its own pair -- let it
+    # (see TrigramDict and compact_trigrams.py)
+    if hasattr(word_pairs, "pick_random_pair"):
+        return word_pairs.pick_random_pair()
     return choice(list(word_pairs.keys()))
 
 
@@ -126,6 +305,8 @@ def get_last_pair(words):
 
 
 def get_random_follower(tri_dict, pair):
+    if hasattr(tri_dict, "get_random_follower"):
+        return tri_dict.get_random_follower(pair)
     try:
         return choice(tri_dict[pair])
     except KeyError:  # pair not there
@@ -173,16 +354,15 @@ def build_text(word_pairs):
 
 
 if __name__ == "__main__":
-    # get the filename from the command line
-    try:
-        filename = sys.argv[1]
-    except IndexError:
+    # get the filename(s) from the command line
+    filenames = sys.argv[1:]
+    if not filenames:
         print("You must pass in a filename")
         sys.exit(1)
 
-    in_data = read_in_data(filename)
-    words = make_words(in_data)
-    word_pairs = build_trigram(words)
+    # stream the words through, so even a huge set of books
+    # doesn't need to be read into memory all at once
+    word_pairs = build_trigram_stream(iter_words(filenames))
     new_text = build_text(word_pairs)
 
     print(new_text)